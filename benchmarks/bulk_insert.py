@@ -0,0 +1,47 @@
+"""Throughput of bulk idea ingestion.
+
+Inserts ``--ideas`` ideas into a temporary database, once with one
+``add_idea`` call (and commit) per idea and once with a single
+``add_ideas_bulk`` call, and prints ideas per second for each.
+
+Usage::
+
+    python benchmarks/bulk_insert.py --ideas 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from hermes.services import db
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ideas", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ("add_idea per idea", "add_ideas_bulk"):
+            db.init_db(str(Path(tmp) / f"{label.split()[0]}.db"))
+            user_id = db.add_user("bench", "tipo")
+            ideas = [
+                {"user_id": user_id, "title": f"Idea {i}", "body": "Body " * 20}
+                for i in range(args.ideas)
+            ]
+
+            start = time.perf_counter()
+            if label == "add_ideas_bulk":
+                db.add_ideas_bulk(ideas)
+            else:
+                for idea in ideas:
+                    db.add_idea(idea["user_id"], idea["title"], idea["body"])
+            elapsed = time.perf_counter() - start
+            print(f"{label:>18}: {args.ideas / elapsed:,.0f} ideas/s")
+
+
+if __name__ == "__main__":
+    main()
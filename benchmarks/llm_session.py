@@ -0,0 +1,105 @@
+"""Micro-benchmark of the per-call HTTP overhead of LLM requests.
+
+Starts a local stub of Ollama's ``/api/generate`` endpoint and times
+``gerar_resposta`` with the shared keep-alive session against the previous
+behaviour of building (and closing) a new ``requests.Session`` per call.
+
+Usage::
+
+    python benchmarks/llm_session.py --calls 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from hermes.services import llm_interface
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers every POST immediately with a fixed generation."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"response": "ok"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class FreshSessionClient(llm_interface.LLMClient):
+    """Reproduces the old behaviour: a new session for every request."""
+
+    def post(self, url, payload, timeout):
+        client = llm_interface.LLMClient()
+        try:
+            return client.post(url, payload, timeout)
+        finally:
+            client.close()
+
+
+def measure(call: Callable[[], object], calls: int, warmup: int) -> list[float]:
+    """Return the latency of ``calls`` invocations of ``call`` in ms."""
+
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/generate"
+
+    clients = {
+        "new session per call": FreshSessionClient(),
+        "shared session": llm_interface.get_client(),
+    }
+    try:
+        for label, client in clients.items():
+            samples = measure(
+                lambda: llm_interface.gerar_resposta(
+                    "ping", url=url, model="stub", client=client
+                ),
+                args.calls,
+                args.warmup,
+            )
+            samples.sort()
+            print(
+                f"{label:>22}: mean {statistics.mean(samples):.3f} ms, "
+                f"p50 {samples[len(samples) // 2]:.3f} ms, "
+                f"p95 {samples[int(len(samples) * 0.95)]:.3f} ms"
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Recognizer work saved by the voice activity gate.
+
+Feeds a WAV recording (16-bit mono, e.g. an idle room) through
+``HotwordListener`` block by block, once with the VAD gate and once without,
+and prints the fraction of blocks forwarded to Vosk and the CPU time spent in
+each stage.
+
+Usage::
+
+    python benchmarks/vad_idle.py sala_vazia.wav --model ~/.cache/vosk/model
+"""
+
+from __future__ import annotations
+
+import argparse
+import wave
+
+import vosk
+
+from hermes.assistant.voice import HotwordListener
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wav")
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--block", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    with wave.open(args.wav, "rb") as arquivo:
+        if arquivo.getsampwidth() != 2 or arquivo.getnchannels() != 1:
+            parser.error("the recording must be 16-bit mono")
+        samplerate = arquivo.getframerate()
+        audio = arquivo.readframes(arquivo.getnframes())
+
+    model = vosk.Model(args.model)
+    for vad in (False, True):
+        listener = HotwordListener(
+            samplerate=samplerate, block_duration=args.block, model=model, vad=vad
+        )
+        tamanho = listener._blocksize * 2
+        for inicio in range(0, len(audio) - tamanho + 1, tamanho):
+            listener._audio_callback(audio[inicio : inicio + tamanho], 0, None, None)
+            bloco = listener._buffer.ler(tamanho)
+            listener._processar_bloco(bloco)
+            listener._buffer.consumir(len(bloco))
+        stats = listener.estatisticas
+        print(
+            f"{'with VAD' if vad else 'without VAD':>11}: "
+            f"{stats.fracao_encaminhada:6.1%} of blocks to Vosk, "
+            f"CPU vad {stats.cpu_vad:.3f}s recognizer {stats.cpu_reconhecedor:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
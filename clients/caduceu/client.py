@@ -1,4 +1,10 @@
 import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
 from pathlib import Path
 
 import pyttsx3
@@ -6,6 +12,17 @@ import requests
 import yaml
 
 CONFIG_PATH = Path(__file__).with_name("config.yaml")
+DEFAULT_SPOOL_PATH = Path(__file__).with_name("spool.db")
+
+# Ideas sent per POST /ideas/bulk request.
+DEFAULT_BATCH_SIZE = 50
+# Retry delays (seconds) while the server is unreachable.
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 300.0
+# (connect, read) timeouts for sync requests.
+SYNC_TIMEOUT = (5, 30)
+
+logger = logging.getLogger(__name__)
 
 
 def load_config():
@@ -20,32 +37,166 @@ def push_to_talk():
     return input("Idea: ")
 
 
-def send_idea(cfg, text):
-    server = cfg["server"].rstrip("/")
-    headers = {
+def _headers(cfg):
+    return {
         "X-Token": cfg["token"],
         "X-Device-Id": cfg["device_id"],
     }
-    payload = {"user": cfg["device_id"], "title": text[:30], "body": text}
-    resp = requests.post(f"{server}/ideas", json=payload, headers=headers, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    expected_source = f"caduceu_{cfg['device_id']}"
-    if data.get("source") != expected_source:
-        raise ValueError(f"Unexpected source {data.get('source')}")
-    return data
+
+
+class Spool:
+    """Append-only local queue of ideas waiting to be sent to the server.
+
+    Ideas are written to a SQLite file before any network call, so nothing is
+    lost while the server is unreachable or if the client is closed. Each idea
+    gets an idempotency key, which lets the server ignore replays of ideas it
+    already stored.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS spool ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " key TEXT NOT NULL UNIQUE,"
+                " payload TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+
+    def append(self, payload):
+        """Store ``payload`` and return its idempotency key."""
+        key = uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO spool (key, payload, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(payload), time.time()),
+            )
+        return key
+
+    def peek(self, limit):
+        """Return up to ``limit`` of the oldest entries as ``(id, key, payload)``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, key, payload FROM spool ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row_id, key, json.loads(payload)) for row_id, key, payload in rows]
+
+    def remove(self, ids):
+        """Delete the entries with the given ``ids`` (already delivered)."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM spool WHERE id = ?", [(row_id,) for row_id in ids]
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Sender(threading.Thread):
+    """Background thread draining a :class:`Spool` into ``POST /ideas/bulk``.
+
+    Requests share one keep-alive ``requests.Session``. When the server is
+    unreachable or answers with a temporary error, the sender waits with
+    exponential backoff (plus jitter) and keeps the ideas spooled.
+    """
+
+    def __init__(self, cfg, spool, batch_size=DEFAULT_BATCH_SIZE):
+        super().__init__(name="caduceu-sender", daemon=True)
+        self.url = f"{cfg['server'].rstrip('/')}/ideas/bulk"
+        self.expected_source = f"caduceu_{cfg['device_id']}"
+        self.spool = spool
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        self.session.headers.update(_headers(cfg))
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._failures = 0
+
+    def notify(self):
+        """Wake the sender after a new idea was spooled."""
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        """Stop after the current batch, waiting up to ``timeout`` seconds."""
+        self._stop_event.set()
+        self._wakeup.set()
+        self.join(timeout)
+        self.session.close()
+
+    def _backoff(self):
+        delay = min(MAX_BACKOFF, MIN_BACKOFF * 2 ** self._failures)
+        self._failures += 1
+        return delay * random.uniform(0.5, 1.0)
+
+    def send_batch(self):
+        """Send one batch. Returns the number of ideas delivered or dropped."""
+        batch = self.spool.peek(self.batch_size)
+        if not batch:
+            return 0
+        items = [dict(payload, idempotency_key=key) for _, key, payload in batch]
+        resp = self.session.post(self.url, json=items, timeout=SYNC_TIMEOUT)
+        if resp.status_code == 422:
+            # Drop the idea the server can never accept so it does not block
+            # the rest of the queue; the others are retried right away.
+            index = resp.json().get("detail", {}).get("index", 0)
+            logger.error("Server rejected idea %r: %s", items[index], resp.text)
+            self.spool.remove([batch[index][0]])
+            return 1
+        resp.raise_for_status()
+        data = resp.json()
+        if data.get("source") != self.expected_source:
+            logger.warning("Unexpected source %s", data.get("source"))
+        self.spool.remove([row_id for row_id, _, _ in batch])
+        return len(batch)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                sent = self.send_batch()
+            except requests.RequestException as exc:
+                delay = self._backoff()
+                logger.warning("Sync failed (%s); retrying in %.0fs", exc, delay)
+                self._stop_event.wait(delay)
+                continue
+            self._failures = 0
+            if not sent:
+                self._wakeup.wait()
+                self._wakeup.clear()
+
+
+def send_idea(cfg, text, spool, sender=None):
+    """Spool an idea for delivery and return its idempotency key.
+
+    The idea is persisted locally first; ``sender`` (if given) is woken up
+    to deliver it in the background.
+    """
+    payload = {
+        "user": cfg.get("user", cfg["device_id"]),
+        "title": text[:30],
+        "body": text,
+    }
+    key = spool.append(payload)
+    if sender is not None:
+        sender.notify()
+    return key
 
 
 def ask_and_speak(cfg):
     server = cfg["server"].rstrip("/")
-    headers = {
-        "X-Token": cfg["token"],
-        "X-Device-Id": cfg["device_id"],
-    }
     prompt = input("Prompt to ask the server (leave empty to skip): ")
     if not prompt:
         return
-    resp = requests.post(f"{server}/ask", json={"prompt": prompt}, headers=headers, timeout=30)
+    resp = requests.post(
+        f"{server}/ask", json={"prompt": prompt}, headers=_headers(cfg), timeout=30
+    )
     resp.raise_for_status()
     answer = resp.json().get("response", "")
     if not answer:
@@ -57,16 +208,27 @@ def ask_and_speak(cfg):
 
 def main():
     cfg = load_config()
+    spool = Spool(cfg.get("spool_path", DEFAULT_SPOOL_PATH))
+    sender = Sender(cfg, spool, cfg.get("batch_size", DEFAULT_BATCH_SIZE))
+    sender.start()
     while True:
         try:
             text = push_to_talk()
             if not text.strip():
                 continue
-            send_idea(cfg, text)
-            ask_and_speak(cfg)
+            send_idea(cfg, text, spool, sender)
+            try:
+                ask_and_speak(cfg)
+            except requests.RequestException as exc:
+                print(f"Server unavailable: {exc}")
         except KeyboardInterrupt:
+            pending = len(spool)
+            if pending:
+                print(f"\n{pending} idea(s) will be sent on the next run.")
             print("\nExiting.")
             break
+    sender.stop(timeout=5)
+    spool.close()
 
 
 if __name__ == "__main__":
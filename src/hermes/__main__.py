@@ -1,10 +1,25 @@
 """Entrypoint for running Hermes as a module."""
 
-from .ui import gui
+import sys
+
+# Subcommands of ``hermes``; without one, the graphical interface starts.
+COMMANDS = {
+    "backfill": "hermes.core.backfill",
+    "transcribe": "hermes.core.transcricao",
+}
 
 
 def main(argv: list[str] | None = None) -> None:
-    """Launch the graphical user interface."""
+    """Run a subcommand such as ``backfill`` or launch the graphical interface."""
+    args = sys.argv[1:] if argv is None else list(argv)
+    if args and args[0] in COMMANDS:
+        from importlib import import_module
+
+        import_module(COMMANDS[args[0]]).main(args[1:])
+        return
+
+    from .ui import gui
+
     gui.main(argv)
 
 
@@ -1,19 +1,29 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import math
 import os
-import time
 
-from fastapi import Depends, FastAPI, Header, HTTPException, Request
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
 
 from .config import config
 from .core import app as core_app
+from .services import async_db
+from .services.db import IDEA_PAGE_SIZE
+from .services.llm_interface import aclose_async_client
+from .services.rate_limit import get_limiter
+
+MAX_PAGE_SIZE = 200
+MAX_BULK_IDEAS = 10_000
 
 app = FastAPI()
 
 # --- Auth -----------------------------------------------------------------
 
-def verify_token(x_token: str = Header(...)) -> None:
+async def verify_token(x_token: str = Header(...)) -> None:
     expected = config.API_TOKEN
     if not expected or x_token != expected:
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -21,22 +31,42 @@ def verify_token(x_token: str = Header(...)) -> None:
 
 # --- Rate limiting --------------------------------------------------------
 
-REQUEST_LIMIT = 60  # requests per minute
-_window = 60
-_requests: dict[str, tuple[int, float]] = {}
+def rate_limit_key(request: Request) -> str:
+    """Bucket key: per token when authenticated, else per address.
+
+    ``X-Device-Id`` is chosen by the client, so it is deliberately not part of
+    the key: rotating it must not yield a fresh bucket.
+    """
+
+    host = request.client.host if request.client else "global"
+    token = request.headers.get("X-Token")
+    if token and token == config.API_TOKEN:
+        digest = hashlib.sha256(token.encode()).hexdigest()[:16]
+        return f"token:{digest}"
+    return f"ip:{host}"
 
 
 @app.middleware("http")
 async def rate_limiter(request: Request, call_next):
-    key = request.client.host or "global"
-    now = time.time()
-    count, start = _requests.get(key, (0, now))
-    if now - start > _window:
-        count, start = 0, now
-    if count >= REQUEST_LIMIT:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    _requests[key] = (count + 1, start)
-    return await call_next(request)
+    limiter = get_limiter()
+    key = rate_limit_key(request)
+    if limiter.blocking:
+        result = await async_db.run(limiter.hit, key)
+    else:
+        result = limiter.hit(key)
+
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+        return JSONResponse(
+            {"detail": "Rate limit exceeded"}, status_code=429, headers=headers
+        )
+    response = await call_next(request)
+    response.headers.update(headers)
+    return response
 
 
 # --- Models ----------------------------------------------------------------
@@ -45,6 +75,8 @@ class Idea(BaseModel):
     user: int
     title: str
     body: str
+    # Client-generated key; replays with the same key do not duplicate ideas.
+    idempotency_key: str | None = None
 
 
 class Prompt(BaseModel):
@@ -55,34 +87,135 @@ class Prompt(BaseModel):
 
 @app.on_event("startup")
 def _startup() -> None:
-    core_app.inicializar()
+    # Several uvicorn workers may serve the API; only the one holding the
+    # scheduler lease fires reminders.
+    core_app.inicializar(agendador=config.SCHEDULER_MODE or "leader")
+    core_app.iniciar_workers()
+
+
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    core_app.parar_workers()
+    core_app.finalizar()
+    await aclose_async_client()
+    async_db.shutdown(wait=False)
 
 
 # --- Endpoints -------------------------------------------------------------
 
 @app.get("/health")
-def health() -> dict[str, str]:
+async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
 @app.post("/ideas")
-def create_idea(
+async def create_idea(
     idea: Idea,
     request: Request,
     _: None = Depends(verify_token),
 ) -> dict[str, int | str]:
-    device_id = request.headers.get("X-Device-Id", "")
-    source = f"caduceu_{device_id}" if device_id else "caduceu_"
-    result = core_app.registrar_ideia(
-        idea.user, idea.title, idea.body, usar_llm=False, source=source
+    source = _device_source(request)
+    result = await core_app.registrar_ideia_async(
+        idea.user,
+        idea.title,
+        idea.body,
+        source=source,
+        enriquecer=True,
+        chave=idea.idempotency_key or request.headers.get("Idempotency-Key"),
     )
     return {"id": result["id"], "source": source}
 
 
+@app.get("/ideas/{idea_id}/status")
+async def idea_status(idea_id: int, _: None = Depends(verify_token)) -> dict:
+    status = await core_app.status_ideia_async(idea_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Idea not found")
+    return status
+
+
+def _device_source(request: Request) -> str:
+    device_id = request.headers.get("X-Device-Id", "")
+    return f"caduceu_{device_id}" if device_id else "caduceu_"
+
+
+def _parse_bulk_body(body: bytes, content_type: str) -> list:
+    """Decode a JSON array or, for ``application/x-ndjson``, one idea per line."""
+
+    try:
+        if "ndjson" in content_type:
+            return [json.loads(line) for line in body.splitlines() if line.strip()]
+        items = json.loads(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc}") from exc
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array")
+    return items
+
+
+@app.post("/ideas/bulk")
+async def create_ideas_bulk(
+    request: Request,
+    _: None = Depends(verify_token),
+) -> dict:
+    items = _parse_bulk_body(
+        await request.body(), request.headers.get("Content-Type", "")
+    )
+    if len(items) > MAX_BULK_IDEAS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BULK_IDEAS} ideas per request"
+        )
+
+    source = _device_source(request)
+    ideas = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise HTTPException(
+                status_code=422, detail={"index": index, "errors": "Expected an object"}
+            )
+        try:
+            idea = Idea(**item)
+        except ValidationError as exc:
+            raise HTTPException(
+                status_code=422, detail={"index": index, "errors": exc.errors()}
+            ) from exc
+        ideas.append(
+            {
+                "user_id": idea.user,
+                "title": idea.title,
+                "body": idea.body,
+                "source": source,
+                "idempotency_key": idea.idempotency_key,
+            }
+        )
+
+    ids = await core_app.registrar_ideias_async(ideas, enriquecer=True)
+    return {"ids": ids, "source": source}
+
+
+@app.get("/ideas")
+async def list_ideas(
+    user: int | None = None,
+    cursor: str | None = None,
+    limit: int = Query(IDEA_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    q: str | None = None,
+    topic: str | None = None,
+    tag: str | None = None,
+    _: None = Depends(verify_token),
+) -> dict:
+    try:
+        ideas, next_cursor = await core_app.pagina_ideias_async(
+            user, cursor=cursor, limite=limit, texto=q, topico=topic, tag=tag
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"ideas": ideas, "next_cursor": next_cursor}
+
+
 @app.post("/ask")
-def ask(prompt: Prompt, _: None = Depends(verify_token)) -> dict[str, str]:
+async def ask(prompt: Prompt, _: None = Depends(verify_token)) -> dict[str, str]:
     try:
-        result = core_app.responder_prompt(prompt.prompt)
+        result = await core_app.responder_prompt_async(prompt.prompt)
     except RuntimeError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
     return {"response": result["response"]}
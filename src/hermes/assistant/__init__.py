@@ -1,14 +1,28 @@
 """Módulos do assistente Hermes."""
 
-from .engine import carregar_prompt_sistema, responder_mensagem, responder_sobre_ideias
+from .engine import (
+    RespostaAssistente,
+    agrupar_frases,
+    carregar_prompt_sistema,
+    responder_mensagem,
+    responder_mensagem_com_trace,
+    responder_mensagem_stream,
+    responder_sobre_ideias,
+    responder_sobre_ideias_com_trace,
+)
 from .state import ConversationState
 
 __all__ = [
+    "agrupar_frases",
     "carregar_prompt_sistema",
     "ConversationState",
     "HotwordListener",
+    "RespostaAssistente",
     "responder_mensagem",
+    "responder_mensagem_com_trace",
+    "responder_mensagem_stream",
     "responder_sobre_ideias",
+    "responder_sobre_ideias_com_trace",
 ]
 
 
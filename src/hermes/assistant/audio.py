@@ -0,0 +1,127 @@
+"""Estruturas de áudio usadas pela escuta contínua.
+
+:class:`AudioRingBuffer` liga o callback de captura do ``sounddevice`` à
+thread de reconhecimento. O buffer é alocado uma única vez; o callback apenas
+copia as amostras para ele, sem criar objetos por bloco, e o leitor recebe
+fatias ``memoryview`` do próprio buffer. Como o áudio já consumido só é
+sobrescrito quando o buffer dá a volta, os últimos segundos continuam
+disponíveis para recuperar o *pre-roll* que antecede a hotword.
+"""
+
+from __future__ import annotations
+
+import threading
+
+
+class AudioRingBuffer:
+    """Buffer circular de bytes com um escritor e um leitor.
+
+    Parameters
+    ----------
+    capacidade: int
+        Tamanho do buffer em bytes. Limita tanto o atraso tolerado do leitor
+        quanto o histórico disponível em :meth:`anteriores`.
+    """
+
+    def __init__(self, capacidade: int) -> None:
+        if capacidade <= 0:
+            raise ValueError("capacidade deve ser positiva")
+        self.capacidade = capacidade
+        self._dados = bytearray(capacidade)
+        self._view = memoryview(self._dados)
+        self._escrito = 0  # total de bytes já escritos
+        self._lido = 0  # total de bytes já consumidos pelo leitor
+        self._cond = threading.Condition()
+        self.descartados = 0  # bytes perdidos porque o leitor ficou para trás
+
+    @property
+    def posicao_escrita(self) -> int:
+        return self._escrito
+
+    @property
+    def posicao_leitura(self) -> int:
+        return self._lido
+
+    def pendentes(self) -> int:
+        """Bytes escritos e ainda não consumidos."""
+
+        with self._cond:
+            return self._escrito - self._lido
+
+    def escrever(self, dados) -> int:
+        """Copia ``dados`` (qualquer objeto com buffer protocol) para o anel.
+
+        Nunca bloqueia: pensado para o callback de áudio. Se não houver espaço
+        para todos os bytes sem sobrescrever o que o leitor ainda não
+        consumiu, o excedente é descartado e contado em :attr:`descartados`.
+        Retorna o número de bytes gravados.
+        """
+
+        origem = memoryview(dados).cast("B")
+        with self._cond:
+            livre = self.capacidade - (self._escrito - self._lido)
+            total = min(len(origem), livre)
+            self.descartados += len(origem) - total
+            inicio = self._escrito % self.capacidade
+            primeiro = min(total, self.capacidade - inicio)
+            self._view[inicio : inicio + primeiro] = origem[:primeiro]
+            if total > primeiro:
+                self._view[: total - primeiro] = origem[primeiro:total]
+            self._escrito += total
+            if total:
+                self._cond.notify()
+        return total
+
+    def ler(self, maximo: int, timeout: float | None = None) -> memoryview | None:
+        """Retorna até ``maximo`` bytes pendentes, sem copiá-los.
+
+        A fatia é contígua e por isso pode ser menor que o pendente quando os
+        dados dão a volta no anel. Ela continua válida até
+        :meth:`consumir` ser chamado. Retorna ``None`` se nada chegar dentro
+        de ``timeout`` segundos.
+        """
+
+        with self._cond:
+            if self._escrito == self._lido:
+                self._cond.wait(timeout)
+            disponivel = self._escrito - self._lido
+            if not disponivel:
+                return None
+            inicio = self._lido % self.capacidade
+            tamanho = min(maximo, disponivel, self.capacidade - inicio)
+            return self._view[inicio : inicio + tamanho]
+
+    def consumir(self, tamanho: int) -> None:
+        """Marca ``tamanho`` bytes retornados por :meth:`ler` como processados."""
+
+        with self._cond:
+            self._lido = min(self._escrito, self._lido + tamanho)
+
+    def anteriores(self, posicao: int, tamanho: int) -> bytes:
+        """Copia os até ``tamanho`` bytes que antecedem ``posicao``.
+
+        ``posicao`` é uma posição absoluta (por exemplo
+        :attr:`posicao_leitura` no momento da detecção). Só o áudio que ainda
+        não foi sobrescrito é retornado.
+        """
+
+        with self._cond:
+            posicao = min(posicao, self._escrito)
+            inicio = max(posicao - tamanho, self._escrito - self.capacidade, 0)
+            partes = []
+            while inicio < posicao:
+                indice = inicio % self.capacidade
+                fim = min(posicao - inicio, self.capacidade - indice)
+                partes.append(bytes(self._view[indice : indice + fim]))
+                inicio += fim
+        return b"".join(partes)
+
+    def limpar(self) -> None:
+        """Descarta o conteúdo pendente e o histórico."""
+
+        with self._cond:
+            self._escrito = self._lido = 0
+            self.descartados = 0
+
+
+__all__ = ["AudioRingBuffer"]
@@ -1,14 +1,34 @@
-"""Motor de respostas do assistente Hermes."""
+"""Motor de respostas do assistente Hermes.
+
+Os prompts são montados por :func:`hermes.assistant.prompt_builder.montar_prompt`;
+as variantes ``*_com_trace`` devolvem, junto com a resposta, o
+:class:`~hermes.assistant.prompt_builder.TracePrompt` com o tempo de cada etapa.
+
+Com :data:`hermes.config.config.OLLAMA_CHAT_API`, cada turno vai ao endpoint
+``/api/chat`` como lista de mensagens; do contrário, como prompt único em
+``/api/generate``. As métricas do servidor na última resposta ficam em
+:attr:`ConversationState.llm_metrics`.
+"""
 
 from __future__ import annotations
 
 import logging
+import re
 import unicodedata
-from typing import Iterable
+from dataclasses import dataclass
+from typing import Iterable, Iterator
 
+from ..config import config
 from ..core import app
 from ..core.prompts import carregar_prompt_sistema as _carregar_prompt_sistema
-from ..services.llm_interface import LLMError, gerar_resposta
+from ..services.llm_interface import (
+    LLMError,
+    conversar,
+    conversar_stream,
+    gerar_resposta,
+    gerar_resposta_stream,
+)
+from .prompt_builder import PromptMontado, TracePrompt, montar_prompt
 from .state import ConversationState
 
 logger = logging.getLogger(__name__)
@@ -46,6 +66,29 @@ _RESPOSTA_OFFLINE_PADRAO = (
     "Não tenho acesso ao mundo externo ou à internet. "
     "Posso, porém, te ajudar a planejar o dia com base nas suas ideias e tarefas."
 )
+_RESPOSTA_LLM_INDISPONIVEL = (
+    "Não consegui falar com o modelo de linguagem agora. "
+    "Por favor, tente novamente em alguns instantes."
+)
+_RESPOSTA_ERRO_INESPERADO = (
+    "Tive um problema inesperado ao gerar a resposta. "
+    "Pode tentar de novo daqui a pouco?"
+)
+_RESPOSTA_VAZIA = "Não recebi nenhuma resposta do modelo agora, pode tentar de novo?"
+_RESPOSTA_LLM_ERRO = (
+    "O modelo de linguagem não conseguiu responder agora. "
+    "Tente novamente em breve."
+)
+_INSTRUCAO_IDEIAS = (
+    "Tarefa: atue como consultor das ideias do usuário. "
+    "Ofereça uma análise estruturada com pontos fortes e fracos, "
+    "identifique riscos ou potenciais furos e sugira próximos passos claros. "
+    "Referencie ideias e discussões anteriores sempre que possível para manter "
+    "continuidade."
+)
+
+# Fim de frase: pontuação final seguida de espaço, ou quebra de linha.
+_FIM_DE_FRASE = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
 
 
 def _normalizar_texto(texto: str) -> str:
@@ -85,6 +128,38 @@ def _registrar_no_historico(state: ConversationState | None, mensagem: str, resp
         state.history[:] = state.history[-_MAX_HISTORICO :]
 
 
+def _opcoes_llm(state: ConversationState | None) -> dict:
+    """Opções extras para o LLM conforme o estado da conversa.
+
+    Prompts com histórico raramente se repetem; com
+    ``LLM_CACHE_SKIP_HISTORY`` eles não passam pelo cache de respostas.
+    """
+
+    if (
+        config.LLM_CACHE_ENABLED
+        and config.LLM_CACHE_SKIP_HISTORY
+        and state is not None
+        and state.history
+    ):
+        return {"use_cache": False}
+    return {}
+
+
+def _registrar_metricas(
+    state: ConversationState | None, trace: TracePrompt, metricas: dict | None
+) -> None:
+    if not metricas:
+        return
+    trace.llm = dict(metricas)
+    if state is not None:
+        state.llm_metrics = dict(metricas)
+    logger.debug(
+        "Prompt avaliado pelo LLM: %s tokens em %.0f ms",
+        metricas.get("prompt_eval_count", "?"),
+        metricas.get("prompt_eval_ms", 0.0),
+    )
+
+
 def carregar_prompt_sistema() -> str:
     """Retorna o prompt de sistema do Hermes.
 
@@ -134,167 +209,195 @@ def coletar_contexto_ideias(user_id: int, pergunta: str) -> dict:
     return {"contexto": contexto, "ideias": ideias}
 
 
-def _formatar_historico(historico: Iterable[dict]) -> str:
-    partes: list[str] = []
-    for entrada in historico:
-        role = entrada.get("role", "usuario")
-        conteudo = entrada.get("content") or entrada.get("mensagem") or ""
-        prefixo = "Hermes" if role.lower() in {"assistant", "hermes"} else "Usuário"
-        partes.append(f"- {prefixo}: {conteudo}")
-    if not partes:
-        return ""
-    return "Histórico:\n" + "\n".join(partes)
-
-
-def responder_mensagem(
-    mensagem: str,
-    state: ConversationState | None = None,
-) -> str:
-    """Recebe uma mensagem do usuário e retorna a resposta textual do Hermes."""
-
-    if _solicitacao_requer_mundo_externo(mensagem):
-        _registrar_no_historico(state, mensagem, _RESPOSTA_OFFLINE_PADRAO)
-        return _RESPOSTA_OFFLINE_PADRAO
+@dataclass
+class RespostaAssistente:
+    """Resposta do assistente e o trace da montagem do prompt e da geração.
 
-    system_prompt = carregar_prompt_sistema()
-    partes_prompt: list[str] = []
+    ``trace`` é ``None`` quando a resposta não passou pelo LLM.
+    """
 
-    if system_prompt:
-        partes_prompt.append(system_prompt.strip())
+    texto: str
+    trace: TracePrompt | None = None
 
-    user_id = state.user_id if state else None
-    if user_id is not None:
-        partes_prompt.append(
-            "Contexto: responda para o usuário identificado pelo id " f"{user_id}."
-        )
 
-        if _deve_usar_contexto_ideias(mensagem):
-            logger.info("Incluindo contexto de ideias para o usuário %s", user_id)
-            contexto_ideias = coletar_contexto_ideias(user_id, mensagem)
-            if contexto_ideias.get("contexto"):
-                partes_prompt.append(contexto_ideias["contexto"])
-            else:
-                logger.debug("Sem contexto de ideias para incluir no prompt")
-        else:
-            logger.info(
-                "Contexto de ideias não incluído para o usuário %s (mensagem não pertinente)",
-                user_id,
-            )
+def _montar_prompt_mensagem(
+    mensagem: str, state: ConversationState | None
+) -> PromptMontado:
+    """Monta o prompt usado por :func:`responder_mensagem`."""
 
-    historico = state.history if state else None
-    if historico:
-        historico_formatado = _formatar_historico(historico)
-        if historico_formatado:
-            partes_prompt.append(historico_formatado)
+    return montar_prompt(
+        mensagem,
+        user_id=state.user_id if state else None,
+        historico=state.history if state else None,
+        recuperar=coletar_contexto_ideias,
+        usar_contexto=_deve_usar_contexto_ideias,
+        sistema=carregar_prompt_sistema(),
+    )
 
-    partes_prompt.append(f"Usuário: {mensagem}")
-    partes_prompt.append("Hermes:")
 
-    prompt_completo = "\n\n".join(partes_prompt).strip()
+def _gerar(
+    pergunta: str, montado: PromptMontado, state: ConversationState | None
+) -> RespostaAssistente:
+    """Envia o prompt ao LLM e registra a troca no histórico se der certo."""
 
+    trace = montado.trace
     try:
-        resultado = gerar_resposta(prompt_completo)
+        with trace.medir("llm"):
+            if config.OLLAMA_CHAT_API:
+                resultado = conversar(montado.mensagens, **_opcoes_llm(state))
+            else:
+                resultado = gerar_resposta(montado.texto, **_opcoes_llm(state))
     except LLMError as exc:
         logger.exception("LLM offline ou indisponível: %s", exc)
-        return (
-            "Não consegui falar com o modelo de linguagem agora. "
-            "Por favor, tente novamente em alguns instantes."
-        )
+        return RespostaAssistente(_RESPOSTA_LLM_INDISPONIVEL, trace)
     except Exception as exc:  # Cobertura para erros inesperados
         logger.exception("Erro inesperado ao gerar resposta: %s", exc)
-        return (
-            "Tive um problema inesperado ao gerar a resposta. "
-            "Pode tentar de novo daqui a pouco?"
-        )
+        return RespostaAssistente(_RESPOSTA_ERRO_INESPERADO, trace)
 
     if not resultado.get("ok", True):
         logger.error("LLM retornou erro: %s", resultado)
-        return (
-            "O modelo de linguagem não conseguiu responder agora. "
-            "Tente novamente em breve."
-        )
+        return RespostaAssistente(_RESPOSTA_LLM_ERRO, trace)
 
     resposta = resultado.get("response", "")
     if not resposta:
         logger.warning("Resposta vazia recebida do LLM")
-        return "Não recebi nenhuma resposta do modelo agora, pode tentar de novo?"
+        return RespostaAssistente(_RESPOSTA_VAZIA, trace)
 
     resposta_limpa = resposta.strip()
 
-    _registrar_no_historico(state, mensagem, resposta_limpa)
+    _registrar_no_historico(state, pergunta, resposta_limpa)
+    _registrar_metricas(state, trace, resultado.get("metricas"))
+
+    logger.info(
+        "Resposta gerada (etapas em ms: %s)",
+        {etapa: round(ms, 1) for etapa, ms in trace.etapas.items()},
+    )
+    return RespostaAssistente(resposta_limpa, trace)
 
-    return resposta_limpa
 
+def responder_mensagem_com_trace(
+    mensagem: str,
+    state: ConversationState | None = None,
+) -> RespostaAssistente:
+    """Como :func:`responder_mensagem`, devolvendo também o trace."""
 
-def responder_sobre_ideias(
-    pergunta: str, user_id: int, state: ConversationState | None
+    if _solicitacao_requer_mundo_externo(mensagem):
+        _registrar_no_historico(state, mensagem, _RESPOSTA_OFFLINE_PADRAO)
+        return RespostaAssistente(_RESPOSTA_OFFLINE_PADRAO)
+
+    return _gerar(mensagem, _montar_prompt_mensagem(mensagem, state), state)
+
+
+def responder_mensagem(
+    mensagem: str,
+    state: ConversationState | None = None,
 ) -> str:
-    """Responde a perguntas sobre ideias, planos e prioridades do usuário."""
+    """Recebe uma mensagem do usuário e retorna a resposta textual do Hermes."""
 
-    system_prompt = carregar_prompt_sistema()
-    partes_prompt: list[str] = []
+    return responder_mensagem_com_trace(mensagem, state).texto
 
-    if system_prompt:
-        partes_prompt.append(system_prompt.strip())
 
-    partes_prompt.append(
-        "Contexto: responda para o usuário identificado pelo id " f"{user_id}."
-    )
+def responder_mensagem_stream(
+    mensagem: str,
+    state: ConversationState | None = None,
+) -> Iterator[str]:
+    """Versão em fluxo de :func:`responder_mensagem`.
+
+    Gera os fragmentos da resposta conforme o LLM os produz, permitindo que a
+    interface mostre (ou fale) o texto antes do fim da geração. O histórico
+    de ``state`` só é atualizado quando a resposta termina com sucesso. Em
+    caso de falha antes do primeiro fragmento, gera a mesma mensagem amigável
+    de :func:`responder_mensagem`.
+    """
 
-    contexto_ideias = coletar_contexto_ideias(user_id, pergunta)
-    if contexto_ideias.get("contexto"):
-        partes_prompt.append(contexto_ideias["contexto"])
-    else:
-        logger.debug("Sem contexto de ideias para incluir no prompt de ideação")
-
-    historico = state.history if state else None
-    if historico:
-        historico_formatado = _formatar_historico(historico)
-        if historico_formatado:
-            partes_prompt.append(historico_formatado)
-
-    partes_prompt.append(
-        (
-            "Tarefa: atue como consultor das ideias do usuário. "
-            "Ofereça uma análise estruturada com pontos fortes e fracos, identifique riscos "
-            "ou potenciais furos e sugira próximos passos claros. Referencie ideias e discussões "
-            "anteriores sempre que possível para manter continuidade."
-        )
-    )
-    partes_prompt.append(f"Usuário: {pergunta}")
-    partes_prompt.append("Hermes:")
+    if _solicitacao_requer_mundo_externo(mensagem):
+        _registrar_no_historico(state, mensagem, _RESPOSTA_OFFLINE_PADRAO)
+        yield _RESPOSTA_OFFLINE_PADRAO
+        return
 
-    prompt_completo = "\n\n".join(partes_prompt).strip()
+    montado = _montar_prompt_mensagem(mensagem, state)
+    metricas: dict = {}
+    partes: list[str] = []
 
     try:
-        resultado = gerar_resposta(prompt_completo)
+        if config.OLLAMA_CHAT_API:
+            fluxo = conversar_stream(
+                montado.mensagens, metricas=metricas, **_opcoes_llm(state)
+            )
+        else:
+            fluxo = gerar_resposta_stream(
+                montado.texto, metricas=metricas, **_opcoes_llm(state)
+            )
+        for fragmento in fluxo:
+            if not partes:
+                # Igual ao ``strip`` da resposta completa.
+                fragmento = fragmento.lstrip()
+                if not fragmento:
+                    continue
+            partes.append(fragmento)
+            yield fragmento
     except LLMError as exc:
         logger.exception("LLM offline ou indisponível: %s", exc)
-        return (
-            "Não consegui falar com o modelo de linguagem agora. "
-            "Por favor, tente novamente em alguns instantes."
-        )
+        if not partes:
+            yield _RESPOSTA_LLM_INDISPONIVEL
+        return
     except Exception as exc:  # Cobertura para erros inesperados
         logger.exception("Erro inesperado ao gerar resposta: %s", exc)
-        return (
-            "Tive um problema inesperado ao gerar a resposta. "
-            "Pode tentar de novo daqui a pouco?"
-        )
-
-    if not resultado.get("ok", True):
-        logger.error("LLM retornou erro: %s", resultado)
-        return (
-            "O modelo de linguagem não conseguiu responder agora. "
-            "Tente novamente em breve."
-        )
+        if not partes:
+            yield _RESPOSTA_ERRO_INESPERADO
+        return
 
-    resposta = resultado.get("response", "")
-    if not resposta:
+    resposta_limpa = "".join(partes).strip()
+    if not resposta_limpa:
         logger.warning("Resposta vazia recebida do LLM")
-        return "Não recebi nenhuma resposta do modelo agora, pode tentar de novo?"
+        yield _RESPOSTA_VAZIA
+        return
 
-    resposta_limpa = resposta.strip()
+    _registrar_no_historico(state, mensagem, resposta_limpa)
+    _registrar_metricas(state, montado.trace, metricas)
 
-    _registrar_no_historico(state, pergunta, resposta_limpa)
 
-    return resposta_limpa
+def agrupar_frases(fragmentos: Iterable[str]) -> Iterator[str]:
+    """Agrupa fragmentos de texto em frases completas.
+
+    Cada frase é gerada assim que sua pontuação final chega, o que permite ao
+    TTS começar a falar a primeira frase enquanto o restante ainda está sendo
+    gerado. O texto que sobrar no fim é gerado como última frase.
+    """
+
+    buffer = ""
+    for fragmento in fragmentos:
+        buffer += fragmento
+        inicio = 0
+        for fim in _FIM_DE_FRASE.finditer(buffer):
+            frase = buffer[inicio : fim.end()].strip()
+            if frase:
+                yield frase
+            inicio = fim.end()
+        buffer = buffer[inicio:]
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def responder_sobre_ideias_com_trace(
+    pergunta: str, user_id: int, state: ConversationState | None
+) -> RespostaAssistente:
+    """Como :func:`responder_sobre_ideias`, devolvendo também o trace."""
+
+    montado = montar_prompt(
+        pergunta,
+        user_id=user_id,
+        historico=state.history if state else None,
+        recuperar=coletar_contexto_ideias,
+        instrucao=_INSTRUCAO_IDEIAS,
+        sistema=carregar_prompt_sistema(),
+    )
+    return _gerar(pergunta, montado, state)
+
+
+def responder_sobre_ideias(
+    pergunta: str, user_id: int, state: ConversationState | None
+) -> str:
+    """Responde a perguntas sobre ideias, planos e prioridades do usuário."""
+
+    return responder_sobre_ideias_com_trace(pergunta, user_id, state).texto
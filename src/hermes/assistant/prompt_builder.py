@@ -0,0 +1,294 @@
+"""Montagem do prompt enviado ao LLM pelo assistente.
+
+:func:`montar_prompt` é o pipeline comum às respostas do
+:mod:`hermes.assistant.engine`:
+
+1. a detecção de palavras-chave decide se o contexto de ideias é necessário;
+2. a recuperação desse contexto (banco e TF-IDF) roda numa thread de um pool
+   enquanto o prefixo do sistema e o histórico são preparados;
+3. contexto e histórico são cortados para caber no orçamento de
+   :data:`hermes.config.config.PROMPT_BUDGET_CHARS` caracteres, descartando
+   primeiro as ideias menos relevantes e as mensagens mais antigas;
+4. as partes são unidas ao prefixo, que fica em cache por usuário.
+
+A ordem das partes segue da mais estável para a mais variável: prefixo,
+histórico e, só então, o contexto de ideias e a pergunta. Assim o início do
+prompt se repete entre turnos de uma conversa e o servidor LLM reaproveita o
+cache KV desse trecho em vez de reprocessá-lo. O mesmo conteúdo também é
+montado como lista de mensagens (:attr:`PromptMontado.mensagens`) para o
+endpoint ``/api/chat`` do Ollama.
+
+O tempo de cada etapa, o tamanho de cada parte e os cortes feitos ficam num
+:class:`TracePrompt`, devolvido junto com o prompt.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
+
+from ..config import config
+from ..core.prompts import carregar_prompt_sistema
+
+logger = logging.getLogger(__name__)
+
+Recuperador = Callable[[int, str], dict]
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="hermes-contexto"
+            )
+        return _executor
+
+
+@dataclass
+class TracePrompt:
+    """Medições de uma montagem de prompt (e da resposta que a seguiu)."""
+
+    etapas: dict[str, float] = field(default_factory=dict)  # milissegundos
+    caracteres: dict[str, int] = field(default_factory=dict)
+    cortes: dict[str, int] = field(default_factory=dict)  # linhas descartadas
+    ideias: int = 0
+    llm: dict[str, float] = field(default_factory=dict)  # métricas do servidor
+
+    @contextmanager
+    def medir(self, etapa: str) -> Iterator[None]:
+        """Soma ao tempo de ``etapa`` a duração do bloco ``with``."""
+
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            decorrido = (time.perf_counter() - inicio) * 1000
+            self.etapas[etapa] = self.etapas.get(etapa, 0.0) + decorrido
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class PromptMontado:
+    """Prompt pronto para o LLM e o trace da sua montagem.
+
+    ``texto`` é o prompt único de ``/api/generate``; ``mensagens``, o mesmo
+    conteúdo no formato de ``/api/chat``.
+    """
+
+    texto: str
+    trace: TracePrompt
+    ideias: list = field(default_factory=list)
+    mensagens: list[dict[str, str]] = field(default_factory=list)
+
+
+@lru_cache(maxsize=128)
+def _prefixo(system_prompt: str, user_id: int | None) -> str:
+    partes = [system_prompt.strip()] if system_prompt.strip() else []
+    if user_id is not None:
+        partes.append(
+            "Contexto: responda para o usuário identificado pelo id " f"{user_id}."
+        )
+    return "\n\n".join(partes)
+
+
+def prefixo_sistema(user_id: int | None, sistema: str | None = None) -> str:
+    """Parte estática do prompt: prompt de sistema e identificação do usuário.
+
+    ``sistema`` substitui o prompt de sistema padrão
+    (:func:`hermes.core.prompts.carregar_prompt_sistema`).
+    """
+
+    if sistema is None:
+        sistema = carregar_prompt_sistema()
+    return _prefixo(sistema, user_id)
+
+
+def _tamanho(linhas: list[str]) -> int:
+    return sum(len(linha) + 1 for linha in linhas)
+
+
+def _caber(linhas: list[str], limite: int, *, do_fim: bool) -> tuple[list[str], int]:
+    """Descarta linhas (do fim ou do início) até o total caber em ``limite``."""
+
+    linhas = list(linhas)
+    removidas = 0
+    while linhas and _tamanho(linhas) > limite:
+        linhas.pop() if do_fim else linhas.pop(0)
+        removidas += 1
+    return linhas, removidas
+
+
+def _mensagens_historico(historico: Iterable[dict]) -> list[dict[str, str]]:
+    mensagens = []
+    for entrada in historico:
+        role = entrada.get("role", "usuario")
+        conteudo = entrada.get("content") or entrada.get("mensagem") or ""
+        role = "assistant" if role.lower() in {"assistant", "hermes"} else "user"
+        mensagens.append({"role": role, "content": conteudo})
+    return mensagens
+
+
+def _linhas_historico(mensagens: list[dict[str, str]]) -> list[str]:
+    return [
+        f"- {'Hermes' if m['role'] == 'assistant' else 'Usuário'}: {m['content']}"
+        for m in mensagens
+    ]
+
+
+def aplicar_orcamento(
+    contexto: str, historico: list[str], orcamento: int, trace: TracePrompt
+) -> tuple[str, str]:
+    """Corta contexto e histórico para somarem no máximo ``orcamento`` caracteres.
+
+    O contexto tem direito a pelo menos metade do orçamento; o histórico fica
+    com o restante, mantendo as mensagens mais recentes. Do contexto, o
+    cabeçalho é preservado e as ideias finais (menos relevantes) saem
+    primeiro. ``orcamento`` zero desativa os cortes.
+    """
+
+    linhas_contexto = contexto.splitlines() if contexto else []
+    if orcamento > 0:
+        limite_contexto = orcamento - min(_tamanho(historico), orcamento // 2)
+        cabecalho = linhas_contexto[:1] if len(linhas_contexto) > 1 else []
+        ideias, cortadas = _caber(
+            linhas_contexto[len(cabecalho) :],
+            limite_contexto - _tamanho(cabecalho),
+            do_fim=True,
+        )
+        linhas_contexto = cabecalho + ideias if ideias else []
+        historico, cortadas_historico = _caber(
+            historico, orcamento - _tamanho(linhas_contexto), do_fim=False
+        )
+        if cortadas:
+            trace.cortes["contexto"] = cortadas
+        if cortadas_historico:
+            trace.cortes["historico"] = cortadas_historico
+
+    texto_contexto = "\n".join(linhas_contexto)
+    texto_historico = "Histórico:\n" + "\n".join(historico) if historico else ""
+    return texto_contexto, texto_historico
+
+
+def montar_prompt(
+    pergunta: str,
+    *,
+    user_id: int | None,
+    historico: Iterable[dict] | None = None,
+    recuperar: Recuperador | None = None,
+    usar_contexto: Callable[[str], bool] | None = None,
+    instrucao: str | None = None,
+    orcamento: int | None = None,
+    sistema: str | None = None,
+) -> PromptMontado:
+    """Monta o prompt para ``pergunta``.
+
+    Parameters
+    ----------
+    pergunta: str
+        Mensagem do usuário.
+    user_id: int | None
+        Usuário da conversa. Sem ele, não há contexto de ideias.
+    historico: iterable of dict, optional
+        Mensagens anteriores (``role`` e ``content``), da mais antiga para a
+        mais recente.
+    recuperar: callable, optional
+        Chamado como ``recuperar(user_id, pergunta)`` numa thread do pool;
+        retorna um dicionário com ``contexto`` (texto) e ``ideias``.
+    usar_contexto: callable, optional
+        Decide, pela pergunta, se ``recuperar`` deve ser chamado. Sem ele, o
+        contexto é sempre recuperado.
+    instrucao: str, optional
+        Tarefa incluída antes da pergunta.
+    orcamento: int, optional
+        Máximo de caracteres de contexto e histórico. Padrão:
+        :data:`hermes.config.config.PROMPT_BUDGET_CHARS`.
+    sistema: str, optional
+        Prompt de sistema; padrão: o de :func:`prefixo_sistema`.
+    """
+
+    trace = TracePrompt()
+    orcamento = config.PROMPT_BUDGET_CHARS if orcamento is None else orcamento
+
+    with trace.medir("total"):
+        futuro = None
+        if recuperar is not None and user_id is not None:
+            with trace.medir("deteccao"):
+                necessario = usar_contexto is None or usar_contexto(pergunta)
+            if necessario:
+
+                def recuperar_medindo() -> dict:
+                    with trace.medir("recuperacao"):
+                        return recuperar(user_id, pergunta)
+
+                futuro = _pool().submit(recuperar_medindo)
+            else:
+                logger.info(
+                    "Contexto de ideias não incluído para o usuário %s "
+                    "(mensagem não pertinente)",
+                    user_id,
+                )
+
+        # Enquanto o contexto é recuperado.
+        with trace.medir("prefixo"):
+            prefixo = prefixo_sistema(user_id, sistema)
+        with trace.medir("historico"):
+            mensagens_historico = _mensagens_historico(historico or [])
+            linhas_historico = _linhas_historico(mensagens_historico)
+
+        contexto: dict = {}
+        if futuro is not None:
+            with trace.medir("espera_contexto"):
+                try:
+                    contexto = futuro.result() or {}
+                except Exception:
+                    logger.exception("Falha ao recuperar o contexto de ideias")
+        ideias = list(contexto.get("ideias") or [])
+        trace.ideias = len(ideias)
+
+        with trace.medir("orcamento"):
+            texto_contexto, texto_historico = aplicar_orcamento(
+                contexto.get("contexto") or "", linhas_historico, orcamento, trace
+            )
+
+        with trace.medir("montagem"):
+            final = [texto_contexto, instrucao or "", f"Usuário: {pergunta}"]
+            partes = [prefixo, texto_historico, *final, "Hermes:"]
+            texto = "\n\n".join(p for p in partes if p).strip()
+
+            mantidas = len(mensagens_historico) - trace.cortes.get("historico", 0)
+            mensagens = [{"role": "system", "content": prefixo}] if prefixo else []
+            mensagens += mensagens_historico[len(mensagens_historico) - mantidas :]
+            final[-1] = pergunta
+            mensagens.append(
+                {"role": "user", "content": "\n\n".join(p for p in final if p)}
+            )
+
+    trace.caracteres = {
+        "prefixo": len(prefixo),
+        "contexto": len(texto_contexto),
+        "historico": len(texto_historico),
+        "total": len(texto),
+    }
+    logger.debug("Prompt montado: %s", trace.as_dict())
+    return PromptMontado(texto, trace, ideias, mensagens)
+
+
+__all__ = [
+    "PromptMontado",
+    "TracePrompt",
+    "aplicar_orcamento",
+    "montar_prompt",
+    "prefixo_sistema",
+]
@@ -7,8 +7,14 @@ from dataclasses import dataclass, field
 
 @dataclass
 class ConversationState:
-    """Mantém o contexto curto de uma sessão de conversa."""
+    """Mantém o contexto curto de uma sessão de conversa.
+
+    ``llm_metrics`` guarda as métricas do servidor LLM na última resposta
+    (tokens e tempo de avaliação do prompt, por exemplo), o que permite
+    acompanhar quanto do prompt o servidor reaproveitou do turno anterior.
+    """
 
     user_id: int | None
     history: list[dict[str, str]] = field(default_factory=list)
+    llm_metrics: dict[str, float] = field(default_factory=dict)
 
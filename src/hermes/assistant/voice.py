@@ -1,18 +1,40 @@
-"""Utilitários de detecção de hotword usando Vosk."""
+"""Utilitários de detecção de hotword usando Vosk.
+
+O áudio é capturado por callback do ``sounddevice`` para um
+:class:`~hermes.assistant.audio.AudioRingBuffer` pré-alocado, e uma thread
+separada o entrega ao reconhecedor em blocos de ``block_duration`` segundos.
+Assim a captura nunca espera pelo Kaldi, blocos curtos (até ~50 ms) reduzem a
+latência da hotword e o áudio que antecede a detecção fica disponível como
+*pre-roll*.
+
+Antes do reconhecedor, um :class:`VoiceActivityGate` (energia e taxa de
+cruzamentos por zero) descarta o silêncio: em modo de escuta contínua numa
+sala silenciosa, o Kaldi quase não é chamado. :class:`EstatisticasVoz` conta
+o tempo de CPU de cada etapa e a latência de detecção da hotword.
+
+:class:`CapturaFala` usa as mesmas peças para a captura pontual (botões de
+microfone): reconhece enquanto a pessoa fala e encerra no silêncio final.
+"""
 
 from __future__ import annotations
 
 import json
 import logging
+import math
 import re
 import threading
+import time
 import unicodedata
-from typing import Optional
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
 
+import numpy as np
 import sounddevice as sd
 import vosk
 
-from ..services.stt import get_vosk_model
+from ..services.stt import RecognizerPool, get_recognizer_pool, get_vosk_model
+from .audio import AudioRingBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +48,136 @@ def _normalizar_texto(texto: str) -> str:
     )
 
 
+class VoiceActivityGate:
+    """Detector de atividade de voz por energia e cruzamentos por zero.
+
+    Um bloco é considerado fala quando sua energia RMS supera o ruído de fundo
+    estimado multiplicado por ``limiar`` (e ao menos ``energia_minima``) e a
+    taxa de cruzamentos por zero fica abaixo de ``zcr_maximo``, o que descarta
+    chiados. O ruído de fundo acompanha lentamente a energia dos blocos sem
+    fala. Como a fala real tem pausas, se todos os blocos dos últimos
+    ``janela_ruido`` segundos forem classificados como fala, o ruído de fundo
+    sobe para a menor energia da janela: um zumbido constante mais alto (um
+    ventilador, por exemplo) não mantém o portão aberto para sempre. Depois
+    do último bloco de fala, o portão fica aberto por mais ``hangover``
+    segundos, para não cortar pausas curtas nem o fim de palavras.
+
+    Args:
+        samplerate: Taxa de amostragem do áudio (int16 mono).
+        limiar: Quantas vezes a energia deve superar o ruído de fundo.
+        energia_minima: Energia RMS mínima (escala int16) para haver fala.
+        zcr_maximo: Fração máxima de cruzamentos por zero de um bloco de fala.
+        hangover: Segundos em que o portão continua aberto após a fala.
+        adaptacao: Peso de cada bloco silencioso na média do ruído de fundo.
+        janela_ruido: Segundos de "fala" ininterrupta após os quais o mínimo
+            da janela passa a valer como ruído de fundo.
+    """
+
+    def __init__(
+        self,
+        samplerate: int = 16000,
+        *,
+        limiar: float = 3.0,
+        energia_minima: float = 200.0,
+        zcr_maximo: float = 0.35,
+        hangover: float = 0.6,
+        adaptacao: float = 0.05,
+        janela_ruido: float = 3.0,
+    ) -> None:
+        self.samplerate = samplerate
+        self.limiar = limiar
+        self.energia_minima = energia_minima
+        self.zcr_maximo = zcr_maximo
+        self.hangover = hangover
+        self.adaptacao = adaptacao
+        self.janela_ruido = janela_ruido
+        self.ruido: float | None = None
+        self.aberto = False
+        self._restante = 0
+        # Energias dos blocos de fala consecutivos mais recentes.
+        self._energias: deque[float] | None = None
+
+    def e_voz(self, amostras: np.ndarray) -> bool:
+        """Classifica um bloco de amostras int16 como fala ou não."""
+
+        if not len(amostras):
+            return False
+        sinal = amostras.astype(np.float32)
+        energia = math.sqrt(float(np.mean(sinal * sinal)))
+        zcr = float(np.count_nonzero(np.diff(np.signbit(amostras)))) / len(amostras)
+        if self.ruido is None:
+            self.ruido = energia
+        if self._energias is None:
+            blocos = round(self.janela_ruido * self.samplerate / len(amostras))
+            self._energias = deque(maxlen=max(1, blocos))
+        voz = (
+            energia > max(self.energia_minima, self.ruido * self.limiar)
+            and zcr < self.zcr_maximo
+        )
+        if not voz:
+            self.ruido += self.adaptacao * (energia - self.ruido)
+            # Só sequências ininterruptas de fala contam para a janela.
+            self._energias.clear()
+        else:
+            self._energias.append(energia)
+            if len(self._energias) == self._energias.maxlen:
+                self.ruido = max(self.ruido, min(self._energias))
+        return voz
+
+    def processar(self, bloco) -> bool:
+        """Atualiza o portão com ``bloco`` (bytes int16) e diz se ele passa."""
+
+        amostras = np.frombuffer(bloco, dtype=np.int16)
+        if self.e_voz(amostras):
+            self.aberto = True
+            self._restante = int(self.hangover * self.samplerate)
+        elif self.aberto:
+            self.aberto = self._restante > 0
+            self._restante -= len(amostras)
+        return self.aberto
+
+    def reiniciar(self) -> None:
+        """Fecha o portão e esquece o ruído de fundo estimado."""
+
+        self.ruido = None
+        self.aberto = False
+        self._restante = 0
+        self._energias = None
+
+
+@dataclass
+class EstatisticasVoz:
+    """Contadores da escuta contínua, para medir o ganho do VAD."""
+
+    blocos: int = 0
+    blocos_encaminhados: int = 0
+    segmentos: int = 0
+    cpu_vad: float = 0.0  # segundos de CPU da thread gastos no VAD
+    cpu_reconhecedor: float = 0.0  # segundos de CPU gastos no Kaldi
+    latencias_deteccao: list[float] = field(default_factory=list)
+
+    @property
+    def fracao_encaminhada(self) -> float:
+        return self.blocos_encaminhados / self.blocos if self.blocos else 0.0
+
+    @property
+    def latencia_media(self) -> float | None:
+        if not self.latencias_deteccao:
+            return None
+        return sum(self.latencias_deteccao) / len(self.latencias_deteccao)
+
+    def resumo(self) -> dict:
+        return {
+            "blocos": self.blocos,
+            "blocos_encaminhados": self.blocos_encaminhados,
+            "fracao_encaminhada": self.fracao_encaminhada,
+            "segmentos": self.segmentos,
+            "cpu_vad": self.cpu_vad,
+            "cpu_reconhecedor": self.cpu_reconhecedor,
+            "latencia_media": self.latencia_media,
+        }
+
+
 class HotwordListener:
     """Listener contínuo que detecta uma hotword no áudio do microfone."""
 
@@ -37,9 +189,13 @@ class HotwordListener:
         hotword: str = "hermes",
         model_path: str | None = None,
         samplerate: int = 16000,
-        block_duration: float = 0.5,
+        block_duration: float = 0.1,
         device: Optional[int | str] = None,
         model: vosk.Model | None = None,
+        pre_roll: float = 1.0,
+        buffer_duration: float = 10.0,
+        vad: VoiceActivityGate | bool = True,
+        vad_padding: float = 0.3,
     ) -> None:
         """Cria um listener que detecta a hotword configurada.
 
@@ -48,24 +204,60 @@ class HotwordListener:
             model_path: Caminho opcional para um modelo Vosk. Caso não seja
                 informado, usa ``vosk.Model(lang="pt-br")``.
             samplerate: Taxa de amostragem do áudio capturado.
-            block_duration: Duração (em segundos) de cada bloco de captura.
+            block_duration: Duração (em segundos) de cada bloco de captura e
+                de reconhecimento. Blocos menores detectam a hotword mais
+                cedo, ao custo de mais chamadas ao reconhecedor.
             device: Dispositivo de áudio a ser usado pelo ``sounddevice``.
             model: Instância pré-carregada de ``vosk.Model``. Se fornecida,
                 será reutilizada.
+            pre_roll: Segundos de áudio anteriores à detecção guardados em
+                :attr:`pre_roll`.
+            buffer_duration: Segundos de áudio que o buffer circular comporta;
+                limita o atraso tolerado do reconhecimento.
+            vad: Portão de atividade de voz aplicado antes do reconhecedor.
+                ``True`` usa um :class:`VoiceActivityGate` padrão e ``False``
+                envia todo o áudio ao Kaldi.
+            vad_padding: Segundos anteriores ao início da fala enviados junto
+                com ela, para não cortar o começo da primeira palavra.
         """
 
         self.hotword = _normalizar_texto(hotword or "")
         self._samplerate = samplerate
-        self._blocksize = int(samplerate * block_duration)
+        self._blocksize = max(1, int(samplerate * block_duration))
+        self._bytes_por_segundo = samplerate * 2  # int16 mono
+        self._pre_roll_bytes = int(pre_roll * self._bytes_por_segundo)
+        capacidade = max(
+            int(buffer_duration * self._bytes_por_segundo),
+            self._pre_roll_bytes + 4 * self._blocksize * 2,
+        )
+        self._buffer = AudioRingBuffer(capacidade)
+        self._posicao = 0
+        self._ultimo_parcial = ""
+        self.pre_roll = b""
+        """Áudio (int16 mono) que antecede o fim do bloco da última hotword."""
+        if vad is True:
+            vad = VoiceActivityGate(samplerate)
+        self.vad: VoiceActivityGate | None = vad or None
+        self._vad_padding_bytes = int(vad_padding * self._bytes_por_segundo)
+        self._em_fala = False
+        self._inicio_fala = 0.0
+        self.estatisticas = EstatisticasVoz()
         self._device = device
         self._stop_event = threading.Event()
         self._thread: threading.Thread | None = None
         self._state = self.STATE_IDLE
+        self._pool: RecognizerPool | None = None
 
         try:
             logger.info("Obtendo modelo Vosk para hotword '%s'", self.hotword)
-            self._model = model or get_vosk_model(model_path)
-            self._recognizer = vosk.KaldiRecognizer(self._model, samplerate)
+            if model is None and model_path is None:
+                # Modelo compartilhado: aproveita um reconhecedor já aquecido,
+                # devolvido ao pool quando a escuta termina.
+                self._pool = get_recognizer_pool(samplerate)
+                self._recognizer = self._pool.obter()
+            else:
+                self._model = model or get_vosk_model(model_path)
+                self._recognizer = vosk.KaldiRecognizer(self._model, samplerate)
         except Exception:
             logger.exception("Falha ao preparar reconhecimento de hotword")
             raise
@@ -77,6 +269,8 @@ class HotwordListener:
             logger.debug("HotwordListener já está em execução")
             return
 
+        if self._pool is not None and self._recognizer is None:
+            self._recognizer = self._pool.obter()
         self._stop_event.clear()
         self._thread = threading.Thread(target=self._listen_loop, daemon=True)
         self._thread.start()
@@ -88,8 +282,17 @@ class HotwordListener:
         self._stop_event.set()
         if self._thread:
             self._thread.join(timeout=2.0)
+        if self._thread is None or not self._thread.is_alive():
+            # Senão, o próprio loop devolve o reconhecedor ao terminar.
+            self._devolver_reconhecedor()
         logger.info("HotwordListener finalizado")
 
+    def _devolver_reconhecedor(self) -> None:
+        if self._pool is None or self._recognizer is None:
+            return
+        recognizer, self._recognizer = self._recognizer, None
+        self._pool.devolver(recognizer)
+
     def on_hotword_detected(self, texto: str) -> None:  # pragma: no cover - callback
         """Callback chamado quando a hotword é detectada.
 
@@ -105,7 +308,21 @@ class HotwordListener:
 
         logger.error("Erro no HotwordListener: %s", exc)
 
+    def audio_recente(self, segundos: float) -> bytes:
+        """Retorna até ``segundos`` do áudio já reconhecido mais recente."""
+
+        tamanho = int(segundos * self._bytes_por_segundo)
+        return self._buffer.anteriores(self._buffer.posicao_leitura, tamanho)
+
+    def _audio_callback(self, indata, frames, tempo, status) -> None:
+        # Roda na thread do PortAudio: só copia as amostras para o anel.
+        self._buffer.escrever(indata)
+
     def _listen_loop(self) -> None:
+        self._buffer.limpar()
+        self._em_fala = False
+        if self.vad is not None:
+            self.vad.reiniciar()
         try:
             with sd.RawInputStream(
                 samplerate=self._samplerate,
@@ -113,23 +330,87 @@ class HotwordListener:
                 device=self._device,
                 dtype="int16",
                 channels=1,
-            ) as stream:
+                callback=self._audio_callback,
+            ):
                 while not self._stop_event.is_set():
-                    data, _ = stream.read(self._blocksize)
-                    if not data:
+                    bloco = self._buffer.ler(self._blocksize * 2, timeout=0.1)
+                    if bloco is None:
                         continue
-                    if self._recognizer.AcceptWaveform(data):
-                        resultado = json.loads(self._recognizer.Result())
-                        self._process_result(resultado.get("text", ""), is_final=True)
-                    else:
-                        parcial = json.loads(self._recognizer.PartialResult())
-                        self._process_result(parcial.get("partial", ""), is_final=False)
+                    try:
+                        self._processar_bloco(bloco)
+                    finally:
+                        self._buffer.consumir(len(bloco))
+            if self._buffer.descartados:
+                logger.warning(
+                    "Reconhecimento atrasado: %d bytes de áudio descartados",
+                    self._buffer.descartados,
+                )
+            logger.info("Estatísticas da escuta: %s", self.estatisticas.resumo())
         except Exception as exc:
             logger.exception("Erro no loop de escuta do HotwordListener")
             try:
                 self.on_error(exc)
             except Exception:  # pragma: no cover - callback de usuário
                 logger.exception("Erro ao notificar falha de captura de áudio")
+        finally:
+            self._devolver_reconhecedor()
+
+    def _processar_bloco(self, bloco: memoryview) -> None:
+        self._posicao = self._buffer.posicao_leitura + len(bloco)
+        stats = self.estatisticas
+        stats.blocos += 1
+
+        if self.vad is not None:
+            inicio = time.thread_time()
+            voz = self.vad.processar(bloco)
+            stats.cpu_vad += time.thread_time() - inicio
+            if not voz:
+                if self._em_fala:
+                    self._encerrar_fala()
+                return
+            if not self._em_fala:
+                self._em_fala = True
+                self._inicio_fala = time.monotonic()
+                stats.segmentos += 1
+                # Envia também o áudio logo antes da abertura do portão.
+                anterior = self._buffer.anteriores(
+                    self._buffer.posicao_leitura, self._vad_padding_bytes
+                )
+                if anterior:
+                    self._reconhecer(anterior)
+
+        stats.blocos_encaminhados += 1
+        # A cópia para ``bytes`` acontece aqui, fora do callback de captura.
+        self._reconhecer(bytes(bloco))
+
+    def _reconhecer(self, dados: bytes) -> None:
+        inicio = time.thread_time()
+        try:
+            if self._recognizer.AcceptWaveform(dados):
+                self._ultimo_parcial = ""
+                resultado = json.loads(self._recognizer.Result())
+                self._process_result(resultado.get("text", ""), is_final=True)
+                return
+            if self._state != self.STATE_IDLE:
+                return  # aguardando comando: parciais são ignorados
+            parcial_bruto = self._recognizer.PartialResult()
+            if parcial_bruto == self._ultimo_parcial:
+                return
+            self._ultimo_parcial = parcial_bruto
+            parcial = json.loads(parcial_bruto)
+            self._process_result(parcial.get("partial", ""), is_final=False)
+        finally:
+            self.estatisticas.cpu_reconhecedor += time.thread_time() - inicio
+
+    def _encerrar_fala(self) -> None:
+        # O portão fechou: o silêncio não chega ao Kaldi, então o resultado
+        # final do trecho é pedido explicitamente.
+        self._em_fala = False
+        self._ultimo_parcial = ""
+        inicio = time.thread_time()
+        resultado = json.loads(self._recognizer.FinalResult())
+        self.estatisticas.cpu_reconhecedor += time.thread_time() - inicio
+        self._process_result(resultado.get("text", ""), is_final=True)
 
     def _process_result(self, texto: str, *, is_final: bool) -> None:
         if not texto:
@@ -148,6 +429,13 @@ class HotwordListener:
         if self._state == self.STATE_IDLE:
             if hotword_detectada:
                 logger.info("Hotword '%s' detectada no texto: %s", self.hotword, texto)
+                self.pre_roll = self._buffer.anteriores(
+                    self._posicao, self._pre_roll_bytes
+                )
+                if self._em_fala:
+                    self.estatisticas.latencias_deteccao.append(
+                        time.monotonic() - self._inicio_fala
+                    )
                 self._state = self.STATE_AWAITING_COMMAND
                 try:
                     self.on_hotword_detected(texto)
@@ -192,3 +480,147 @@ class HotwordListener:
             return tokens[1] == self.hotword
 
         return False
+
+
+class CapturaFala:
+    """Captura pontual de uma frase, transcrita enquanto é falada.
+
+    O áudio chega por callback a um :class:`AudioRingBuffer` e é entregue ao
+    reconhecedor bloco a bloco, de modo que o texto parcial fica disponível
+    durante a fala e a transcrição termina logo depois dela. A captura acaba
+    quando um :class:`VoiceActivityGate` fecha após ``silencio_final``
+    segundos sem fala, quando ninguém fala em ``espera_inicial`` segundos ou
+    ao atingir ``duracao_maxima``.
+
+    :meth:`capturar` bloqueia até o fim da frase e deve rodar fora da thread
+    da interface; :meth:`cancelar` pode ser chamado de qualquer thread.
+
+    Args:
+        model: Instância pré-carregada de ``vosk.Model``. Padrão: o modelo
+            compartilhado, com reconhecedores de :func:`get_recognizer_pool`.
+        samplerate: Taxa de amostragem do áudio capturado.
+        block_duration: Duração (em segundos) de cada bloco reconhecido.
+        silencio_final: Segundos de silêncio que encerram a frase.
+        espera_inicial: Segundos aguardando o início da fala.
+        duracao_maxima: Limite de duração da captura, em segundos.
+        device: Dispositivo de áudio a ser usado pelo ``sounddevice``.
+        on_parcial: Chamado com o texto reconhecido até o momento, sempre que
+            ele muda.
+    """
+
+    def __init__(
+        self,
+        model: vosk.Model | None = None,
+        *,
+        samplerate: int = 16000,
+        block_duration: float = 0.05,
+        silencio_final: float = 0.8,
+        espera_inicial: float = 5.0,
+        duracao_maxima: float = 15.0,
+        device: Optional[int | str] = None,
+        on_parcial: Callable[[str], None] | None = None,
+    ) -> None:
+        self._samplerate = samplerate
+        self._blocksize = max(1, int(samplerate * block_duration))
+        self._espera_inicial = int(espera_inicial * samplerate)
+        self._duracao_maxima = int(duracao_maxima * samplerate)
+        self._device = device
+        self.on_parcial = on_parcial
+        self._vad = VoiceActivityGate(samplerate, hangover=silencio_final)
+        self._buffer = AudioRingBuffer(samplerate * 2 * 2)
+        self._cancelado = threading.Event()
+        # Sem ``model``, o pool compartilhado só é obtido em :meth:`capturar`,
+        # fora da thread que cria a captura.
+        self._pool = RecognizerPool(model, samplerate) if model is not None else None
+        self._recognizer = None
+
+    def _reiniciar(self, recognizer) -> None:
+        self._recognizer = recognizer
+        self._vad.reiniciar()
+        self._trechos: list[str] = []
+        self._parcial = ""
+        self._amostras = 0
+        self._falou = False
+        self._buffer.limpar()
+        self._cancelado.clear()
+
+    @property
+    def texto(self) -> str:
+        """Texto reconhecido até o momento."""
+
+        return " ".join(t for t in [*self._trechos, self._parcial] if t)
+
+    def _notificar(self) -> None:
+        if self.on_parcial is None:
+            return
+        try:
+            self.on_parcial(self.texto)
+        except Exception:  # pragma: no cover - callback de usuário
+            logger.exception("Erro ao executar callback de texto parcial")
+
+    def _audio_callback(self, indata, frames, tempo, status) -> None:
+        self._buffer.escrever(indata)
+
+    def processar(self, bloco) -> bool:
+        """Reconhece ``bloco`` (int16 mono) e diz se a frase terminou."""
+
+        self._amostras += len(bloco) // 2
+        voz = self._vad.processar(bloco)
+        self._falou = self._falou or voz
+        if self._recognizer.AcceptWaveform(bytes(bloco)):
+            # O Kaldi encontrou o fim de um trecho por conta própria.
+            self._trechos.append(json.loads(self._recognizer.Result()).get("text", ""))
+            self._parcial = ""
+            self._notificar()
+        else:
+            parcial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+            if parcial != self._parcial:
+                self._parcial = parcial
+                self._notificar()
+        if self._falou:
+            return not voz or self._amostras >= self._duracao_maxima
+        return self._amostras >= self._espera_inicial
+
+    def finalizar(self) -> str:
+        """Encerra a frase atual e retorna o texto completo."""
+
+        self._trechos.append(json.loads(self._recognizer.FinalResult()).get("text", ""))
+        self._parcial = ""
+        return self.texto
+
+    def capturar(self) -> str:
+        """Grava do microfone até o fim da frase e retorna o texto."""
+
+        pool = self._pool or get_recognizer_pool(self._samplerate)
+        with pool.reconhecedor() as recognizer:
+            self._reiniciar(recognizer)
+            with sd.RawInputStream(
+                samplerate=self._samplerate,
+                blocksize=self._blocksize,
+                device=self._device,
+                dtype="int16",
+                channels=1,
+                callback=self._audio_callback,
+            ):
+                while not self._cancelado.is_set():
+                    bloco = self._buffer.ler(self._blocksize * 2, timeout=0.1)
+                    if bloco is None:
+                        continue
+                    try:
+                        terminou = self.processar(bloco)
+                    finally:
+                        self._buffer.consumir(len(bloco))
+                    if terminou:
+                        break
+            texto = self.finalizar()
+        logger.info(
+            "Fala capturada em %.1f s de áudio: %s",
+            self._amostras / self._samplerate,
+            texto,
+        )
+        return texto
+
+    def cancelar(self) -> None:
+        """Interrompe :meth:`capturar`, que retorna o texto reconhecido até então."""
+
+        self._cancelado.set()
@@ -9,7 +9,7 @@ from __future__ import annotations
 import argparse
 import logging
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Sequence
 
 
@@ -25,6 +25,47 @@ class Config:
     TIMEOUT: int = 30  # seconds
     MAX_RETRIES: int = 3
     BACKOFF_FACTOR: float = 0.1
+    LLM_POOL_SIZE: int = 4  # keep-alive connections to the LLM server
+    # How long Ollama keeps the model loaded after a request; "" = server default
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_CHAT_API: bool = False  # send the assistant's turns to /api/chat as messages
+    # Response cache in hermes.services.llm_interface
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_TTL: int = 86400  # seconds
+    LLM_CACHE_MEMORY_SIZE: int = 256  # entries kept in memory
+    LLM_CACHE_DISK_SIZE: int = 10000  # rows kept in the SQLite tier
+    LLM_CACHE_SKIP_HISTORY: bool = True  # never cache prompts with chat history
+    PROMPT_BUDGET_CHARS: int = 8000  # idea context + history in a prompt; 0 = no limit
+    BACKFILL_CONCURRENCY: int = 2  # simultaneous LLM calls when backfilling ideas
+    BACKFILL_BATCH_SIZE: int = 20  # analysed ideas written per transaction
+    # Background job queue in hermes.services.jobs
+    JOB_WORKERS: int = 1  # worker threads started by the API
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF: float = 5.0  # seconds before the first retry, doubled after
+    # API rate limiting in hermes.services.rate_limit
+    RATE_LIMIT_PER_MINUTE: int = 60  # sustained requests per client
+    RATE_LIMIT_BURST: int = 0  # bucket size; 0 means RATE_LIMIT_PER_MINUTE
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" or "sqlite" (shared by workers)
+    RATE_LIMIT_DB_PATH: str = ""  # sqlite backend file; "" means <DB_PATH>.ratelimit
+    # Reminder scheduler in hermes.services.reminders: "local" runs it in this
+    # process, "leader" only in the process holding the lease, "off" never.
+    # "" means "leader" for the API and "local" elsewhere.
+    SCHEDULER_MODE: str = ""
+    SCHEDULER_LEASE_TTL: float = 30.0  # seconds before a dead leader is replaced
+    REMINDER_BACKEND: str = "apscheduler"  # or "heap" (built-in dispatcher)
+    REMINDER_WINDOW_HOURS: float = 24.0  # reminders kept in memory by "heap"
+    # Speech recognition in hermes.services.stt
+    VOSK_MODEL_PATH: str = ""  # "" means Vosk's pt-br model
+    VOSK_PRELOAD: bool = False  # load and warm up the model at startup
+    VOSK_POOL_SIZE: int = 2  # idle recognizers kept for reuse
+    TRANSCRIBE_PROCESSES: int = 0  # "hermes transcribe" workers; 0 means one per CPU
+    # SQLite connection tuning applied by hermes.services.connection
+    DB_JOURNAL_MODE: str = "WAL"
+    DB_SYNCHRONOUS: str = "NORMAL"
+    DB_CACHE_SIZE: int = -16000  # negative values are KiB
+    DB_MMAP_SIZE: int = 67_108_864  # bytes
+    DB_BUSY_TIMEOUT: int = 5000  # milliseconds
+    DB_EXECUTOR_WORKERS: int = 4  # threads serving async database calls
 
 
 logger = logging.getLogger(__name__)
@@ -54,6 +95,22 @@ def _safe_float(value: str | None, default: float, name: str) -> float:
         return default
 
 
+def _safe_bool(value: str | None, default: bool, name: str) -> bool:
+    """Interpret ``value`` as a boolean flag such as ``1``/``0`` or ``on``/``off``.
+
+    Logs a warning and returns ``default`` if the value is not recognised.
+    """
+    if value is None:
+        return default
+    normalized = value.strip().lower()
+    if normalized in {"1", "true", "yes", "on"}:
+        return True
+    if normalized in {"0", "false", "no", "off"}:
+        return False
+    logger.warning("Invalid %s %r; using %s", name, value, default)
+    return default
+
+
 def _from_env() -> Config:
     """Create a :class:`Config` instance from environment variables."""
     return Config(
@@ -75,6 +132,132 @@ def _from_env() -> Config:
             Config.BACKOFF_FACTOR,
             "HERMES_BACKOFF_FACTOR",
         ),
+        LLM_POOL_SIZE=_safe_int(
+            os.getenv("HERMES_LLM_POOL_SIZE"),
+            Config.LLM_POOL_SIZE,
+            "HERMES_LLM_POOL_SIZE",
+        ),
+        OLLAMA_KEEP_ALIVE=os.getenv(
+            "HERMES_OLLAMA_KEEP_ALIVE", Config.OLLAMA_KEEP_ALIVE
+        ),
+        OLLAMA_CHAT_API=_safe_bool(
+            os.getenv("HERMES_OLLAMA_CHAT_API"),
+            Config.OLLAMA_CHAT_API,
+            "HERMES_OLLAMA_CHAT_API",
+        ),
+        LLM_CACHE_ENABLED=_safe_bool(
+            os.getenv("HERMES_LLM_CACHE"), Config.LLM_CACHE_ENABLED, "HERMES_LLM_CACHE"
+        ),
+        LLM_CACHE_TTL=_safe_int(
+            os.getenv("HERMES_LLM_CACHE_TTL"),
+            Config.LLM_CACHE_TTL,
+            "HERMES_LLM_CACHE_TTL",
+        ),
+        LLM_CACHE_MEMORY_SIZE=_safe_int(
+            os.getenv("HERMES_LLM_CACHE_MEMORY_SIZE"),
+            Config.LLM_CACHE_MEMORY_SIZE,
+            "HERMES_LLM_CACHE_MEMORY_SIZE",
+        ),
+        LLM_CACHE_DISK_SIZE=_safe_int(
+            os.getenv("HERMES_LLM_CACHE_DISK_SIZE"),
+            Config.LLM_CACHE_DISK_SIZE,
+            "HERMES_LLM_CACHE_DISK_SIZE",
+        ),
+        LLM_CACHE_SKIP_HISTORY=_safe_bool(
+            os.getenv("HERMES_LLM_CACHE_SKIP_HISTORY"),
+            Config.LLM_CACHE_SKIP_HISTORY,
+            "HERMES_LLM_CACHE_SKIP_HISTORY",
+        ),
+        PROMPT_BUDGET_CHARS=_safe_int(
+            os.getenv("HERMES_PROMPT_BUDGET_CHARS"),
+            Config.PROMPT_BUDGET_CHARS,
+            "HERMES_PROMPT_BUDGET_CHARS",
+        ),
+        BACKFILL_CONCURRENCY=_safe_int(
+            os.getenv("HERMES_BACKFILL_CONCURRENCY"),
+            Config.BACKFILL_CONCURRENCY,
+            "HERMES_BACKFILL_CONCURRENCY",
+        ),
+        BACKFILL_BATCH_SIZE=_safe_int(
+            os.getenv("HERMES_BACKFILL_BATCH_SIZE"),
+            Config.BACKFILL_BATCH_SIZE,
+            "HERMES_BACKFILL_BATCH_SIZE",
+        ),
+        JOB_WORKERS=_safe_int(
+            os.getenv("HERMES_JOB_WORKERS"), Config.JOB_WORKERS, "HERMES_JOB_WORKERS"
+        ),
+        JOB_MAX_ATTEMPTS=_safe_int(
+            os.getenv("HERMES_JOB_MAX_ATTEMPTS"),
+            Config.JOB_MAX_ATTEMPTS,
+            "HERMES_JOB_MAX_ATTEMPTS",
+        ),
+        JOB_RETRY_BACKOFF=_safe_float(
+            os.getenv("HERMES_JOB_RETRY_BACKOFF"),
+            Config.JOB_RETRY_BACKOFF,
+            "HERMES_JOB_RETRY_BACKOFF",
+        ),
+        RATE_LIMIT_PER_MINUTE=_safe_int(
+            os.getenv("HERMES_RATE_LIMIT"),
+            Config.RATE_LIMIT_PER_MINUTE,
+            "HERMES_RATE_LIMIT",
+        ),
+        RATE_LIMIT_BURST=_safe_int(
+            os.getenv("HERMES_RATE_LIMIT_BURST"),
+            Config.RATE_LIMIT_BURST,
+            "HERMES_RATE_LIMIT_BURST",
+        ),
+        RATE_LIMIT_BACKEND=os.getenv(
+            "HERMES_RATE_LIMIT_BACKEND", Config.RATE_LIMIT_BACKEND
+        ),
+        RATE_LIMIT_DB_PATH=os.getenv(
+            "HERMES_RATE_LIMIT_DB_PATH", Config.RATE_LIMIT_DB_PATH
+        ),
+        SCHEDULER_MODE=os.getenv("HERMES_SCHEDULER_MODE", Config.SCHEDULER_MODE),
+        SCHEDULER_LEASE_TTL=_safe_float(
+            os.getenv("HERMES_SCHEDULER_LEASE_TTL"),
+            Config.SCHEDULER_LEASE_TTL,
+            "HERMES_SCHEDULER_LEASE_TTL",
+        ),
+        REMINDER_BACKEND=os.getenv("HERMES_REMINDER_BACKEND", Config.REMINDER_BACKEND),
+        REMINDER_WINDOW_HOURS=_safe_float(
+            os.getenv("HERMES_REMINDER_WINDOW_HOURS"),
+            Config.REMINDER_WINDOW_HOURS,
+            "HERMES_REMINDER_WINDOW_HOURS",
+        ),
+        VOSK_MODEL_PATH=os.getenv("HERMES_VOSK_MODEL_PATH", Config.VOSK_MODEL_PATH),
+        VOSK_PRELOAD=_safe_bool(
+            os.getenv("HERMES_VOSK_PRELOAD"), Config.VOSK_PRELOAD, "HERMES_VOSK_PRELOAD"
+        ),
+        VOSK_POOL_SIZE=_safe_int(
+            os.getenv("HERMES_VOSK_POOL_SIZE"),
+            Config.VOSK_POOL_SIZE,
+            "HERMES_VOSK_POOL_SIZE",
+        ),
+        TRANSCRIBE_PROCESSES=_safe_int(
+            os.getenv("HERMES_TRANSCRIBE_PROCESSES"),
+            Config.TRANSCRIBE_PROCESSES,
+            "HERMES_TRANSCRIBE_PROCESSES",
+        ),
+        DB_JOURNAL_MODE=os.getenv("HERMES_DB_JOURNAL_MODE", Config.DB_JOURNAL_MODE),
+        DB_SYNCHRONOUS=os.getenv("HERMES_DB_SYNCHRONOUS", Config.DB_SYNCHRONOUS),
+        DB_CACHE_SIZE=_safe_int(
+            os.getenv("HERMES_DB_CACHE_SIZE"),
+            Config.DB_CACHE_SIZE,
+            "HERMES_DB_CACHE_SIZE",
+        ),
+        DB_MMAP_SIZE=_safe_int(
+            os.getenv("HERMES_DB_MMAP_SIZE"), Config.DB_MMAP_SIZE, "HERMES_DB_MMAP_SIZE"
+        ),
+        DB_BUSY_TIMEOUT=_safe_int(
+            os.getenv("HERMES_DB_BUSY_TIMEOUT"),
+            Config.DB_BUSY_TIMEOUT,
+            "HERMES_DB_BUSY_TIMEOUT",
+        ),
+        DB_EXECUTOR_WORKERS=_safe_int(
+            os.getenv("HERMES_DB_EXECUTOR_WORKERS"),
+            Config.DB_EXECUTOR_WORKERS,
+            "HERMES_DB_EXECUTOR_WORKERS",
+        ),
     )
 
 
@@ -84,6 +267,9 @@ config = _from_env()
 def load_from_args(args: Sequence[str] | None = None) -> Config:
     """Update :data:`config` using command-line arguments.
 
+    The global instance is updated in place so modules that imported
+    :data:`config` directly observe the new values.
+
     Parameters
     ----------
     args: Sequence[str] | None
@@ -99,11 +285,42 @@ def load_from_args(args: Sequence[str] | None = None) -> Config:
     parser.add_argument("--timeout")
     parser.add_argument("--max-retries")
     parser.add_argument("--backoff-factor")
+    parser.add_argument("--llm-pool-size")
+    parser.add_argument("--ollama-keep-alive")
+    parser.add_argument("--ollama-chat-api")
+    parser.add_argument("--llm-cache")
+    parser.add_argument("--llm-cache-ttl")
+    parser.add_argument("--llm-cache-memory-size")
+    parser.add_argument("--llm-cache-disk-size")
+    parser.add_argument("--llm-cache-skip-history")
+    parser.add_argument("--prompt-budget-chars")
+    parser.add_argument("--backfill-concurrency")
+    parser.add_argument("--backfill-batch-size")
+    parser.add_argument("--job-workers")
+    parser.add_argument("--job-max-attempts")
+    parser.add_argument("--job-retry-backoff")
+    parser.add_argument("--rate-limit")
+    parser.add_argument("--rate-limit-burst")
+    parser.add_argument("--rate-limit-backend")
+    parser.add_argument("--rate-limit-db-path")
+    parser.add_argument("--scheduler-mode")
+    parser.add_argument("--scheduler-lease-ttl")
+    parser.add_argument("--reminder-backend")
+    parser.add_argument("--reminder-window-hours")
+    parser.add_argument("--vosk-model-path")
+    parser.add_argument("--vosk-preload")
+    parser.add_argument("--vosk-pool-size")
+    parser.add_argument("--transcribe-processes")
+    parser.add_argument("--db-journal-mode")
+    parser.add_argument("--db-synchronous")
+    parser.add_argument("--db-cache-size")
+    parser.add_argument("--db-mmap-size")
+    parser.add_argument("--db-busy-timeout")
+    parser.add_argument("--db-executor-workers")
 
     namespace, _ = parser.parse_known_args(args)
 
-    global config
-    config = Config(
+    updated = Config(
         DB_PATH=namespace.db_path or config.DB_PATH,
         API_PORT=_safe_int(namespace.api_port, config.API_PORT, "--api-port"),
         OLLAMA_MODEL=namespace.ollama_model or config.OLLAMA_MODEL,
@@ -116,5 +333,109 @@ def load_from_args(args: Sequence[str] | None = None) -> Config:
         BACKOFF_FACTOR=_safe_float(
             namespace.backoff_factor, config.BACKOFF_FACTOR, "--backoff-factor"
         ),
+        LLM_POOL_SIZE=_safe_int(
+            namespace.llm_pool_size, config.LLM_POOL_SIZE, "--llm-pool-size"
+        ),
+        OLLAMA_KEEP_ALIVE=namespace.ollama_keep_alive or config.OLLAMA_KEEP_ALIVE,
+        OLLAMA_CHAT_API=_safe_bool(
+            namespace.ollama_chat_api, config.OLLAMA_CHAT_API, "--ollama-chat-api"
+        ),
+        LLM_CACHE_ENABLED=_safe_bool(
+            namespace.llm_cache, config.LLM_CACHE_ENABLED, "--llm-cache"
+        ),
+        LLM_CACHE_TTL=_safe_int(
+            namespace.llm_cache_ttl, config.LLM_CACHE_TTL, "--llm-cache-ttl"
+        ),
+        LLM_CACHE_MEMORY_SIZE=_safe_int(
+            namespace.llm_cache_memory_size,
+            config.LLM_CACHE_MEMORY_SIZE,
+            "--llm-cache-memory-size",
+        ),
+        LLM_CACHE_DISK_SIZE=_safe_int(
+            namespace.llm_cache_disk_size,
+            config.LLM_CACHE_DISK_SIZE,
+            "--llm-cache-disk-size",
+        ),
+        LLM_CACHE_SKIP_HISTORY=_safe_bool(
+            namespace.llm_cache_skip_history,
+            config.LLM_CACHE_SKIP_HISTORY,
+            "--llm-cache-skip-history",
+        ),
+        PROMPT_BUDGET_CHARS=_safe_int(
+            namespace.prompt_budget_chars,
+            config.PROMPT_BUDGET_CHARS,
+            "--prompt-budget-chars",
+        ),
+        BACKFILL_CONCURRENCY=_safe_int(
+            namespace.backfill_concurrency,
+            config.BACKFILL_CONCURRENCY,
+            "--backfill-concurrency",
+        ),
+        BACKFILL_BATCH_SIZE=_safe_int(
+            namespace.backfill_batch_size,
+            config.BACKFILL_BATCH_SIZE,
+            "--backfill-batch-size",
+        ),
+        JOB_WORKERS=_safe_int(
+            namespace.job_workers, config.JOB_WORKERS, "--job-workers"
+        ),
+        JOB_MAX_ATTEMPTS=_safe_int(
+            namespace.job_max_attempts, config.JOB_MAX_ATTEMPTS, "--job-max-attempts"
+        ),
+        JOB_RETRY_BACKOFF=_safe_float(
+            namespace.job_retry_backoff,
+            config.JOB_RETRY_BACKOFF,
+            "--job-retry-backoff",
+        ),
+        RATE_LIMIT_PER_MINUTE=_safe_int(
+            namespace.rate_limit, config.RATE_LIMIT_PER_MINUTE, "--rate-limit"
+        ),
+        RATE_LIMIT_BURST=_safe_int(
+            namespace.rate_limit_burst, config.RATE_LIMIT_BURST, "--rate-limit-burst"
+        ),
+        RATE_LIMIT_BACKEND=namespace.rate_limit_backend or config.RATE_LIMIT_BACKEND,
+        RATE_LIMIT_DB_PATH=namespace.rate_limit_db_path or config.RATE_LIMIT_DB_PATH,
+        SCHEDULER_MODE=namespace.scheduler_mode or config.SCHEDULER_MODE,
+        SCHEDULER_LEASE_TTL=_safe_float(
+            namespace.scheduler_lease_ttl,
+            config.SCHEDULER_LEASE_TTL,
+            "--scheduler-lease-ttl",
+        ),
+        REMINDER_BACKEND=namespace.reminder_backend or config.REMINDER_BACKEND,
+        REMINDER_WINDOW_HOURS=_safe_float(
+            namespace.reminder_window_hours,
+            config.REMINDER_WINDOW_HOURS,
+            "--reminder-window-hours",
+        ),
+        VOSK_MODEL_PATH=namespace.vosk_model_path or config.VOSK_MODEL_PATH,
+        VOSK_PRELOAD=_safe_bool(
+            namespace.vosk_preload, config.VOSK_PRELOAD, "--vosk-preload"
+        ),
+        VOSK_POOL_SIZE=_safe_int(
+            namespace.vosk_pool_size, config.VOSK_POOL_SIZE, "--vosk-pool-size"
+        ),
+        TRANSCRIBE_PROCESSES=_safe_int(
+            namespace.transcribe_processes,
+            config.TRANSCRIBE_PROCESSES,
+            "--transcribe-processes",
+        ),
+        DB_JOURNAL_MODE=namespace.db_journal_mode or config.DB_JOURNAL_MODE,
+        DB_SYNCHRONOUS=namespace.db_synchronous or config.DB_SYNCHRONOUS,
+        DB_CACHE_SIZE=_safe_int(
+            namespace.db_cache_size, config.DB_CACHE_SIZE, "--db-cache-size"
+        ),
+        DB_MMAP_SIZE=_safe_int(
+            namespace.db_mmap_size, config.DB_MMAP_SIZE, "--db-mmap-size"
+        ),
+        DB_BUSY_TIMEOUT=_safe_int(
+            namespace.db_busy_timeout, config.DB_BUSY_TIMEOUT, "--db-busy-timeout"
+        ),
+        DB_EXECUTOR_WORKERS=_safe_int(
+            namespace.db_executor_workers,
+            config.DB_EXECUTOR_WORKERS,
+            "--db-executor-workers",
+        ),
     )
+    for item in fields(Config):
+        setattr(config, item.name, getattr(updated, item.name))
     return config
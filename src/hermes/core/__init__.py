@@ -1,3 +1,3 @@
 """Core functionality of Hermes."""
 
-__all__ = ["registro_ideias", "app", "prompts"]
+__all__ = ["registro_ideias", "app", "prompts", "backfill"]
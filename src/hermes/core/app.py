@@ -5,29 +5,71 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-from ..services import reminders, semantic_search
+from ..config import config
+from ..data.migrate import normalize_timestamp
+from ..services import async_db, jobs, reminders
 from ..services.db import (
+    IDEA_PAGE_SIZE,
     add_idea,
+    add_ideas_bulk,
     add_reminder,
     add_user,
+    get_idea,
     init_db,
+    iter_ideas,
     list_ideas,
+    list_ideas_page,
     list_reminders,
     list_users,
     search_ideas,
     update_idea,
 )
-from ..services.llm_interface import LLMError, gerar_resposta
+from ..services.llm_interface import LLMError, gerar_resposta, gerar_resposta_async
+from ..services.semantic_search import semantic_search
+from .backfill import analisar_ideias_pendentes, enriquecer_ideia
 from .registro_ideias import analisar_ideia_com_llm
 
 logger = logging.getLogger(__name__)
 
 
-def inicializar(db_path: str | None = None) -> None:
-    """Inicializa dependências centrais como banco de dados e scheduler."""
+def inicializar(
+    db_path: str | None = None,
+    *,
+    agendador: str | None = None,
+    carregar_voz: bool | None = None,
+) -> None:
+    """Inicializa dependências centrais como banco de dados e scheduler.
+
+    ``agendador`` escolhe como o scheduler de lembretes roda (padrão:
+    :data:`hermes.config.config.SCHEDULER_MODE` ou ``"local"``):
+    ``"local"`` o inicia neste processo, ``"leader"`` só no processo que
+    detiver o lease compartilhado (API com vários workers) e ``"off"`` não o
+    inicia.
+
+    Com ``carregar_voz`` (padrão: :data:`hermes.config.config.VOSK_PRELOAD`),
+    o modelo Vosk é carregado e aquecido em segundo plano.
+    """
 
     init_db(db_path)
-    reminders.start_scheduler()
+    if config.VOSK_PRELOAD if carregar_voz is None else carregar_voz:
+        from ..services import stt
+
+        stt.preload_vosk_model()
+    modo = agendador or config.SCHEDULER_MODE or "local"
+    if modo == "leader":
+        reminders.start_leader_election()
+    elif modo == "local":
+        reminders.start_scheduler()
+    elif modo != "off":
+        logger.warning("Modo de scheduler desconhecido %r; usando local", modo)
+        reminders.start_scheduler()
+
+
+def finalizar() -> None:
+    """Interrompe o scheduler de lembretes iniciado por :func:`inicializar`."""
+
+    reminders.stop_leader_election()
+    reminders.stop_scheduler()
 
 
 def listar_usuarios() -> list[dict]:
@@ -78,10 +120,179 @@ def registrar_ideia(
     return {"id": idea_id}
 
 
-def listar_ideias(user_id: int) -> list[dict]:
-    """Retorna todas as ideias do usuário informado."""
+async def registrar_ideia_async(
+    user_id: int,
+    titulo: str,
+    descricao: str,
+    *,
+    source: str | None = None,
+    enriquecer: bool = False,
+    chave: str | None = None,
+) -> dict[str, Any]:
+    """Versão assíncrona de :func:`registrar_ideia`, sem esperar pelo LLM.
+
+    A gravação roda no executor dedicado de :mod:`hermes.services.async_db`.
+    Com ``enriquecer=True``, a análise pelo LLM é enfileirada e feita em
+    segundo plano pelos workers iniciados com :func:`iniciar_workers`.
+    ``chave`` é uma chave de idempotência: reenviar a mesma ideia com a mesma
+    chave retorna o id já gravado em vez de duplicá-la.
+    """
+
+    ideia = {
+        "user_id": user_id,
+        "title": titulo,
+        "body": descricao,
+        "source": source,
+        "idempotency_key": chave,
+    }
+    (idea_id,) = await async_db.run(_gravar_ideias, [ideia], enriquecer)
+    return {"id": idea_id}
+
+
+def _enfileirar_enriquecimento(conn, novas: list[int]) -> None:
+    jobs.enqueue_many(jobs.ENRICH_IDEA, novas, conn=conn)
+
+
+def _gravar_ideias(ideias: list[dict[str, Any]], enriquecer: bool) -> list[int]:
+    # Ideias novas e seus jobs são gravados na mesma transação: nenhuma ideia
+    # fica sem análise se o processo cair entre uma gravação e outra.
+    ids = add_ideas_bulk(
+        ideias, before_commit=_enfileirar_enriquecimento if enriquecer else None
+    )
+    if enriquecer:
+        jobs.wake_workers()
+    return ids
+
+
+def registrar_ideias(
+    ideias: list[dict[str, Any]], *, enriquecer: bool = False
+) -> list[int]:
+    """Versão síncrona de :func:`registrar_ideias_async`."""
+
+    return _gravar_ideias(ideias, enriquecer)
+
+
+async def registrar_ideias_async(
+    ideias: list[dict[str, Any]], *, enriquecer: bool = False
+) -> list[int]:
+    """Registra várias ideias de uma vez e retorna seus ids, na mesma ordem.
+
+    Cada ideia é um dicionário com ``user_id``, ``title``, ``body`` e,
+    opcionalmente, ``source`` e ``idempotency_key``. A gravação usa uma única
+    transação; ideias cuja chave já foi usada não são duplicadas. Com
+    ``enriquecer=True`` a análise das ideias novas é enfileirada como em
+    :func:`registrar_ideia_async`.
+    """
+
+    return await async_db.run(_gravar_ideias, ideias, enriquecer)
+
+
+def _executar_enriquecimento(job: dict) -> None:
+    enriquecer_ideia(job["idea_id"])
+
+
+def iniciar_workers(quantidade: int | None = None) -> None:
+    """Inicia os workers da fila de análise de ideias em segundo plano."""
+
+    jobs.register_handler(jobs.ENRICH_IDEA, _executar_enriquecimento)
+    jobs.start_workers(quantidade)
+
+
+def parar_workers() -> None:
+    """Interrompe os workers iniciados por :func:`iniciar_workers`."""
+
+    jobs.stop_workers()
+
+
+def status_ideia(idea_id: int) -> dict[str, Any] | None:
+    """Retorna o estado da análise de uma ideia ou ``None`` se ela não existe.
+
+    ``status`` é ``"done"`` quando a ideia já tem resumo; caso contrário,
+    reflete o último job de análise (``pending``, ``running`` ou ``failed``),
+    ou ``"not_queued"`` se nenhum foi criado.
+    """
+
+    ideia = get_idea(idea_id)
+    if ideia is None:
+        return None
+
+    job = jobs.latest_job_for_idea(idea_id)
+    if ideia["llm_summary"] is not None:
+        status = jobs.DONE
+    elif job is not None:
+        status = job["status"]
+    else:
+        status = "not_queued"
+
+    return {
+        "id": idea_id,
+        "status": status,
+        "attempts": job["attempts"] if job else 0,
+        "last_error": job["last_error"] if job else None,
+        "next_attempt_at": job["run_after"] if job and status == jobs.PENDING else None,
+        "llm_summary": ideia["llm_summary"],
+        "llm_topic": ideia["llm_topic"],
+        "tags": ideia["tags"],
+    }
 
-    return list_ideas(user_id)
+
+async def status_ideia_async(idea_id: int) -> dict[str, Any] | None:
+    """Versão assíncrona de :func:`status_ideia`."""
+
+    return await async_db.run(status_ideia, idea_id)
+
+
+def listar_ideias(
+    user_id: int, *, cursor: str | None = None, limite: int | None = None
+) -> list[dict]:
+    """Retorna as ideias do usuário informado, das mais recentes às antigas.
+
+    Sem ``cursor`` e ``limite`` todas as ideias são retornadas. Com eles, a
+    listagem é paginada por keyset: ``cursor`` vem de :func:`pagina_ideias`
+    ou de :func:`hermes.services.db.idea_cursor` aplicado à última ideia da
+    página anterior.
+    """
+
+    if cursor is None and limite is None:
+        return list_ideas(user_id)
+    return list(iter_ideas(user_id, after=cursor, limit=limite))
+
+
+def pagina_ideias(
+    user_id: int | None,
+    *,
+    cursor: str | None = None,
+    limite: int = IDEA_PAGE_SIZE,
+    texto: str | None = None,
+    topico: str | None = None,
+    tag: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """Retorna uma página de ideias e o cursor da próxima (ou ``None``).
+
+    ``user_id`` ``None`` percorre as ideias de todos os usuários. Os filtros
+    seguem :func:`buscar_ideias`, mas os resultados ficam em ordem
+    cronológica decrescente.
+    """
+
+    return list_ideas_page(
+        user_id, after=cursor, limit=limite, text=texto, topic=topico, tag=tag
+    )
+
+
+async def pagina_ideias_async(
+    user_id: int | None,
+    *,
+    cursor: str | None = None,
+    limite: int = IDEA_PAGE_SIZE,
+    texto: str | None = None,
+    topico: str | None = None,
+    tag: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """Versão assíncrona de :func:`pagina_ideias`."""
+
+    return await async_db.list_ideas_page(
+        user_id, after=cursor, limit=limite, text=texto, topic=topico, tag=tag
+    )
 
 
 def buscar_ideias(
@@ -90,8 +301,27 @@ def buscar_ideias(
     texto: str | None = None,
     topico: str | None = None,
     tag: str | None = None,
+    cursor: str | None = None,
+    limite: int | None = None,
 ) -> list[dict]:
-    """Realiza buscas textuais por ideias."""
+    """Realiza buscas textuais por ideias.
+
+    Sem paginação os resultados com ``texto`` são ordenados por relevância.
+    Com ``cursor`` ou ``limite`` a busca é paginada por keyset em ordem
+    cronológica decrescente (veja :func:`pagina_ideias`).
+    """
+
+    if cursor is not None or limite is not None:
+        return list(
+            iter_ideas(
+                user_id,
+                after=cursor,
+                limit=limite,
+                text=texto,
+                topic=topico,
+                tag=tag,
+            )
+        )
 
     if user_id is None:
         resultados: list[dict] = []
@@ -107,7 +337,7 @@ def buscar_ideias(
 def buscar_ideias_semanticas(user_id: int, termo: str, limite: int = 10) -> list[dict]:
     """Busca ideias semânticas para o usuário informado."""
 
-    return semantic_search.semantic_search(termo, user_id=user_id, limit=limite)
+    return semantic_search(termo, user_id=user_id, limit=limite)
 
 
 def processar_ideia(
@@ -131,10 +361,16 @@ def processar_ideia(
 
 
 def criar_lembrete(user_id: int, mensagem: str, quando: str) -> int:
-    """Cria um lembrete e agenda sua execução."""
+    """Cria um lembrete e agenda apenas a sua execução."""
 
     reminder_id = add_reminder(user_id, mensagem, quando)
-    reminders.load_pending_reminders()
+    reminders.schedule_reminder(
+        {
+            "id": reminder_id,
+            "message": mensagem,
+            "trigger_at": normalize_timestamp(quando),
+        }
+    )
     return reminder_id
 
 
@@ -157,16 +393,43 @@ def responder_prompt(prompt: str, *, url: str | None = None, model: str | None =
     return resultado
 
 
+async def responder_prompt_async(
+    prompt: str, *, url: str | None = None, model: str | None = None
+) -> dict:
+    """Versão assíncrona de :func:`responder_prompt`."""
+
+    try:
+        resultado = await gerar_resposta_async(prompt, url=url, model=model)
+    except LLMError as exc:
+        raise RuntimeError(str(exc)) from exc
+
+    if not resultado.get("ok", True):
+        raise RuntimeError(resultado.get("message", "Erro ao consultar LLM"))
+    return resultado
+
+
 __all__ = [
     "inicializar",
+    "finalizar",
     "listar_usuarios",
     "criar_usuario",
     "registrar_ideia",
+    "registrar_ideia_async",
+    "registrar_ideias",
+    "registrar_ideias_async",
+    "iniciar_workers",
+    "parar_workers",
+    "status_ideia",
+    "status_ideia_async",
+    "analisar_ideias_pendentes",
     "listar_ideias",
+    "pagina_ideias",
+    "pagina_ideias_async",
     "buscar_ideias",
     "buscar_ideias_semanticas",
     "processar_ideia",
     "criar_lembrete",
     "listar_lembretes",
     "responder_prompt",
+    "responder_prompt_async",
 ]
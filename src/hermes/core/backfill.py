@@ -0,0 +1,237 @@
+"""Análise em lote das ideias que ainda não passaram pelo LLM.
+
+Ideias gravadas sem ``usar_llm`` (por exemplo via ``POST /ideas``) ficam com
+``llm_summary`` nulo. :func:`analisar_ideias_pendentes` percorre essas ideias
+em ordem de ``id``, envia-as ao LLM por um pool limitado de threads e grava os
+resultados em lotes, cada lote numa única transação. Como o critério de
+seleção é o próprio ``llm_summary`` nulo, uma execução interrompida continua
+de onde parou na próxima vez.
+
+Ideias novas recebidas pela API são analisadas individualmente por
+:func:`enriquecer_ideia`, executada pelos workers da fila de
+:mod:`hermes.services.jobs`.
+
+Uso pela linha de comando::
+
+    hermes backfill [--usuario ID] [--limite N] [--backfill-concurrency N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Sequence
+
+from ..config import config, load_from_args
+from ..services import db
+from .registro_ideias import analisar_ideia_com_llm
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProgressoAnalise:
+    """Contadores de uma execução de :func:`analisar_ideias_pendentes`."""
+
+    total: int
+    analisadas: int = 0
+    falhas: int = 0
+    inicio: float = field(default_factory=time.monotonic)
+
+    @property
+    def concluidas(self) -> int:
+        return self.analisadas + self.falhas
+
+    @property
+    def ideias_por_minuto(self) -> float:
+        decorrido = time.monotonic() - self.inicio
+        return self.analisadas * 60 / decorrido if decorrido > 0 else 0.0
+
+
+def _campos_llm(dados: dict[str, Any]) -> dict[str, Any]:
+    # Sem "Resumo:" na resposta, grava texto vazio para que a ideia não volte
+    # a ser selecionada nas próximas execuções.
+    return {
+        "llm_summary": dados.get("llm_summary") or "",
+        "llm_topic": dados.get("llm_topic"),
+        "tags": dados.get("tags"),
+    }
+
+
+def enriquecer_ideia(
+    idea_id: int, *, url: str | None = None, model: str | None = None
+) -> bool:
+    """Analisa uma única ideia com o LLM, se ainda não analisada.
+
+    Retorna ``False`` quando a ideia não existe mais ou já tem resumo. Falhas
+    do LLM levantam :class:`RuntimeError`, para que a fila tente novamente.
+    """
+
+    ideia = db.get_idea(idea_id)
+    if ideia is None or ideia["llm_summary"] is not None:
+        return False
+    dados = analisar_ideia_com_llm(
+        ideia["title"], ideia["body"] or "", url=url, model=model
+    )
+    db.update_idea(idea_id, **_campos_llm(dados))
+    return True
+
+
+def analisar_ideias_pendentes(
+    *,
+    user_id: int | None = None,
+    limite: int | None = None,
+    concorrencia: int | None = None,
+    lote: int | None = None,
+    url: str | None = None,
+    model: str | None = None,
+    ao_progredir: Callable[[ProgressoAnalise], None] | None = None,
+) -> ProgressoAnalise:
+    """Analisa com o LLM as ideias sem ``llm_summary`` e grava os resultados.
+
+    Parameters
+    ----------
+    user_id: int | None, optional
+        Restringe a análise às ideias de um usuário.
+    limite: int | None, optional
+        Número máximo de ideias enviadas ao LLM nesta execução.
+    concorrencia: int | None, optional
+        Chamadas simultâneas ao LLM. Padrão:
+        :data:`hermes.config.config.BACKFILL_CONCURRENCY`.
+    lote: int | None, optional
+        Ideias lidas e gravadas por transação. Padrão:
+        :data:`hermes.config.config.BACKFILL_BATCH_SIZE`.
+    url, model: str | None, optional
+        Repassados a :func:`analisar_ideia_com_llm`.
+    ao_progredir: callable, optional
+        Chamado com o :class:`ProgressoAnalise` após cada ideia concluída.
+
+    Ideias cuja análise falha são contadas em ``falhas`` e ficam pendentes
+    para a próxima execução. Em caso de interrupção (``KeyboardInterrupt``),
+    os resultados já obtidos são gravados antes de a exceção se propagar.
+    """
+
+    concorrencia = max(1, concorrencia or config.BACKFILL_CONCURRENCY)
+    lote = max(1, lote or config.BACKFILL_BATCH_SIZE)
+
+    total = db.count_unanalysed_ideas(user_id)
+    if limite is not None:
+        total = min(total, limite)
+    progresso = ProgressoAnalise(total)
+
+    fila: deque[dict] = deque()
+    ultimo_id = 0
+    enviadas = 0
+    em_andamento: dict[Future, int] = {}
+    resultados: list[tuple[int, dict[str, Any]]] = []
+
+    def gravar(minimo: int = 1) -> None:
+        while len(resultados) >= minimo and resultados:
+            db.update_ideas(resultados[:lote])
+            del resultados[:lote]
+
+    executor = ThreadPoolExecutor(
+        max_workers=concorrencia, thread_name_prefix="hermes-backfill"
+    )
+    try:
+        while True:
+            # Mantém no máximo duas ideias por thread em andamento, para que a
+            # memória não cresça com o tamanho do acervo.
+            while len(em_andamento) < 2 * concorrencia and (
+                limite is None or enviadas < limite
+            ):
+                if not fila:
+                    fila.extend(
+                        db.list_unanalysed_ideas(
+                            after_id=ultimo_id, limit=lote, user_id=user_id
+                        )
+                    )
+                    if not fila:
+                        break
+                    ultimo_id = fila[-1]["id"]
+                ideia = fila.popleft()
+                futuro = executor.submit(
+                    analisar_ideia_com_llm,
+                    ideia["title"],
+                    ideia["body"] or "",
+                    url=url,
+                    model=model,
+                )
+                em_andamento[futuro] = ideia["id"]
+                enviadas += 1
+
+            if not em_andamento:
+                break
+
+            prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                idea_id = em_andamento.pop(futuro)
+                try:
+                    dados = futuro.result()
+                except Exception as exc:
+                    logger.warning("Falha ao analisar a ideia %s: %s", idea_id, exc)
+                    progresso.falhas += 1
+                else:
+                    resultados.append((idea_id, _campos_llm(dados)))
+                    progresso.analisadas += 1
+                if ao_progredir is not None:
+                    ao_progredir(progresso)
+
+            gravar(minimo=lote)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        gravar()
+
+    logger.info(
+        "Análise em lote: %d ideias analisadas, %d falhas (%.1f ideias/min)",
+        progresso.analisadas,
+        progresso.falhas,
+        progresso.ideias_por_minuto,
+    )
+    return progresso
+
+
+def _mostrar_progresso(progresso: ProgressoAnalise) -> None:
+    print(
+        f"\r{progresso.concluidas}/{progresso.total} ideias "
+        f"({progresso.falhas} falhas) - {progresso.ideias_por_minuto:.1f} ideias/min",
+        end="",
+        flush=True,
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Ponto de entrada de ``hermes backfill``."""
+
+    parser = argparse.ArgumentParser(
+        prog="hermes backfill",
+        description="Analisa com o LLM as ideias que ainda não têm resumo.",
+    )
+    parser.add_argument("--usuario", type=int, help="Só as ideias deste usuário")
+    parser.add_argument("--limite", type=int, help="Máximo de ideias nesta execução")
+    args, restantes = parser.parse_known_args(argv)
+
+    load_from_args(restantes)
+    db.init_db(config.DB_PATH)
+
+    try:
+        progresso = analisar_ideias_pendentes(
+            user_id=args.usuario, limite=args.limite, ao_progredir=_mostrar_progresso
+        )
+    except KeyboardInterrupt:
+        print("\nInterrompido. Execute novamente para continuar de onde parou.")
+        return
+
+    print()
+    print(
+        f"{progresso.analisadas} ideias analisadas, {progresso.falhas} falhas, "
+        f"{progresso.ideias_por_minuto:.1f} ideias/min."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""Transcrição em lote de memos de voz (arquivos WAV) para ideias.
+
+:func:`transcrever_diretorio` reconhece os arquivos de um diretório num pool
+de processos. Cada processo carrega o modelo Vosk uma única vez, por
+:func:`hermes.services.stt.get_vosk_model`, e reaproveita seus
+reconhecedores entre arquivos. Os arquivos são lidos em blocos de poucos
+segundos, então a memória não cresce com a duração das gravações, e as
+transcrições são gravadas em lotes por :func:`hermes.core.app.registrar_ideias`.
+
+Cada ideia recebe como chave de idempotência o hash do áudio, válida apenas
+para o seu dono: arquivos que o usuário já gravou são reconhecidos pela chave
+e pulados antes do reconhecimento, então transcrever o mesmo diretório de
+novo não duplica ideias. Com ``enriquecer=True``, a análise das ideias novas
+pelo LLM é enfileirada em :mod:`hermes.services.jobs`.
+
+Uso pela linha de comando::
+
+    hermes transcribe DIRETORIO --usuario ID [--processos N] [--enriquecer]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+import numpy as np
+
+from ..config import config, load_from_args
+from ..services import db, stt
+from . import app
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES = (".wav",)
+# Transcrições gravadas por transação.
+LOTE_GRAVACAO = 20
+
+
+@dataclass
+class Transcricao:
+    """Resultado da transcrição de um arquivo."""
+
+    caminho: str
+    texto: str = ""
+    duracao: float = 0.0  # segundos de áudio
+    tempo: float = 0.0  # segundos de processamento
+    chave: str | None = None
+    erro: str | None = None
+    idea_id: int | None = None
+    existente: bool = False  # a chave já tinha ideia; nenhuma foi criada
+
+    @property
+    def fator_tempo_real(self) -> float:
+        """Segundos de processamento por segundo de áudio (RTF)."""
+
+        return self.tempo / self.duracao if self.duracao else 0.0
+
+
+def _mono(dados: bytes, canais: int) -> bytes:
+    if canais == 1:
+        return dados
+    amostras = np.frombuffer(dados, dtype=np.int16).reshape(-1, canais)
+    return amostras.mean(axis=1).astype(np.int16).tobytes()
+
+
+def _chave(resumo) -> str:
+    return f"transcricao:{resumo.hexdigest()}"
+
+
+def chave_audio(caminho: str, *, bloco: float = 4.0) -> str | None:
+    """Chave de idempotência de ``caminho`` sem transcrevê-lo.
+
+    É a mesma chave que :func:`transcrever_arquivo` atribui ao arquivo, ou
+    ``None`` se ele não puder ser lido.
+    """
+
+    resumo = hashlib.sha1()
+    try:
+        with wave.open(caminho, "rb") as arquivo:
+            quadros = max(1, int(arquivo.getframerate() * bloco))
+            while dados := arquivo.readframes(quadros):
+                resumo.update(dados)
+    except Exception:
+        return None
+    return _chave(resumo)
+
+
+def transcrever_arquivo(caminho: str, *, bloco: float = 4.0) -> Transcricao:
+    """Transcreve um WAV PCM de 16 bits, lendo ``bloco`` segundos por vez.
+
+    Falhas de leitura ou reconhecimento são registradas em
+    :attr:`Transcricao.erro` em vez de propagadas, para não interromper o
+    lote.
+    """
+
+    inicio = time.perf_counter()
+    resultado = Transcricao(caminho)
+    resumo = hashlib.sha1()
+    trechos: list[str] = []
+    try:
+        with wave.open(caminho, "rb") as arquivo:
+            if arquivo.getsampwidth() != 2 or arquivo.getcomptype() != "NONE":
+                raise ValueError("apenas WAV PCM de 16 bits é suportado")
+            samplerate = arquivo.getframerate()
+            canais = arquivo.getnchannels()
+            quadros = max(1, int(samplerate * bloco))
+            with stt.get_recognizer_pool(samplerate).reconhecedor() as recognizer:
+                while dados := arquivo.readframes(quadros):
+                    resumo.update(dados)
+                    if recognizer.AcceptWaveform(_mono(dados, canais)):
+                        trechos.append(json.loads(recognizer.Result()).get("text", ""))
+                trechos.append(json.loads(recognizer.FinalResult()).get("text", ""))
+            resultado.duracao = arquivo.getnframes() / samplerate
+    except Exception as exc:
+        logger.warning("Falha ao transcrever %s: %s", caminho, exc)
+        resultado.erro = str(exc) or type(exc).__name__
+    else:
+        resultado.texto = " ".join(t for t in trechos if t)
+        resultado.chave = _chave(resumo)
+    resultado.tempo = time.perf_counter() - inicio
+    return resultado
+
+
+def _iniciar_processo(model_path: str | None) -> None:
+    # Carrega o modelo antes do primeiro arquivo, uma vez por processo.
+    stt.get_vosk_model(model_path)
+
+
+def listar_audios(diretorio: str | Path, *, recursivo: bool = False) -> list[Path]:
+    """Arquivos de áudio suportados em ``diretorio``, em ordem de nome."""
+
+    padrao = "**/*" if recursivo else "*"
+    return sorted(
+        caminho
+        for caminho in Path(diretorio).glob(padrao)
+        if caminho.is_file() and caminho.suffix.lower() in EXTENSOES
+    )
+
+
+def transcrever_diretorio(
+    diretorio: str | Path,
+    user_id: int,
+    *,
+    processos: int | None = None,
+    enriquecer: bool = False,
+    recursivo: bool = False,
+    ao_concluir: Callable[[Transcricao], None] | None = None,
+) -> list[Transcricao]:
+    """Transcreve os WAV de ``diretorio`` e os registra como ideias.
+
+    Parameters
+    ----------
+    diretorio: str | Path
+        Diretório com os memos de voz.
+    user_id: int
+        Dono das ideias criadas.
+    processos: int | None, optional
+        Processos de reconhecimento. Padrão:
+        :data:`hermes.config.config.TRANSCRIBE_PROCESSES` ou, se zero, um por
+        CPU. Com um único processo, os arquivos são transcritos neste mesmo.
+    enriquecer: bool, optional
+        Enfileira a análise das ideias novas pelo LLM.
+    recursivo: bool, optional
+        Inclui os subdiretórios.
+    ao_concluir: callable, optional
+        Chamado com cada :class:`Transcricao`, na ordem em que terminam.
+
+    Arquivos sem fala reconhecida ou com erro não geram ideias. Arquivos cuja
+    chave ``user_id`` já gravou não são transcritos de novo: voltam com o id
+    da ideia existente e :attr:`Transcricao.existente` verdadeiro. Se a
+    execução for interrompida, as transcrições já concluídas são gravadas
+    antes de a exceção se propagar.
+    """
+
+    arquivos = listar_audios(diretorio, recursivo=recursivo)
+    chaves = {arquivo: chave_audio(str(arquivo)) for arquivo in arquivos}
+    gravadas = db.find_ideas_by_key(user_id, {c for c in chaves.values() if c})
+    arquivos = [a for a in arquivos if chaves[a] not in gravadas]
+    processos = processos or config.TRANSCRIBE_PROCESSES or os.cpu_count() or 1
+    processos = max(1, min(processos, len(arquivos)))
+
+    resultados: list[Transcricao] = []
+    pendentes: list[Transcricao] = []
+    criadas: set[int] = set()
+
+    def gravar() -> None:
+        validas = [t for t in pendentes if t.texto]
+        pendentes.clear()
+        if not validas:
+            return
+        ids = app.registrar_ideias(
+            [
+                {
+                    "user_id": user_id,
+                    "title": Path(t.caminho).stem,
+                    "body": t.texto,
+                    "source": "transcricao",
+                    "idempotency_key": t.chave,
+                }
+                for t in validas
+            ],
+            enriquecer=enriquecer,
+        )
+        for transcricao, idea_id in zip(validas, ids):
+            transcricao.idea_id = idea_id
+            # Áudios repetidos no diretório recebem o id da primeira cópia.
+            transcricao.existente = idea_id in criadas
+            criadas.add(idea_id)
+
+    def concluir(transcricao: Transcricao) -> None:
+        resultados.append(transcricao)
+        if not transcricao.existente:
+            pendentes.append(transcricao)
+        if ao_concluir is not None:
+            ao_concluir(transcricao)
+        if len(pendentes) >= LOTE_GRAVACAO:
+            gravar()
+
+    for caminho, chave in chaves.items():
+        if chave in gravadas:
+            concluir(
+                Transcricao(
+                    str(caminho), chave=chave, idea_id=gravadas[chave], existente=True
+                )
+            )
+
+    try:
+        if processos == 1:
+            for arquivo in arquivos:
+                concluir(transcrever_arquivo(str(arquivo)))
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=processos,
+                initializer=_iniciar_processo,
+                initargs=(config.VOSK_MODEL_PATH or None,),
+            )
+            try:
+                futuros = [
+                    executor.submit(transcrever_arquivo, str(arquivo))
+                    for arquivo in arquivos
+                ]
+                for futuro in as_completed(futuros):
+                    concluir(futuro.result())
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+    finally:
+        gravar()
+
+    audio = sum(t.duracao for t in resultados)
+    logger.info(
+        "Transcrição em lote: %d arquivos, %.1f s de áudio, %d falhas",
+        len(resultados),
+        audio,
+        sum(1 for t in resultados if t.erro),
+    )
+    return resultados
+
+
+def _mostrar_resultado(transcricao: Transcricao) -> None:
+    nome = Path(transcricao.caminho).name
+    if transcricao.erro:
+        print(f"{nome}: erro - {transcricao.erro}")
+        return
+    if transcricao.existente:
+        print(f"{nome}: já transcrito (ideia {transcricao.idea_id})")
+        return
+    situacao = "" if transcricao.texto else " - sem fala reconhecida"
+    print(
+        f"{nome}: {transcricao.duracao:.1f} s de áudio em "
+        f"{transcricao.tempo:.1f} s (RTF {transcricao.fator_tempo_real:.2f})"
+        f"{situacao}"
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Ponto de entrada de ``hermes transcribe``."""
+
+    parser = argparse.ArgumentParser(
+        prog="hermes transcribe",
+        description="Transcreve os memos de voz (WAV) de um diretório como ideias.",
+    )
+    parser.add_argument("diretorio", help="Diretório com os arquivos WAV")
+    parser.add_argument(
+        "--usuario", type=int, required=True, help="Dono das ideias criadas"
+    )
+    parser.add_argument(
+        "--processos", type=int, help="Processos de reconhecimento (padrão: CPUs)"
+    )
+    parser.add_argument(
+        "--enriquecer",
+        action="store_true",
+        help="Enfileira a análise das ideias novas pelo LLM",
+    )
+    parser.add_argument(
+        "--recursivo", action="store_true", help="Inclui os subdiretórios"
+    )
+    args, restantes = parser.parse_known_args(argv)
+
+    load_from_args(restantes)
+    db.init_db(config.DB_PATH)
+
+    inicio = time.perf_counter()
+    try:
+        resultados = transcrever_diretorio(
+            args.diretorio,
+            args.usuario,
+            processos=args.processos,
+            enriquecer=args.enriquecer,
+            recursivo=args.recursivo,
+            ao_concluir=_mostrar_resultado,
+        )
+    except KeyboardInterrupt:
+        print("\nInterrompido. Execute novamente: arquivos já gravados são ignorados.")
+        return
+    decorrido = time.perf_counter() - inicio
+
+    audio = sum(t.duracao for t in resultados)
+    ideias = sum(1 for t in resultados if t.idea_id is not None and not t.existente)
+    existentes = sum(1 for t in resultados if t.existente)
+    print(
+        f"{len(resultados)} arquivos, {ideias} ideias gravadas, "
+        f"{existentes} já existentes, "
+        f"{audio:.1f} s de áudio em {decorrido:.1f} s "
+        f"(RTF total {decorrido / audio if audio else 0.0:.2f})."
+    )
+    if args.enriquecer and ideias:
+        print("Análise pelo LLM enfileirada para os workers da API.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
 import argparse
+import logging
 import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
 from typing import Sequence
 
 from ..config import config
 
+logger = logging.getLogger(__name__)
+
+# Latest schema version, stored in ``PRAGMA user_version``.
+SCHEMA_VERSION = 7
+
 # Columns introduced in schema version 2
 V2_COLUMNS = {
     "source": "TEXT",
@@ -23,13 +31,205 @@ CREATE TABLE IF NOT EXISTS reminders (
 )
 """
 
+# Per-user change counter bumped on every write to ``ideias``. Consumers such as
+# the semantic index compare it against the value they were built with to
+# detect stale data.
+IDEA_VERSIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS idea_versions (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+IDEA_VERSIONS_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS ideias_version_insert AFTER INSERT ON ideias
+    BEGIN
+        INSERT INTO idea_versions (user_id, version) VALUES (new.user_id, 1)
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ideias_version_update AFTER UPDATE ON ideias
+    BEGIN
+        INSERT INTO idea_versions (user_id, version) VALUES (old.user_id, 1)
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+        INSERT INTO idea_versions (user_id, version)
+        SELECT new.user_id, 1 WHERE new.user_id IS NOT old.user_id
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ideias_version_delete AFTER DELETE ON ideias
+    BEGIN
+        INSERT INTO idea_versions (user_id, version) VALUES (old.user_id, 1)
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+    END
+    """,
+)
+
+# Full-text index over the searchable columns of ``ideias``. The FTS table keeps
+# its own copy of the text (rowid = idea id) so triggers can delete and
+# re-insert rows safely even while an existing database is being backfilled.
+FTS_TABLE_SQL = """
+CREATE VIRTUAL TABLE ideias_fts USING fts5(
+    title,
+    body,
+    llm_summary,
+    tags,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+# Single-row table tracking an interrupted backfill; removed once complete.
+FTS_BACKFILL_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ideias_fts_backfill (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_id INTEGER NOT NULL,
+    max_id INTEGER NOT NULL
+)
+"""
+
+FTS_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS ideias_fts_insert AFTER INSERT ON ideias
+    BEGIN
+        INSERT OR REPLACE INTO ideias_fts (rowid, title, body, llm_summary, tags)
+        VALUES (new.id, new.title, new.body, new.llm_summary, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ideias_fts_update AFTER UPDATE ON ideias
+    BEGIN
+        DELETE FROM ideias_fts WHERE rowid = old.id;
+        INSERT INTO ideias_fts (rowid, title, body, llm_summary, tags)
+        VALUES (new.id, new.title, new.body, new.llm_summary, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ideias_fts_delete AFTER DELETE ON ideias
+    BEGIN
+        DELETE FROM ideias_fts WHERE rowid = old.id;
+    END
+    """,
+)
+
+FTS_BACKFILL_CHUNK = 1000
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    """Return whether the SQLite library behind ``conn`` supports FTS5."""
+
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def _backfill_fts(conn: sqlite3.Connection, chunk_size: int) -> None:
+    """Index pre-existing ideas in chunks of ``chunk_size`` rows.
+
+    Each chunk is committed separately and progress is stored in
+    ``ideias_fts_backfill``, so an interrupted backfill resumes where it
+    stopped. Rows written meanwhile are kept in sync by the triggers.
+    """
+
+    while True:
+        row = conn.execute(
+            "SELECT last_id, max_id FROM ideias_fts_backfill WHERE id = 1"
+        ).fetchone()
+        if row is None:
+            return
+        last_id, max_id = row
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            chunk_end = conn.execute(
+                """
+                SELECT MAX(id) FROM (
+                    SELECT id FROM ideias WHERE id > ? AND id <= ? ORDER BY id LIMIT ?
+                )
+                """,
+                (last_id, max_id, chunk_size),
+            ).fetchone()[0]
+            if chunk_end is None:
+                conn.execute("DELETE FROM ideias_fts_backfill")
+            else:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO ideias_fts (
+                        rowid, title, body, llm_summary, tags
+                    )
+                    SELECT id, title, body, llm_summary, tags
+                    FROM ideias WHERE id > ? AND id <= ?
+                    """,
+                    (last_id, chunk_end),
+                )
+                conn.execute(
+                    "UPDATE ideias_fts_backfill SET last_id = ? WHERE id = 1",
+                    (chunk_end,),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        if chunk_end is None:
+            logger.info("Full-text index backfill complete")
+            return
+        logger.info("Full-text index backfilled up to idea %s of %s", chunk_end, max_id)
+
+
+def migrate_fts(db_path: str, chunk_size: int = FTS_BACKFILL_CHUNK) -> bool:
+    """Create the ``ideias_fts`` index and backfill existing rows.
+
+    Returns ``True`` when the index is available. Databases whose SQLite build
+    lacks FTS5, or legacy tables without the v2 columns, are left untouched and
+    ``search_ideas`` keeps using ``LIKE`` filters for them.
+    """
+
+    with closing(sqlite3.connect(db_path, isolation_level=None)) as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(ideias)")}
+        if not {"user_id", "title", "body", "llm_summary", "tags"} <= columns:
+            return False
+        if not fts5_available(conn):
+            logger.warning("SQLite FTS5 unavailable; idea search will use LIKE")
+            return False
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'ideias_fts'"
+            ).fetchone()
+            conn.execute(FTS_BACKFILL_TABLE_SQL)
+            if not exists:
+                conn.execute(FTS_TABLE_SQL)
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO ideias_fts_backfill (id, last_id, max_id)
+                    SELECT 1, 0, IFNULL(MAX(id), 0) FROM ideias
+                    """
+                )
+            for trigger_sql in FTS_TRIGGERS_SQL:
+                conn.execute(trigger_sql)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        _backfill_fts(conn, chunk_size)
+    return True
+
 
 def migrate_to_v2(db_path: str) -> None:
     """Upgrade the database at ``db_path`` to the v2 schema.
 
     The migration adds any missing columns declared in :data:`V2_COLUMNS` to the
-    ``ideias`` table. It is safe to run multiple times as existing columns are
-    left untouched.
+    ``ideias`` table, installs the ``idea_versions`` change counter and the
+    ``ideias_fts`` full-text index (see :func:`migrate_fts`). It is safe to run
+    multiple times as existing columns are left untouched.
     """
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
@@ -42,13 +242,219 @@ def migrate_to_v2(db_path: str) -> None:
 
         cursor.execute(REMINDERS_TABLE_SQL)
 
+        cursor.execute(IDEA_VERSIONS_TABLE_SQL)
+        # Legacy tables without ``user_id`` cannot be tracked per user.
+        if "user_id" in existing:
+            for trigger_sql in IDEA_VERSIONS_TRIGGERS_SQL:
+                cursor.execute(trigger_sql)
+
+    migrate_fts(db_path)
+
+
+# Composite indexes matching the DAO's filters and sort orders (schema v3).
+V3_INDEXES_SQL = {
+    "ideias": (
+        "CREATE INDEX IF NOT EXISTS idx_ideias_user_created "
+        "ON ideias (user_id, created_at)"
+    ),
+    "reminders": (
+        "CREATE INDEX IF NOT EXISTS idx_reminders_user_pending "
+        "ON reminders (user_id, triggered_at, trigger_at)"
+    ),
+}
+
+# Timestamp columns rewritten to the canonical format by schema v3.
+V3_TIMESTAMP_COLUMNS = {
+    "ideias": ("created_at",),
+    "reminders": ("trigger_at", "triggered_at"),
+}
+
+
+# Durable queue of background jobs (schema v4), consumed by
+# :mod:`hermes.services.jobs`.
+JOBS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    idea_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_after TEXT NOT NULL,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+)
+"""
+
+JOBS_INDEXES_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after "
+    "ON jobs (status, run_after)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_idea ON jobs (idea_id)",
+)
+
+
+# Client-supplied idempotency keys of ideas (schema v5). Replaying a request
+# with a key the same user already sent returns the stored idea instead of
+# inserting a duplicate; keys are scoped per user.
+IDEA_KEYS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS idea_keys (
+    user_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    idea_id INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (user_id, key)
+)
+"""
+
+
+# Named leases with an expiry (schema v6). A process holding an unexpired lease
+# is the only one allowed to run the corresponding singleton task, such as the
+# reminder scheduler (see :mod:`hermes.services.leader`).
+LEASES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+# Partial index over pending reminders only (schema v7), serving the
+# scheduler's global "what fires next" query without touching the history of
+# triggered reminders.
+PENDING_REMINDERS_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_reminders_pending "
+    "ON reminders (trigger_at) WHERE triggered_at IS NULL"
+)
+
+
+def normalize_timestamp(value: str | None) -> str | None:
+    """Return ``value`` as a naive UTC ISO-8601 string.
+
+    Timestamps in this format compare correctly as plain strings, which lets
+    SQLite serve ``ORDER BY`` from an index instead of wrapping columns in
+    ``datetime()``. Values with a timezone are converted to UTC; values that
+    cannot be parsed are returned unchanged.
+    """
+
+    if not value:
+        return value
+    text = value.strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return value
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def get_schema_version(db_path: str) -> int:
+    """Return the schema version recorded in ``db_path``."""
+
+    with closing(sqlite3.connect(db_path)) as conn:
+        return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate_to_v3(db_path: str) -> None:
+    """Upgrade the database at ``db_path`` to the v3 schema.
+
+    Rewrites timestamp columns with :func:`normalize_timestamp` and creates
+    the composite indexes from :data:`V3_INDEXES_SQL`. Tables lacking the
+    indexed columns (legacy layouts) are skipped.
+    """
+
+    with sqlite3.connect(db_path) as conn:
+        for table, columns in V3_TIMESTAMP_COLUMNS.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if "user_id" not in existing or not set(columns) <= existing:
+                continue
+
+            for column in columns:
+                rows = conn.execute(
+                    f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL"
+                ).fetchall()
+                updates = [
+                    (normalized, row_id)
+                    for row_id, value in rows
+                    if (normalized := normalize_timestamp(value)) != value
+                ]
+                conn.executemany(
+                    f"UPDATE {table} SET {column} = ? WHERE id = ?", updates
+                )
+                if updates:
+                    logger.info(
+                        "Normalized %d value(s) of %s.%s", len(updates), table, column
+                    )
+            conn.execute(V3_INDEXES_SQL[table])
+
+        conn.execute("PRAGMA user_version = 3")
+
+
+def migrate_to_v4(db_path: str) -> None:
+    """Upgrade the database at ``db_path`` to the v4 schema (job queue)."""
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(JOBS_TABLE_SQL)
+        for statement in JOBS_INDEXES_SQL:
+            conn.execute(statement)
+        conn.execute("PRAGMA user_version = 4")
+
+
+def migrate_to_v5(db_path: str) -> None:
+    """Upgrade the database at ``db_path`` to the v5 schema (idempotency keys)."""
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(IDEA_KEYS_TABLE_SQL)
+        conn.execute("PRAGMA user_version = 5")
+
+
+def migrate_to_v6(db_path: str) -> None:
+    """Upgrade the database at ``db_path`` to the v6 schema (leases)."""
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(LEASES_TABLE_SQL)
+        conn.execute("PRAGMA user_version = 6")
+
+
+def migrate_to_v7(db_path: str) -> None:
+    """Upgrade the database at ``db_path`` to the v7 schema (pending index)."""
+
+    with sqlite3.connect(db_path) as conn:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(reminders)")}
+        if {"trigger_at", "triggered_at"} <= existing:
+            conn.execute(PENDING_REMINDERS_INDEX_SQL)
+        conn.execute("PRAGMA user_version = 7")
+
+
+def migrate(db_path: str) -> None:
+    """Bring the database at ``db_path`` up to :data:`SCHEMA_VERSION`.
+
+    :func:`migrate_to_v2` is idempotent and always runs; later migrations run
+    once, according to ``PRAGMA user_version``.
+    """
+
+    migrate_to_v2(db_path)
+    if get_schema_version(db_path) < 3:
+        migrate_to_v3(db_path)
+    if get_schema_version(db_path) < 4:
+        migrate_to_v4(db_path)
+    if get_schema_version(db_path) < 5:
+        migrate_to_v5(db_path)
+    if get_schema_version(db_path) < 6:
+        migrate_to_v6(db_path)
+    if get_schema_version(db_path) < 7:
+        migrate_to_v7(db_path)
+
 
 def main(argv: Sequence[str] | None = None) -> None:
     """Command-line entry point to run the migration manually."""
-    parser = argparse.ArgumentParser(description="Migrate Hermes DB to v2 schema")
+    parser = argparse.ArgumentParser(description="Migrate Hermes DB to latest schema")
     parser.add_argument("--db-path", default=config.DB_PATH, help="Path to the SQLite DB")
     args = parser.parse_args(argv)
-    migrate_to_v2(args.db_path)
+    migrate(args.db_path)
 
 
 if __name__ == "__main__":
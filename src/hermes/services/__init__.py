@@ -1,6 +1,6 @@
 """External service integrations for Hermes."""
 
-from . import db, llm_interface, reminders, stt
+from . import db, jobs, llm_interface, reminders, stt
 from .semantic_search import semantic_search
 
-__all__ = ["llm_interface", "db", "semantic_search", "reminders", "stt"]
+__all__ = ["llm_interface", "db", "jobs", "semantic_search", "reminders", "stt"]
@@ -0,0 +1,94 @@
+"""Asyncio front-end for :mod:`hermes.services.db`.
+
+SQLite calls block, so coroutines (the FastAPI endpoints) must not run them on
+the event loop, nor on Starlette's shared thread pool where they would compete
+with every other blocking handler. The helpers here run DAO functions on a
+small dedicated executor instead. Each executor thread keeps its own
+connection through :mod:`hermes.services.connection`, so the number of open
+connections stays bounded by :data:`hermes.config.config.DB_EXECUTOR_WORKERS`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from ..config import config
+from . import db
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the executor dedicated to database calls, creating it lazily."""
+
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, config.DB_EXECUTOR_WORKERS),
+                thread_name_prefix="hermes-db",
+            )
+        return _executor
+
+
+def shutdown(wait: bool = True) -> None:
+    """Stop the executor; a new one is created on next use."""
+
+    global _executor
+
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def run(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run ``func(*args, **kwargs)`` on the database executor and await it."""
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+async def add_idea(*args: Any, **kwargs: Any) -> int:
+    """Async version of :func:`hermes.services.db.add_idea`."""
+
+    return await run(db.add_idea, *args, **kwargs)
+
+
+async def get_idea(idea_id: int) -> dict | None:
+    """Async version of :func:`hermes.services.db.get_idea`."""
+
+    return await run(db.get_idea, idea_id)
+
+
+async def list_ideas_page(
+    user_id: int | None, **kwargs: Any
+) -> tuple[list[dict], str | None]:
+    """Async version of :func:`hermes.services.db.list_ideas_page`."""
+
+    return await run(db.list_ideas_page, user_id, **kwargs)
+
+
+async def search_ideas(user_id: int, *args: Any, **kwargs: Any) -> list[dict]:
+    """Async version of :func:`hermes.services.db.search_ideas`."""
+
+    return await run(db.search_ideas, user_id, *args, **kwargs)
+
+
+__all__ = [
+    "add_idea",
+    "get_executor",
+    "get_idea",
+    "list_ideas_page",
+    "run",
+    "search_ideas",
+    "shutdown",
+]
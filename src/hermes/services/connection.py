@@ -0,0 +1,128 @@
+"""Thread-aware SQLite connection management.
+
+Opening a connection per DAO call dominates the latency of small queries and
+prevents per-connection tuning. :class:`ConnectionManager` keeps one
+long-lived connection per thread and database path, configured with the
+PRAGMAs from :mod:`hermes.config`. Each thread (FastAPI workers, the reminder
+scheduler, Qt worker pools) gets its own connection, so no connection object
+is ever shared across threads.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _pragmas() -> list[str]:
+    """Build the PRAGMA statements applied to every new connection."""
+
+    statements = [f"PRAGMA busy_timeout = {int(config.DB_BUSY_TIMEOUT)}"]
+
+    journal_mode = (config.DB_JOURNAL_MODE or "").upper()
+    if journal_mode in JOURNAL_MODES:
+        statements.append(f"PRAGMA journal_mode = {journal_mode}")
+    elif journal_mode:
+        logger.warning("Ignoring invalid journal mode %r", config.DB_JOURNAL_MODE)
+
+    synchronous = (config.DB_SYNCHRONOUS or "").upper()
+    if synchronous in SYNCHRONOUS_MODES:
+        statements.append(f"PRAGMA synchronous = {synchronous}")
+    elif synchronous:
+        logger.warning("Ignoring invalid synchronous mode %r", config.DB_SYNCHRONOUS)
+
+    statements.append(f"PRAGMA cache_size = {int(config.DB_CACHE_SIZE)}")
+    statements.append(f"PRAGMA mmap_size = {int(config.DB_MMAP_SIZE)}")
+    return statements
+
+
+class ConnectionManager:
+    """Hands out one SQLite connection per thread and database path.
+
+    Connections are created lazily, tuned with the configured PRAGMAs and
+    return rows as :class:`sqlite3.Row`. They are closed automatically when
+    their thread exits. :meth:`reset` invalidates the connections to a path in
+    every thread, e.g. after the database file was recreated.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._generations: dict[str, int] = {}
+
+    def _pool(self) -> dict[str, tuple[int, sqlite3.Connection]]:
+        pool = getattr(self._local, "connections", None)
+        if pool is None:
+            pool = self._local.connections = {}
+        return pool
+
+    def get(self, db_path: str) -> sqlite3.Connection:
+        """Return the calling thread's connection to ``db_path``."""
+
+        pool = self._pool()
+        generation = self._generations.setdefault(db_path, 0)
+        cached = pool.get(db_path)
+        if cached is not None:
+            cached_generation, conn = cached
+            if cached_generation == generation:
+                return conn
+            conn.close()
+
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        for statement in _pragmas():
+            conn.execute(statement)
+        pool[db_path] = (generation, conn)
+        logger.debug(
+            "Opened SQLite connection to %s in thread %s",
+            db_path,
+            threading.current_thread().name,
+        )
+        return conn
+
+    @contextmanager
+    def transaction(self, db_path: str) -> Iterator[sqlite3.Connection]:
+        """Yield the thread's connection, committing or rolling back on exit."""
+
+        conn = self.get(db_path)
+        with conn:
+            yield conn
+
+    def reset(self, db_path: str | None = None) -> None:
+        """Force every thread to reopen its connection to ``db_path``.
+
+        Without ``db_path`` all known paths are invalidated. The calling
+        thread's connections are closed immediately; other threads close theirs
+        on next use.
+        """
+
+        with self._lock:
+            paths = [db_path] if db_path else list(self._generations)
+            for path in paths:
+                self._generations[path] = self._generations.get(path, 0) + 1
+        self.close(db_path)
+
+    def close(self, db_path: str | None = None) -> None:
+        """Close the calling thread's connection(s)."""
+
+        pool = self._pool()
+        for path in [db_path] if db_path else list(pool):
+            cached = pool.pop(path, None)
+            if cached is not None:
+                cached[1].close()
+
+
+connections = ConnectionManager()
+
+
+__all__ = ["ConnectionManager", "connections"]
@@ -4,15 +4,27 @@ This module provides simple helper functions to interact with the
 ``ideias`` table using the schema v2.  It mirrors part of the previous
 ``hermes.data.database`` API but returns dictionaries instead of tuples
 and exposes CRUD operations for ideas.
+
+All functions share the per-thread connections handed out by
+:data:`hermes.services.connection.connections` instead of opening a new
+connection on every call.
 """
 
 from __future__ import annotations
 
+import base64
+import json
+import logging
+import re
 import sqlite3
 from datetime import datetime
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Iterator, Mapping
 
 from ..config import config
+from ..data.migrate import normalize_timestamp
+from .connection import connections
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = config.DB_PATH
 
@@ -27,6 +39,30 @@ IDEIA_COLUMNS = {
     "tags",
 }
 
+IDEA_SELECT = (
+    "SELECT i.id, i.user_id, i.title, i.body, i.source, i.created_at, "
+    "i.llm_summary, i.llm_topic, i.tags FROM ideias AS i"
+)
+
+# Default number of ideas per page for the keyset-paginated APIs.
+IDEA_PAGE_SIZE = 50
+
+# Idempotency keys looked up per ``IN (...)`` query, below SQLite's
+# historical limit of 999 bound parameters.
+KEY_LOOKUP_CHUNK = 500
+
+# bm25 column weights for ``ideias_fts`` (title, body, llm_summary, tags).
+FTS_WEIGHTS = (2.0, 1.0, 1.0, 1.0)
+
+# Whether ``ideias_fts`` is ready per database path; reset by :func:`init_db`.
+_fts_ready: dict[str, bool] = {}
+
+# Callbacks notified after ideas are inserted, updated or deleted. They receive
+# the event name (``"insert"``, ``"update"`` or ``"delete"``) and the rows
+# written by one transaction, so batch writes are reported in a single call.
+IdeaListener = Callable[[str, list[dict]], None]
+_idea_listeners: list[IdeaListener] = []
+
 
 def _dicts(cursor: sqlite3.Cursor, rows: Iterable[sqlite3.Row]) -> list[dict]:
     """Convert ``sqlite3.Row`` objects to plain dictionaries."""
@@ -34,6 +70,37 @@ def _dicts(cursor: sqlite3.Cursor, rows: Iterable[sqlite3.Row]) -> list[dict]:
     return [dict(row) for row in rows]
 
 
+def _now() -> str:
+    """Return the current UTC time in the canonical timestamp format."""
+
+    return datetime.utcnow().replace(microsecond=0).isoformat()
+
+
+def add_idea_listener(listener: IdeaListener) -> None:
+    """Register ``listener`` to be called after every idea write."""
+
+    if listener not in _idea_listeners:
+        _idea_listeners.append(listener)
+
+
+def remove_idea_listener(listener: IdeaListener) -> None:
+    """Unregister a listener previously added with :func:`add_idea_listener`."""
+
+    if listener in _idea_listeners:
+        _idea_listeners.remove(listener)
+
+
+def _notify_idea_listeners(event: str, ideas: list[dict | None]) -> None:
+    ideas = [idea for idea in ideas if idea is not None]
+    if not ideas:
+        return
+    for listener in list(_idea_listeners):
+        try:
+            listener(event, ideas)
+        except Exception:  # pragma: no cover - listeners must not break writes
+            logger.exception("Idea listener %r failed for %s", listener, event)
+
+
 def init_db(db_path: str | None = None) -> None:
     """Create database tables if they do not exist and run migrations.
 
@@ -46,7 +113,11 @@ def init_db(db_path: str | None = None) -> None:
     if db_path:
         DB_PATH = db_path
 
-    with sqlite3.connect(DB_PATH) as conn:
+    # The file may have been replaced since connections were opened.
+    connections.reset(DB_PATH)
+    _fts_ready.pop(DB_PATH, None)
+
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -66,7 +137,8 @@ def init_db(db_path: str | None = None) -> None:
                 title TEXT NOT NULL,
                 body TEXT NOT NULL,
                 source TEXT,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                created_at TEXT NOT NULL
+                    DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now')),
                 llm_summary TEXT,
                 llm_topic TEXT,
                 tags TEXT,
@@ -88,15 +160,15 @@ def init_db(db_path: str | None = None) -> None:
         )
 
     # Run migrations after ensuring base schema is present
-    from ..data.migrate import migrate_to_v2
+    from ..data.migrate import migrate
 
-    migrate_to_v2(DB_PATH)
+    migrate(DB_PATH)
 
 
 def add_user(name: str, kind: str, voice_id: str | None = None) -> int:
     """Insert a new user and return its ``id``."""
 
-    with sqlite3.connect(DB_PATH) as conn:
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO usuarios (nome, tipo, voz_id) VALUES (?, ?, ?)",
@@ -114,8 +186,7 @@ def create_user(name: str, kind: str, voice_id: str | None = None) -> int:
 def list_users() -> list[dict]:
     """Return all users as a list of dictionaries."""
 
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
             "SELECT id, nome as name, tipo as kind, voz_id as voice_id FROM usuarios"
@@ -131,10 +202,31 @@ def add_idea(
     llm_summary: str | None = None,
     llm_topic: str | None = None,
     tags: str | None = None,
+    idempotency_key: str | None = None,
 ) -> int:
-    """Insert a new idea and return its ``id``."""
+    """Insert a new idea and return its ``id``.
+
+    If ``idempotency_key`` was already used, nothing is inserted and the id
+    of the idea stored with that key is returned.
+    """
 
-    with sqlite3.connect(DB_PATH) as conn:
+    if idempotency_key is not None:
+        return add_ideas_bulk(
+            [
+                {
+                    "user_id": user_id,
+                    "title": title,
+                    "body": body,
+                    "source": source,
+                    "llm_summary": llm_summary,
+                    "llm_topic": llm_topic,
+                    "tags": tags,
+                    "idempotency_key": idempotency_key,
+                }
+            ]
+        )[0]
+
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
@@ -143,14 +235,144 @@ def add_idea(
                 title,
                 body,
                 source,
+                created_at,
                 llm_summary,
                 llm_topic,
                 tags
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (user_id, title, body, source, llm_summary, llm_topic, tags),
+            (user_id, title, body, source, _now(), llm_summary, llm_topic, tags),
         )
-        return int(cursor.lastrowid)
+        idea_id = int(cursor.lastrowid)
+
+    if _idea_listeners:
+        _notify_idea_listeners("insert", [get_idea(idea_id)])
+    return idea_id
+
+
+def _ideas_by_key(
+    conn: sqlite3.Connection, user_id: int, keys: Iterable[str]
+) -> dict[str, int]:
+    keys = list(keys)
+    found: dict[str, int] = {}
+    for start in range(0, len(keys), KEY_LOOKUP_CHUNK):
+        chunk = keys[start : start + KEY_LOOKUP_CHUNK]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(
+            "SELECT key, idea_id FROM idea_keys "
+            f"WHERE user_id = ? AND key IN ({placeholders})",
+            [user_id, *chunk],
+        )
+        found.update((row[0], row[1]) for row in rows)
+    return found
+
+
+def find_ideas_by_key(user_id: int, keys: Iterable[str]) -> dict[str, int]:
+    """Return the id stored for each idempotency key ``user_id`` sent in ``keys``."""
+
+    with connections.transaction(DB_PATH) as conn:
+        return _ideas_by_key(conn, user_id, keys)
+
+
+def add_ideas_bulk(
+    ideas: Iterable[Mapping[str, Any]],
+    *,
+    before_commit: Callable[[sqlite3.Connection, list[int]], None] | None = None,
+) -> list[int]:
+    """Insert many ideas in a single transaction and return their ids.
+
+    Each mapping needs ``user_id``, ``title`` and ``body`` and may carry the
+    optional columns accepted by :func:`add_idea`. Rows are written with
+    ``executemany``, so the cost per idea is a single prepared-statement step
+    instead of a commit.
+
+    Ideas with an ``idempotency_key`` already stored for the same user (or
+    repeated for that user within ``ideas``) are not inserted again; their
+    position in the result holds the id of the existing idea. Keys of
+    different users never match.
+
+    ``before_commit`` is called inside the transaction with the connection
+    and the ids of the newly inserted ideas, so rows written there (e.g.
+    their jobs) are committed or rolled back together with the ideas.
+    """
+
+    ideas = list(ideas)
+    if not ideas:
+        return []
+
+    now = _now()
+    ids: list[int | None] = [None] * len(ideas)
+    with connections.transaction(DB_PATH) as conn:
+        keys = [
+            (idea["user_id"], key) if (key := idea.get("idempotency_key")) else None
+            for idea in ideas
+        ]
+        keys_by_user: dict[int, set[str]] = {}
+        for user_key in filter(None, keys):
+            keys_by_user.setdefault(user_key[0], set()).add(user_key[1])
+        known = {
+            (user_id, key): idea_id
+            for user_id, user_keys in keys_by_user.items()
+            for key, idea_id in _ideas_by_key(conn, user_id, user_keys).items()
+        }
+
+        rows = []
+        positions = []
+        first_with_key: dict[tuple[int, str], int] = {}
+        repeated = []
+        for position, (idea, key) in enumerate(zip(ideas, keys)):
+            if key and key in known:
+                ids[position] = known[key]
+                continue
+            if key and key in first_with_key:
+                repeated.append((position, first_with_key[key]))
+                continue
+            if key:
+                first_with_key[key] = position
+            positions.append(position)
+            rows.append(
+                (
+                    idea["user_id"],
+                    idea["title"],
+                    idea["body"],
+                    idea.get("source"),
+                    now,
+                    idea.get("llm_summary"),
+                    idea.get("llm_topic"),
+                    idea.get("tags"),
+                )
+            )
+
+        new_ids: list[int] = []
+        if rows:
+            conn.executemany(
+                "INSERT INTO ideias (user_id, title, body, source, created_at, "
+                "llm_summary, llm_topic, tags) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            # The transaction holds the write lock, so the new ids are contiguous.
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            new_ids = list(range(last_id - len(rows) + 1, last_id + 1))
+            for position, idea_id in zip(positions, new_ids):
+                ids[position] = idea_id
+        for position, first in repeated:
+            ids[position] = ids[first]
+
+        if first_with_key:
+            conn.executemany(
+                "INSERT INTO idea_keys (user_id, key, idea_id, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (user_id, key, ids[pos], now)
+                    for (user_id, key), pos in first_with_key.items()
+                ],
+            )
+        if before_commit is not None and new_ids:
+            before_commit(conn, new_ids)
+
+    if _idea_listeners and new_ids:
+        _notify_idea_listeners("insert", get_ideas(new_ids))
+    return [int(idea_id) for idea_id in ids]  # type: ignore[arg-type]
 
 
 def save_idea(
@@ -182,95 +404,395 @@ def update_idea(idea_id: int, **fields: Any) -> None:
     params = [fields[col] for col in cols]
     params.append(idea_id)
 
-    with sqlite3.connect(DB_PATH) as conn:
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(f"UPDATE ideias SET {assignments} WHERE id = ?", params)
 
+    if _idea_listeners:
+        _notify_idea_listeners("update", [get_idea(idea_id)])
+
+
+def update_ideas(updates: Iterable[tuple[int, dict[str, Any]]]) -> int:
+    """Apply several :func:`update_idea` changes in a single transaction.
+
+    ``updates`` yields ``(idea_id, fields)`` pairs; unknown columns are
+    ignored as in :func:`update_idea`. Returns the number of rows changed.
+    """
+
+    statements = []
+    for idea_id, fields in updates:
+        cols = [col for col in fields.keys() if col in IDEIA_COLUMNS]
+        if cols:
+            assignments = ", ".join(f"{col} = ?" for col in cols)
+            params = [fields[col] for col in cols] + [idea_id]
+            statements.append((idea_id, assignments, params))
+    if not statements:
+        return 0
+
+    changed = 0
+    with connections.transaction(DB_PATH) as conn:
+        cursor = conn.cursor()
+        for _, assignments, params in statements:
+            cursor.execute(f"UPDATE ideias SET {assignments} WHERE id = ?", params)
+            changed += cursor.rowcount
+
+    if _idea_listeners:
+        _notify_idea_listeners(
+            "update", get_ideas(idea_id for idea_id, _, _ in statements)
+        )
+    return changed
+
+
+def list_unanalysed_ideas(
+    *,
+    after_id: int = 0,
+    limit: int = IDEA_PAGE_SIZE,
+    user_id: int | None = None,
+) -> list[dict]:
+    """Return ideas whose ``llm_summary`` is ``NULL``, ordered by ``id``.
+
+    Pass the last ``id`` seen as ``after_id`` to fetch the next batch.
+    """
+
+    query = IDEA_SELECT + " WHERE i.llm_summary IS NULL AND i.id > ?"
+    params: list[Any] = [after_id]
+    if user_id is not None:
+        query += " AND i.user_id = ?"
+        params.append(user_id)
+    query += " ORDER BY i.id LIMIT ?"
+    params.append(limit)
+
+    with connections.transaction(DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return _dicts(cursor, cursor.fetchall())
+
+
+def count_unanalysed_ideas(user_id: int | None = None) -> int:
+    """Return how many ideas still have a ``NULL`` ``llm_summary``."""
+
+    query = "SELECT COUNT(*) FROM ideias WHERE llm_summary IS NULL"
+    params: list[Any] = []
+    if user_id is not None:
+        query += " AND user_id = ?"
+        params.append(user_id)
+
+    with connections.transaction(DB_PATH) as conn:
+        return int(conn.execute(query, params).fetchone()[0])
+
 
 def delete_idea(idea_id: int) -> None:
     """Remove an idea from the database."""
 
-    with sqlite3.connect(DB_PATH) as conn:
+    idea = get_idea(idea_id) if _idea_listeners else None
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM ideias WHERE id = ?", (idea_id,))
 
+    _notify_idea_listeners("delete", [idea])
+
+
+def get_idea(idea_id: int) -> dict | None:
+    """Return the idea identified by ``idea_id`` or ``None`` if missing."""
+
+    with connections.transaction(DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute(IDEA_SELECT + " WHERE i.id = ?", (idea_id,))
+        row = cursor.fetchone()
+        return dict(row) if row is not None else None
+
+
+def get_ideas(idea_ids: Iterable[int]) -> list[dict]:
+    """Return ideas for ``idea_ids`` preserving the order of the given ids."""
+
+    ids = list(idea_ids)
+    if not ids:
+        return []
+
+    placeholders = ", ".join("?" for _ in ids)
+    with connections.transaction(DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute(IDEA_SELECT + f" WHERE i.id IN ({placeholders})", ids)
+        by_id = {row["id"]: dict(row) for row in cursor.fetchall()}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def get_idea_version(user_id: int) -> int:
+    """Return the change counter of ``user_id``'s ideas.
+
+    The counter is maintained by triggers installed in
+    :func:`hermes.data.migrate.migrate_to_v2` and increases on every insert,
+    update or delete, including writes made by other processes.
+    """
+
+    with connections.transaction(DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT version FROM idea_versions WHERE user_id = ?", (user_id,)
+        )
+        row = cursor.fetchone()
+        return int(row[0]) if row else 0
+
 
 def list_ideas(user_id: int) -> list[dict]:
     """Return a list of ideas for ``user_id`` ordered by ``created_at`` desc."""
 
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
-            """
-            SELECT id, user_id, title, body, source, created_at, llm_summary,
-                   llm_topic, tags
-            FROM ideias
-            WHERE user_id = ?
-            ORDER BY datetime(created_at) DESC
-            """,
+            IDEA_SELECT
+            + " WHERE i.user_id = ? ORDER BY i.created_at DESC, i.id DESC",
             (user_id,),
         )
         return _dicts(cursor, cursor.fetchall())
 
 
+def _fts_available(conn: sqlite3.Connection) -> bool:
+    """Return whether ``ideias_fts`` exists and is fully backfilled."""
+
+    ready = _fts_ready.get(DB_PATH)
+    if ready is None:
+        names = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE name IN ('ideias_fts', 'ideias_fts_backfill')"
+            )
+        }
+        ready = "ideias_fts" in names
+        if ready and "ideias_fts_backfill" in names:
+            pending = conn.execute("SELECT 1 FROM ideias_fts_backfill").fetchone()
+            ready = pending is None
+        _fts_ready[DB_PATH] = ready
+    return ready
+
+
+def _fts_query(text: str) -> str | None:
+    """Turn free text into an FTS5 ``MATCH`` expression.
+
+    Every word becomes a quoted prefix term, so user input cannot inject FTS
+    syntax and partial words still match as they did with ``LIKE``.
+    """
+
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+
 def search_ideas(
     user_id: int,
     text: str | None = None,
     topic: str | None = None,
     tag: str | None = None,
 ) -> list[dict]:
-    """Search ideas using simple ``LIKE``/``INSTR`` filters.
+    """Search ideas of ``user_id`` by text, topic and tag.
 
-    Parameters are optional and combined using ``AND`` when provided. Results
-    are always scoped to ``user_id`` and ordered by ``created_at`` descending.
+    Parameters are optional and combined using ``AND`` when provided. ``text``
+    is matched against the ``ideias_fts`` full-text index and results are
+    ranked by bm25; when FTS5 is unavailable it falls back to ``LIKE``
+    filters. Without ``text`` results are ordered by ``created_at``
+    descending.
     """
 
-    conditions = ["user_id = ?"]
-    params: list[Any] = [user_id]
-
-    if text:
-        like = f"%{text}%"
-        conditions.append(
-            "(title LIKE ? OR body LIKE ? OR IFNULL(llm_summary, '') LIKE ?)"
+    conditions, params = _filters(user_id, topic, tag)
+
+    with connections.transaction(DB_PATH) as conn:
+        match = _fts_query(text) if text else None
+        if match and _fts_available(conn):
+            weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+            query = (
+                IDEA_SELECT
+                + " JOIN ideias_fts ON ideias_fts.rowid = i.id"
+                + " WHERE ideias_fts MATCH ? AND "
+                + " AND ".join(conditions)
+                + f" ORDER BY bm25(ideias_fts, {weights}), i.created_at DESC"
+            )
+            try:
+                cursor = conn.execute(query, [match, *params])
+                return _dicts(cursor, cursor.fetchall())
+            except sqlite3.OperationalError:
+                # e.g. the database was indexed by an SQLite build with FTS5
+                # but is now opened by one without it.
+                logger.warning("Full-text search failed; falling back to LIKE")
+                _fts_ready[DB_PATH] = False
+
+        if text:
+            _add_like_filter(conditions, params, text)
+
+        query = (
+            IDEA_SELECT
+            + " WHERE "
+            + " AND ".join(conditions)
+            + " ORDER BY i.created_at DESC, i.id DESC"
         )
-        params.extend([like, like, like])
+        cursor = conn.execute(query, params)
+        return _dicts(cursor, cursor.fetchall())
+
+
+def _filters(
+    user_id: int | None, topic: str | None, tag: str | None
+) -> tuple[list[str], list[Any]]:
+    """Build the ``WHERE`` conditions shared by the idea search helpers."""
+
+    conditions: list[str] = []
+    params: list[Any] = []
+
+    if user_id is not None:
+        conditions.append("i.user_id = ?")
+        params.append(user_id)
     if topic:
-        conditions.append("IFNULL(llm_topic, '') LIKE ?")
+        conditions.append("IFNULL(i.llm_topic, '') LIKE ?")
         params.append(f"%{topic}%")
     if tag:
         # Look for tag inside comma-separated list
         conditions.append(
-            "INSTR(',' || IFNULL(tags, '') || ',', ',' || ? || ',') > 0"
+            "INSTR(',' || IFNULL(i.tags, '') || ',', ',' || ? || ',') > 0"
         )
         params.append(tag)
+    return conditions, params
 
-    query = (
-        "SELECT id, user_id, title, body, source, created_at, llm_summary, "
-        "llm_topic, tags FROM ideias"
+
+def _add_like_filter(conditions: list[str], params: list[Any], text: str) -> None:
+    """Append the ``LIKE`` fallback used when full-text search is unavailable."""
+
+    like = f"%{text}%"
+    conditions.append(
+        "(i.title LIKE ? OR i.body LIKE ? OR IFNULL(i.llm_summary, '') LIKE ?)"
     )
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-    query += " ORDER BY datetime(created_at) DESC"
+    params.extend([like, like, like])
 
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(query, params)
+
+def idea_cursor(idea: dict) -> str:
+    """Return the opaque pagination cursor pointing just after ``idea``."""
+
+    raw = json.dumps([idea["created_at"], idea["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    """Decode a cursor from :func:`idea_cursor`, raising ``ValueError``."""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, idea_id = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if not isinstance(created_at, str) or not isinstance(idea_id, int):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created_at, idea_id
+
+
+def list_ideas_page(
+    user_id: int | None,
+    *,
+    after: str | None = None,
+    limit: int = IDEA_PAGE_SIZE,
+    text: str | None = None,
+    topic: str | None = None,
+    tag: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """Return one page of ideas and the cursor of the next page.
+
+    Ideas are ordered by ``created_at`` descending and paginated by keyset:
+    ``after`` is a cursor returned by a previous call (or
+    :func:`idea_cursor`), so every page is a single index range scan no
+    matter how deep it is. ``text``, ``topic`` and ``tag`` filter like in
+    :func:`search_ideas`, but matches keep the chronological order instead
+    of being ranked. ``user_id=None`` pages through the ideas of every user.
+    The returned cursor is ``None`` on the last page.
+    """
+
+    if limit < 1:
+        raise ValueError("limit must be positive")
+
+    conditions, params = _filters(user_id, topic, tag)
+    if after is not None:
+        conditions.append("(i.created_at, i.id) < (?, ?)")
+        params.extend(_decode_cursor(after))
+
+    def run(conn: sqlite3.Connection, conditions: list[str], params: list[Any]):
+        query = IDEA_SELECT
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY i.created_at DESC, i.id DESC LIMIT ?"
+        cursor = conn.execute(query, [*params, limit + 1])
         return _dicts(cursor, cursor.fetchall())
 
+    with connections.transaction(DB_PATH) as conn:
+        rows = None
+        match = _fts_query(text) if text else None
+        if match and _fts_available(conn):
+            try:
+                rows = run(
+                    conn,
+                    [
+                        *conditions,
+                        "i.id IN (SELECT rowid FROM ideias_fts"
+                        " WHERE ideias_fts MATCH ?)",
+                    ],
+                    [*params, match],
+                )
+            except sqlite3.OperationalError:
+                logger.warning("Full-text search failed; falling back to LIKE")
+                _fts_ready[DB_PATH] = False
+        if rows is None:
+            if text:
+                _add_like_filter(conditions, params, text)
+            rows = run(conn, conditions, params)
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, idea_cursor(rows[-1])
+    return rows, None
+
+
+def iter_ideas(
+    user_id: int | None,
+    *,
+    after: str | None = None,
+    limit: int | None = None,
+    page_size: int = IDEA_PAGE_SIZE,
+    text: str | None = None,
+    topic: str | None = None,
+    tag: str | None = None,
+) -> Iterator[dict]:
+    """Yield ideas newest first, fetching them lazily page by page.
+
+    At most ``limit`` ideas are yielded (all of them when ``None``). Only one
+    page of ``page_size`` rows is held in memory at a time and no database
+    cursor stays open between pages. See :func:`list_ideas_page` for the
+    remaining arguments.
+    """
+
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        page, after = list_ideas_page(
+            user_id, after=after, limit=size, text=text, topic=topic, tag=tag
+        )
+        yield from page
+        if remaining is not None:
+            remaining -= len(page)
+        if after is None:
+            return
+
 
 def add_reminder(user_id: int, message: str, trigger_at: str) -> int:
-    """Insert a reminder and return its ``id``."""
+    """Insert a reminder and return its ``id``.
+
+    ``trigger_at`` is stored in the canonical format produced by
+    :func:`hermes.data.migrate.normalize_timestamp`.
+    """
 
-    with sqlite3.connect(DB_PATH) as conn:
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
             """
             INSERT INTO reminders (user_id, message, trigger_at)
             VALUES (?, ?, ?)
             """,
-            (user_id, message, trigger_at),
+            (user_id, message, normalize_timestamp(trigger_at)),
         )
         return int(cursor.lastrowid)
 
@@ -288,24 +810,101 @@ def list_reminders(user_id: int, only_pending: bool = False) -> list[dict]:
     )
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
-    query += " ORDER BY datetime(trigger_at) ASC"
+    query += " ORDER BY trigger_at ASC, id ASC"
 
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(query, params)
         return _dicts(cursor, cursor.fetchall())
 
 
-def mark_triggered(reminder_id: int, triggered_at: str | None = None) -> None:
-    """Mark a reminder as triggered by setting ``triggered_at``."""
+def list_pending_reminders(
+    before: str | None = None, *, after_id: int | None = None
+) -> list[dict]:
+    """Return pending reminders of every user ordered by ``trigger_at``.
+
+    ``before`` keeps only reminders due strictly before that timestamp and
+    ``after_id`` only those with a greater ``id`` (i.e. created later). The
+    query is served by the partial index over pending reminders.
+    """
+
+    conditions = ["triggered_at IS NULL"]
+    params: list[Any] = []
+    if before is not None:
+        conditions.append("trigger_at < ?")
+        params.append(normalize_timestamp(before))
+    if after_id is not None:
+        conditions.append("id > ?")
+        params.append(after_id)
+
+    query = (
+        "SELECT id, user_id, message, trigger_at, triggered_at FROM reminders "
+        "WHERE " + " AND ".join(conditions) + " ORDER BY trigger_at ASC, id ASC"
+    )
+    with connections.transaction(DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return _dicts(cursor, cursor.fetchall())
+
+
+def mark_triggered(
+    reminder_id: int,
+    triggered_at: str | None = None,
+    *,
+    only_pending: bool = False,
+) -> bool:
+    """Mark a reminder as triggered by setting ``triggered_at``.
+
+    With ``only_pending`` a reminder already triggered is left untouched.
+    Returns whether the reminder was updated, so concurrent callers can tell
+    which of them fired it.
+    """
 
     if triggered_at is None:
-        triggered_at = datetime.utcnow().isoformat()
+        triggered_at = _now()
+    else:
+        triggered_at = normalize_timestamp(triggered_at)
 
-    with sqlite3.connect(DB_PATH) as conn:
+    query = "UPDATE reminders SET triggered_at = ? WHERE id = ?"
+    if only_pending:
+        query += " AND triggered_at IS NULL"
+    with connections.transaction(DB_PATH) as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE reminders SET triggered_at = ? WHERE id = ?",
-            (triggered_at, reminder_id),
-        )
+        cursor.execute(query, (triggered_at, reminder_id))
+        return cursor.rowcount > 0
+
+
+def mark_triggered_many(
+    reminder_ids: Iterable[int], triggered_at: str | None = None
+) -> list[int]:
+    """Mark several pending reminders as triggered in one transaction.
+
+    Reminders already triggered are left untouched. Returns the ids that were
+    actually updated, i.e. the reminders this call fired.
+    """
+
+    if triggered_at is None:
+        triggered_at = _now()
+    else:
+        triggered_at = normalize_timestamp(triggered_at)
+
+    ids = list(dict.fromkeys(reminder_ids))
+    fired: list[int] = []
+    with connections.transaction(DB_PATH) as conn:
+        for start in range(0, len(ids), KEY_LOOKUP_CHUNK):
+            chunk = ids[start : start + KEY_LOOKUP_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            pending = [
+                row[0]
+                for row in conn.execute(
+                    f"SELECT id FROM reminders WHERE id IN ({placeholders}) "
+                    "AND triggered_at IS NULL",
+                    chunk,
+                )
+            ]
+            conn.executemany(
+                "UPDATE reminders SET triggered_at = ? WHERE id = ?",
+                [(triggered_at, reminder_id) for reminder_id in pending],
+            )
+            fired.extend(pending)
+    return fired
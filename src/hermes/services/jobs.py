@@ -0,0 +1,316 @@
+"""Durable background job queue stored in SQLite.
+
+Jobs live in the ``jobs`` table (schema v4), so work queued by one process
+survives restarts and can be picked up by any worker sharing the database.
+Each job has a ``kind`` dispatched to a handler registered with
+:func:`register_handler`; handlers receive the job row and signal failure by
+raising. Failed jobs are retried with exponential backoff until
+:data:`hermes.config.config.JOB_MAX_ATTEMPTS` is reached, then marked
+``failed``.
+
+Workers are daemon threads started with :func:`start_workers`. They sleep
+until a job is enqueued in this process or the poll interval elapses, so jobs
+inserted by other processes are still noticed.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from ..config import config
+from . import db
+from .connection import connections
+
+logger = logging.getLogger(__name__)
+
+# Job kinds
+ENRICH_IDEA = "enrich_idea"
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Seconds an idle worker waits before looking for jobs again.
+POLL_INTERVAL = 1.0
+# Upper bound for the retry delay, in seconds.
+MAX_RETRY_DELAY = 3600.0
+# Running jobs not updated for this long are assumed orphaned by a crash.
+STALE_AFTER = timedelta(minutes=10)
+
+JobHandler = Callable[[dict], None]
+_handlers: dict[str, JobHandler] = {}
+
+_workers: list[threading.Thread] = []
+_stop = threading.Event()
+_wakeup = threading.Event()
+_lock = threading.Lock()
+
+
+def _now() -> datetime:
+    return datetime.utcnow().replace(microsecond=0)
+
+
+def register_handler(kind: str, handler: JobHandler) -> None:
+    """Use ``handler`` to run jobs of ``kind``."""
+
+    _handlers[kind] = handler
+
+
+def enqueue(kind: str, idea_id: int | None = None) -> int:
+    """Add a pending job and wake up an idle worker. Returns the job id."""
+
+    return enqueue_many(kind, [idea_id])[0]
+
+
+def enqueue_many(
+    kind: str,
+    idea_ids: list[int | None],
+    *,
+    conn: sqlite3.Connection | None = None,
+) -> list[int]:
+    """Add one pending job per entry of ``idea_ids`` in a single transaction.
+
+    With ``conn`` the jobs are inserted in the caller's open transaction, so
+    they commit (or roll back) together with the caller's writes; the caller
+    then calls :func:`wake_workers` once the transaction is committed.
+    """
+
+    if not idea_ids:
+        return []
+    if conn is None:
+        with connections.transaction(db.DB_PATH) as conn:
+            ids = enqueue_many(kind, idea_ids, conn=conn)
+        wake_workers()
+        return ids
+
+    now = _now().isoformat()
+    conn.executemany(
+        "INSERT INTO jobs (kind, idea_id, status, run_after, created_at, "
+        "updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [(kind, idea_id, PENDING, now, now, now) for idea_id in idea_ids],
+    )
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last_id - len(idea_ids) + 1, last_id + 1))
+
+
+def wake_workers() -> None:
+    """Make idle workers in this process look for jobs right away."""
+
+    _wakeup.set()
+
+
+def claim() -> dict | None:
+    """Mark the next due pending job as running and return it.
+
+    The conditional ``UPDATE`` guarantees a job is handed to a single worker
+    even when several processes poll the same database.
+    """
+
+    now = _now().isoformat()
+    with connections.transaction(db.DB_PATH) as conn:
+        while True:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? AND run_after <= ? "
+                "ORDER BY run_after, id LIMIT 1",
+                (PENDING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, now, row["id"], PENDING),
+            ).rowcount
+            if claimed:
+                job = dict(row)
+                job["status"] = RUNNING
+                job["attempts"] += 1
+                return job
+
+
+def complete(job_id: int) -> None:
+    """Mark ``job_id`` as done."""
+
+    with connections.transaction(db.DB_PATH) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, last_error = NULL, updated_at = ? "
+            "WHERE id = ?",
+            (DONE, _now().isoformat(), job_id),
+        )
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the retry following attempt number ``attempts``."""
+
+    delay = config.JOB_RETRY_BACKOFF * 2 ** max(0, attempts - 1)
+    return min(delay, MAX_RETRY_DELAY)
+
+
+def fail(job: dict, error: str) -> None:
+    """Record a failed attempt of ``job``, scheduling a retry if allowed."""
+
+    now = _now()
+    if job["attempts"] >= config.JOB_MAX_ATTEMPTS:
+        status, run_after = FAILED, now
+    else:
+        status = PENDING
+        run_after = now + timedelta(seconds=retry_delay(job["attempts"]))
+    with connections.transaction(db.DB_PATH) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, run_after = ?, last_error = ?, "
+            "updated_at = ? WHERE id = ?",
+            (status, run_after.isoformat(), error, now.isoformat(), job["id"]),
+        )
+
+
+def requeue_stale(older_than: timedelta = STALE_AFTER) -> int:
+    """Return running jobs abandoned by a dead worker to the queue."""
+
+    cutoff = (_now() - older_than).isoformat()
+    with connections.transaction(db.DB_PATH) as conn:
+        return conn.execute(
+            "UPDATE jobs SET status = ? WHERE status = ? AND updated_at < ?",
+            (PENDING, RUNNING, cutoff),
+        ).rowcount
+
+
+def latest_job_for_idea(idea_id: int, kind: str = ENRICH_IDEA) -> dict | None:
+    """Return the most recent job of ``kind`` for ``idea_id``, if any."""
+
+    with connections.transaction(db.DB_PATH) as conn:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE idea_id = ? AND kind = ? "
+            "ORDER BY id DESC LIMIT 1",
+            (idea_id, kind),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def run_job(job: dict) -> bool:
+    """Run ``job`` with its handler and record the outcome.
+
+    Returns ``True`` when the handler succeeded.
+    """
+
+    handler = _handlers.get(job["kind"])
+    if handler is None:
+        fail(job, f"No handler for job kind {job['kind']!r}")
+        return False
+    try:
+        handler(job)
+    except Exception as exc:
+        logger.warning(
+            "Job %s (%s) failed on attempt %d: %s",
+            job["id"],
+            job["kind"],
+            job["attempts"],
+            exc,
+        )
+        fail(job, str(exc) or exc.__class__.__name__)
+        return False
+    complete(job["id"])
+    return True
+
+
+def run_pending(limit: int | None = None) -> int:
+    """Run due jobs in the calling thread until none is left or ``limit`` ran."""
+
+    count = 0
+    while limit is None or count < limit:
+        job = claim()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def _worker_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            job = claim()
+        except Exception:
+            logger.exception("Failed to fetch the next job")
+            job = None
+        if job is None:
+            if _wakeup.wait(POLL_INTERVAL):
+                _wakeup.clear()
+            continue
+        run_job(job)
+    connections.close(db.DB_PATH)
+
+
+def start_workers(count: int | None = None) -> None:
+    """Start ``count`` worker threads (default ``JOB_WORKERS``) if not running."""
+
+    global _stop
+
+    count = config.JOB_WORKERS if count is None else count
+    with _lock:
+        if _workers or count <= 0:
+            return
+        requeued = requeue_stale()
+        if requeued:
+            logger.info("Requeued %d orphaned job(s)", requeued)
+        _stop = threading.Event()
+        for index in range(count):
+            worker = threading.Thread(
+                target=_worker_loop,
+                args=(_stop,),
+                name=f"hermes-job-{index}",
+                daemon=True,
+            )
+            worker.start()
+            _workers.append(worker)
+
+
+def stop_workers(timeout: float | None = 5.0) -> None:
+    """Signal the workers to stop and wait up to ``timeout`` for each."""
+
+    with _lock:
+        workers = list(_workers)
+        _workers.clear()
+        _stop.set()
+        _wakeup.set()
+    for worker in workers:
+        worker.join(timeout)
+
+
+def queue_stats() -> dict[str, Any]:
+    """Return the number of jobs per status."""
+
+    with connections.transaction(db.DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT status, COUNT(*) AS total FROM jobs GROUP BY status"
+        ).fetchall()
+    return {row["status"]: row["total"] for row in rows}
+
+
+__all__ = [
+    "DONE",
+    "ENRICH_IDEA",
+    "FAILED",
+    "PENDING",
+    "RUNNING",
+    "claim",
+    "complete",
+    "enqueue",
+    "enqueue_many",
+    "wake_workers",
+    "fail",
+    "latest_job_for_idea",
+    "queue_stats",
+    "register_handler",
+    "requeue_stale",
+    "retry_delay",
+    "run_job",
+    "run_pending",
+    "start_workers",
+    "stop_workers",
+]
@@ -0,0 +1,183 @@
+"""Leader election between processes sharing the Hermes database.
+
+Some tasks must run in exactly one process even when the API is served by
+several uvicorn workers, e.g. the reminder scheduler: if every worker ran it,
+each reminder would fire once per worker. Processes compete for a named row
+of the ``leases`` table (schema v6); the holder renews it periodically and is
+the leader while the lease is unexpired. If the leader dies, its lease expires
+after ``ttl`` seconds and another process takes over.
+
+:class:`LeaderElection` runs the acquire/renew loop in a daemon thread and
+invokes callbacks when leadership is gained or lost.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable
+
+from . import db
+from .connection import connections
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], None]
+
+
+def new_holder_id() -> str:
+    """Return an identifier unique to this process (and election)."""
+
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire(name: str, holder: str, ttl: float, now: float | None = None) -> bool:
+    """Take or renew lease ``name`` for ``ttl`` seconds.
+
+    Succeeds when the lease is free, expired or already held by ``holder``.
+    The check and the write are a single statement, so two processes can
+    never both succeed for the same unexpired lease.
+    """
+
+    now = time.time() if now is None else now
+    with connections.transaction(db.DB_PATH) as conn:
+        return bool(
+            conn.execute(
+                "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, "
+                "expires_at = excluded.expires_at "
+                "WHERE leases.holder = excluded.holder OR leases.expires_at <= ?",
+                (name, holder, now + ttl, now),
+            ).rowcount
+        )
+
+
+def release(name: str, holder: str) -> None:
+    """Give up lease ``name`` if ``holder`` owns it, so others need not wait."""
+
+    with connections.transaction(db.DB_PATH) as conn:
+        conn.execute(
+            "DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder)
+        )
+
+
+def current_holder(name: str, now: float | None = None) -> str | None:
+    """Return the holder of the unexpired lease ``name``, if any."""
+
+    now = time.time() if now is None else now
+    with connections.transaction(db.DB_PATH) as conn:
+        row = conn.execute(
+            "SELECT holder FROM leases WHERE name = ? AND expires_at > ?",
+            (name, now),
+        ).fetchone()
+    return row["holder"] if row else None
+
+
+class LeaderElection(threading.Thread):
+    """Keep competing for lease ``name`` until :meth:`stop` is called.
+
+    Parameters
+    ----------
+    name:
+        Lease to compete for.
+    ttl:
+        Lease duration in seconds. The lease is renewed every ``ttl / 3``
+        seconds, so a failover happens within ``ttl`` of the leader dying.
+    on_elected:
+        Called in the election thread when this process becomes leader.
+    on_renewed:
+        Called after each successful renewal while leader.
+    on_lost:
+        Called when leadership is lost or given up in :meth:`stop`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        *,
+        on_elected: Callback | None = None,
+        on_renewed: Callback | None = None,
+        on_lost: Callback | None = None,
+    ) -> None:
+        super().__init__(name=f"hermes-leader-{name}", daemon=True)
+        self.lease = name
+        self.ttl = ttl
+        self.interval = ttl / 3
+        self.holder = new_holder_id()
+        self.on_elected = on_elected
+        self.on_renewed = on_renewed
+        self.on_lost = on_lost
+        self.is_leader = False
+        self._expires_at = 0.0
+        self._stop_event = threading.Event()
+
+    def _call(self, callback: Callback | None) -> None:
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception:
+            logger.exception("Leader callback for %r failed", self.lease)
+
+    def _step_down(self) -> None:
+        self.is_leader = False
+        logger.info("Lost leadership of %r", self.lease)
+        self._call(self.on_lost)
+
+    def tick(self) -> bool:
+        """Run one acquire/renew round. Returns whether this process leads."""
+
+        now = time.time()
+        try:
+            acquired = acquire(self.lease, self.holder, self.ttl, now)
+        except Exception:
+            logger.exception("Could not renew lease %r", self.lease)
+            # Without a database answer the lease may still be ours; only step
+            # down once it has certainly expired.
+            acquired = self.is_leader and now < self._expires_at
+        else:
+            if acquired:
+                self._expires_at = now + self.ttl
+
+        if acquired and not self.is_leader:
+            self.is_leader = True
+            logger.info("Acquired leadership of %r as %s", self.lease, self.holder)
+            self._call(self.on_elected)
+        elif acquired:
+            self._call(self.on_renewed)
+        elif self.is_leader:
+            self._step_down()
+        return self.is_leader
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.tick()
+            self._stop_event.wait(self.interval)
+        if self.is_leader:
+            self._step_down()
+            try:
+                release(self.lease, self.holder)
+            except Exception:
+                logger.exception("Could not release lease %r", self.lease)
+        connections.close(db.DB_PATH)
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """Stop competing, releasing the lease if held."""
+
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+__all__ = [
+    "LeaderElection",
+    "acquire",
+    "current_holder",
+    "new_holder_id",
+    "release",
+]
@@ -0,0 +1,216 @@
+"""Two-tier cache for LLM responses.
+
+Identical prompts are frequently re-sent: ideas re-analysed without changes,
+API clients retrying the same question. :class:`LLMCache` keeps recent
+responses in an in-memory LRU and persists them to a small SQLite database so
+they survive restarts. Entries expire after a TTL; the memory tier is bounded
+by entry count and the SQLite tier by row count, evicting the least recently
+used rows first.
+
+Keys are derived from the model, a SHA-256 of the prompt and any options that
+influence the generation (see :func:`cache_key`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Mapping
+
+from .connection import connections
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used);
+"""
+
+# Size-based pruning of the SQLite tier runs every this many stores.
+PRUNE_EVERY = 32
+
+
+def cache_key(model: str, prompt: str, options: Mapping[str, Any] | None = None) -> str:
+    """Return the cache key for ``prompt`` sent to ``model`` with ``options``."""
+
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps([model, digest, dict(options or {})], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """In-memory LRU backed by an optional persistent SQLite tier.
+
+    Parameters
+    ----------
+    db_path:
+        SQLite file for the persistent tier, or ``None`` for memory only.
+    ttl:
+        Seconds an entry stays valid.
+    max_entries:
+        Maximum number of entries kept in memory.
+    max_rows:
+        Maximum number of rows kept in the SQLite tier.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None,
+        *,
+        ttl: float,
+        max_entries: int,
+        max_rows: int,
+    ) -> None:
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max(0, max_entries)
+        self.max_rows = max(0, max_rows)
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._stores_since_prune = 0
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def _conn(self):
+        conn = connections.get(self.db_path)
+        if not self._schema_ready:
+            with conn:
+                conn.executescript(SCHEMA_SQL)
+            self._schema_ready = True
+        return conn
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (response, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def get(self, key: str) -> str | None:
+        """Return the cached response for ``key`` or ``None``."""
+
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                if cached[1] > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return cached[0]
+                del self._memory[key]
+
+        if self.db_path:
+            try:
+                conn = self._conn()
+                with conn:
+                    row = conn.execute(
+                        "SELECT response, expires_at FROM llm_cache WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+                    if row is not None and row["expires_at"] <= now:
+                        conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        row = None
+                    elif row is not None:
+                        conn.execute(
+                            "UPDATE llm_cache SET last_used = ? WHERE key = ?",
+                            (now, key),
+                        )
+            except Exception:
+                logger.exception("LLM cache lookup failed")
+                row = None
+            if row is not None:
+                self._remember(key, row["response"], row["expires_at"])
+                self._count("disk_hits")
+                return row["response"]
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, model: str, response: str) -> None:
+        """Store ``response`` under ``key`` in both tiers."""
+
+        now = time.time()
+        expires_at = now + self.ttl
+        self._remember(key, response, expires_at)
+        self._count("stores")
+        if not self.db_path:
+            return
+
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(key, model, response, expires_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, expires_at, now),
+                )
+            with self._lock:
+                self._stores_since_prune += 1
+                prune = self._stores_since_prune >= PRUNE_EVERY
+                if prune:
+                    self._stores_since_prune = 0
+            if prune:
+                self.prune()
+        except Exception:
+            logger.exception("LLM cache store failed")
+
+    def prune(self) -> int:
+        """Drop expired rows and trim the SQLite tier to ``max_rows``."""
+
+        if not self.db_path:
+            return 0
+        conn = self._conn()
+        with conn:
+            removed = conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            removed += conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_used DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            ).rowcount
+        if removed:
+            self._count("evictions", removed)
+        return removed
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict[str, int]:
+        """Return a snapshot of the hit/miss counters and the memory size."""
+
+        with self._lock:
+            return {**self.counters, "memory_entries": len(self._memory)}
+
+
+__all__ = ["LLMCache", "cache_key"]
@@ -1,14 +1,37 @@
-"""Interface de comunicação com o modelo de linguagem."""
+"""Interface de comunicação com o modelo de linguagem.
 
+Há dois formatos de chamada ao Ollama: um *prompt* único em ``/api/generate``
+(:func:`gerar_resposta`) e uma lista de mensagens em ``/api/chat``
+(:func:`conversar`). Em ambos o servidor reaproveita o cache KV do trecho
+inicial que não mudou desde a requisição anterior, e as requisições levam o
+``keep_alive`` de :data:`hermes.config.config.OLLAMA_KEEP_ALIVE` para que o
+modelo não seja descarregado entre uma pergunta e outra. As contagens e os
+tempos informados pelo servidor voltam em ``metricas``.
+"""
+
+import asyncio
+import json
 import logging
+import threading
+from contextlib import closing, contextmanager
 from json import JSONDecodeError
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
 
 from ..config import config
+from .llm_cache import LLMCache, cache_key
 
 logger = logging.getLogger(__name__)
 
 
+# Status HTTP que disparam nova tentativa.
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+FRIENDLY_MESSAGE = (
+    "Não consegui falar com o modelo de linguagem. Verifique se o servidor"
+    " está rodando em localhost:11434 e tente novamente."
+)
+
+
 class LLMError(RuntimeError):
     """Erro de comunicação com o modelo de linguagem."""
 
@@ -17,11 +40,394 @@ class LLMError(RuntimeError):
         self.code = code
 
 
+class LLMClient:
+    """Sessão HTTP reutilizável para falar com o servidor LLM.
+
+    Mantém uma única ``requests.Session`` com pool de conexões keep-alive e a
+    política de retentativas, de modo que prompts consecutivos reaproveitam a
+    mesma conexão TCP em vez de abrir uma nova a cada chamada.
+
+    Parameters
+    ----------
+    max_retries: int | None, optional
+        Número máximo de retentativas. Se ``None``, usa
+        :data:`hermes.config.config.MAX_RETRIES`.
+    backoff_factor: float | None, optional
+        Fator de espera entre retentativas. Se ``None``, usa o valor de
+        :mod:`hermes.config`.
+    pool_size: int | None, optional
+        Conexões mantidas abertas por host. Se ``None``, usa
+        :data:`hermes.config.config.LLM_POOL_SIZE`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_retries: int | None = None,
+        backoff_factor: float | None = None,
+        pool_size: int | None = None,
+    ) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=config.MAX_RETRIES if max_retries is None else max_retries,
+            backoff_factor=(
+                config.BACKOFF_FACTOR if backoff_factor is None else backoff_factor
+            ),
+            status_forcelist=list(RETRY_STATUS),
+            allowed_methods=("POST",),
+        )
+        pool_size = max(1, pool_size or config.LLM_POOL_SIZE)
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        *,
+        stream: bool = False,
+    ) -> Any:
+        """Envia ``payload`` como JSON para ``url`` usando a sessão compartilhada.
+
+        Com ``stream=True`` o corpo da resposta é lido sob demanda.
+        """
+
+        return self.session.post(url, json=payload, timeout=timeout, stream=stream)
+
+    def close(self) -> None:
+        """Fecha as conexões abertas da sessão."""
+
+        self.session.close()
+
+
+_client: LLMClient | None = None
+_client_key: tuple | None = None
+_client_lock = threading.Lock()
+
+
+def _client_config() -> tuple:
+    """Valores de configuração dos quais o cliente compartilhado depende."""
+
+    return (
+        config.OLLAMA_URL,
+        config.TIMEOUT,
+        config.MAX_RETRIES,
+        config.BACKOFF_FACTOR,
+        config.LLM_POOL_SIZE,
+    )
+
+
+def get_client() -> LLMClient:
+    """Retorna o :class:`LLMClient` compartilhado do processo.
+
+    O cliente é criado na primeira chamada e recriado quando a configuração
+    relevante muda (por exemplo, após :func:`hermes.config.load_from_args`).
+    """
+
+    global _client, _client_key
+
+    key = _client_config()
+    with _client_lock:
+        if _client is None or _client_key != key:
+            if _client is not None:
+                # Não fecha a sessão antiga: outra thread pode estar usando-a.
+                logger.debug("Configuração do LLM mudou; recriando sessão HTTP")
+            _client = LLMClient()
+            _client_key = key
+        return _client
+
+
+def reset_client() -> None:
+    """Descarta o cliente compartilhado, fechando suas conexões."""
+
+    global _client, _client_key
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _client_key = None
+
+
+class AsyncLLMClient:
+    """Versão assíncrona de :class:`LLMClient`, baseada em ``httpx``.
+
+    Mantém um ``httpx.AsyncClient`` com pool de conexões keep-alive, de modo
+    que muitas requisições simultâneas aguardam o LLM sem ocupar uma thread
+    cada. Falhas de conexão e os status de :data:`RETRY_STATUS` são repetidos
+    com espera exponencial, como na política de :class:`LLMClient`. Os
+    parâmetros são os mesmos de :class:`LLMClient`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_retries: int | None = None,
+        backoff_factor: float | None = None,
+        pool_size: int | None = None,
+    ) -> None:
+        import httpx
+
+        self.max_retries = config.MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_factor = (
+            config.BACKOFF_FACTOR if backoff_factor is None else backoff_factor
+        )
+        pool_size = max(1, pool_size or config.LLM_POOL_SIZE)
+        limits = httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        )
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=self.max_retries)
+        self.client = httpx.AsyncClient(transport=transport)
+
+    async def post(self, url: str, payload: Dict[str, Any], timeout: float) -> Any:
+        """Envia ``payload`` como JSON para ``url``, repetindo falhas temporárias."""
+
+        tentativa = 0
+        while True:
+            response = await self.client.post(url, json=payload, timeout=timeout)
+            if (
+                response.status_code not in RETRY_STATUS
+                or tentativa >= self.max_retries
+            ):
+                return response
+            await asyncio.sleep(self.backoff_factor * (2**tentativa))
+            tentativa += 1
+
+    async def aclose(self) -> None:
+        """Fecha as conexões abertas do cliente."""
+
+        await self.client.aclose()
+
+
+_async_client: AsyncLLMClient | None = None
+_async_client_key: tuple | None = None
+
+
+def get_async_client() -> AsyncLLMClient:
+    """Retorna o :class:`AsyncLLMClient` compartilhado do *event loop* atual.
+
+    Deve ser chamado dentro de um *event loop*. O cliente é recriado quando a
+    configuração muda ou quando o loop é outro, já que conexões ``httpx`` não
+    podem ser compartilhadas entre loops.
+    """
+
+    global _async_client, _async_client_key
+
+    key = (id(asyncio.get_running_loop()), *_client_config())
+    if _async_client is None or _async_client_key != key:
+        _async_client = AsyncLLMClient()
+        _async_client_key = key
+    return _async_client
+
+
+async def aclose_async_client() -> None:
+    """Fecha e descarta o cliente assíncrono compartilhado."""
+
+    global _async_client, _async_client_key
+
+    client, _async_client, _async_client_key = _async_client, None, None
+    if client is not None:
+        await client.aclose()
+
+
+_cache: LLMCache | None = None
+_cache_config: tuple | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> LLMCache | None:
+    """Retorna o cache de respostas compartilhado, ou ``None`` se desativado.
+
+    O nível persistente fica em ``<DB_PATH>.llm-cache``; com banco em memória
+    apenas o nível em memória é usado. O cache é recriado quando a
+    configuração ou o caminho do banco mudam.
+    """
+
+    global _cache, _cache_config
+
+    if not config.LLM_CACHE_ENABLED:
+        return None
+
+    from . import db
+
+    path = None if db.DB_PATH == ":memory:" else f"{db.DB_PATH}.llm-cache"
+    key = (
+        path,
+        config.LLM_CACHE_TTL,
+        config.LLM_CACHE_MEMORY_SIZE,
+        config.LLM_CACHE_DISK_SIZE,
+    )
+    with _cache_lock:
+        if _cache is None or _cache_config != key:
+            _cache = LLMCache(
+                path,
+                ttl=config.LLM_CACHE_TTL,
+                max_entries=config.LLM_CACHE_MEMORY_SIZE,
+                max_rows=config.LLM_CACHE_DISK_SIZE,
+            )
+            _cache_config = key
+        return _cache
+
+
+def reset_cache() -> None:
+    """Descarta o cache compartilhado; o próximo uso cria um novo."""
+
+    global _cache, _cache_config
+
+    with _cache_lock:
+        _cache, _cache_config = None, None
+
+
+def cache_stats() -> Dict[str, int]:
+    """Contadores de acertos e falhas do cache (vazio se desativado)."""
+
+    cache = get_cache()
+    return cache.stats() if cache else {}
+
+
+def _cache_para(
+    use_cache: bool | None, model: str, prompt: str, url: str
+) -> tuple[LLMCache | None, str | None]:
+    """Retorna o cache a consultar e a chave do *prompt*, se aplicável."""
+
+    if use_cache is False:
+        return None, None
+    cache = get_cache()
+    if cache is None:
+        return None, None
+    return cache, cache_key(model, prompt, {"url": url})
+
+
+def _keep_alive() -> Dict[str, Any]:
+    """Campo ``keep_alive`` dos payloads, se configurado."""
+
+    valor = config.OLLAMA_KEEP_ALIVE.strip()
+    if not valor:
+        return {}
+    try:
+        # Números são segundos para o Ollama; negativos mantêm o modelo sempre.
+        return {"keep_alive": int(valor)}
+    except ValueError:
+        return {"keep_alive": valor}
+
+
+def _metricas(dados: Dict[str, Any]) -> Dict[str, float]:
+    """Contagens de tokens e tempos (em ms) informados pelo Ollama."""
+
+    metricas: Dict[str, float] = {}
+    for campo in ("prompt_eval_count", "eval_count"):
+        if campo in dados:
+            metricas[campo] = dados[campo]
+    for campo in ("load", "prompt_eval", "eval", "total"):
+        if f"{campo}_duration" in dados:
+            metricas[f"{campo}_ms"] = dados[f"{campo}_duration"] / 1e6
+    return metricas
+
+
+def _texto(dados: Dict[str, Any]) -> str | None:
+    """Texto gerado, em ``/api/generate`` ou em ``/api/chat``."""
+
+    if "message" in dados:
+        return (dados["message"] or {}).get("content")
+    return dados.get("response")
+
+
+def _chave_mensagens(mensagens: list[Dict[str, str]]) -> str:
+    return json.dumps(mensagens, ensure_ascii=False, sort_keys=True)
+
+
+def _postar(
+    url: str,
+    payload: Dict[str, Any],
+    timeout: float,
+    client: LLMClient | None,
+    cache: LLMCache | None,
+    chave: str | None,
+) -> Dict[str, Any]:
+    """Faz uma requisição sem *stream*, consultando e alimentando o cache."""
+
+    if cache is not None:
+        em_cache = cache.get(chave)
+        if em_cache is not None:
+            return {"ok": True, "response": em_cache, "metricas": {}}
+
+    client = client or get_client()
+
+    with _traduzir_erros():
+        response = client.post(url, {**payload, **_keep_alive()}, timeout)
+        response.raise_for_status()
+        dados = response.json()
+        resposta = _texto(dados)
+        if resposta is None:
+            raise LLMError("Sem resposta do modelo", code="missing_response")
+
+    resposta = resposta.strip()
+    if cache is not None:
+        cache.set(chave, payload["model"], resposta)
+    return {"ok": True, "response": resposta, "metricas": _metricas(dados)}
+
+
+def _fluxo(
+    url: str,
+    payload: Dict[str, Any],
+    timeout: float,
+    client: LLMClient | None,
+    cache: LLMCache | None,
+    chave: str | None,
+    metricas: Dict[str, float] | None,
+) -> Iterator[str]:
+    """Lê a resposta NDJSON de uma requisição com ``"stream": true``."""
+
+    if cache is not None:
+        em_cache = cache.get(chave)
+        if em_cache is not None:
+            yield em_cache
+            return
+
+    client = client or get_client()
+    partes: list[str] = []
+
+    with _traduzir_erros():
+        response = client.post(
+            url, {**payload, "stream": True, **_keep_alive()}, timeout, stream=True
+        )
+        with closing(response):
+            response.raise_for_status()
+            for linha in response.iter_lines():
+                if not linha:
+                    continue
+                dados = json.loads(linha)
+                if dados.get("error"):
+                    raise LLMError(str(dados["error"]), code="model_error")
+                fragmento = _texto(dados)
+                if fragmento:
+                    partes.append(fragmento)
+                    yield fragmento
+                if dados.get("done"):
+                    if metricas is not None:
+                        metricas.update(_metricas(dados))
+                    break
+
+    if cache is not None and partes:
+        cache.set(chave, payload["model"], "".join(partes).strip())
+
+
 def gerar_resposta(
     prompt: str,
     url: str | None = None,
     model: str | None = None,
     timeout: int | None = None,
+    *,
+    client: LLMClient | None = None,
+    use_cache: bool | None = None,
 ) -> Dict[str, Any]:
     """Envia um *prompt* ao servidor LLM e retorna a resposta.
 
@@ -38,55 +444,213 @@ def gerar_resposta(
     timeout: int | None, optional
         Tempo máximo (em segundos) de espera pela resposta. Se ``None``, usa o
         valor de :mod:`hermes.config`.
+    client: LLMClient | None, optional
+        Cliente HTTP a ser usado. Se ``None``, usa o cliente compartilhado
+        retornado por :func:`get_client`.
+    use_cache: bool | None, optional
+        ``False`` ignora o cache de respostas nesta chamada (sem leitura nem
+        gravação). Com ``None`` o cache é usado se estiver ativado em
+        :data:`hermes.config.config.LLM_CACHE_ENABLED`.
+
+    O retorno traz ``ok``, ``response`` e ``metricas`` (vazio quando a
+    resposta vem do cache).
     """
 
     url = url or f"{config.OLLAMA_URL}/api/generate"
     model = model or config.OLLAMA_MODEL
     timeout = timeout or config.TIMEOUT
 
+    cache, chave = _cache_para(use_cache, model, prompt, url)
+    return _postar(
+        url,
+        {"model": model, "prompt": prompt, "stream": False},
+        timeout,
+        client,
+        cache,
+        chave,
+    )
+
+
+def conversar(
+    mensagens: list[Dict[str, str]],
+    url: str | None = None,
+    model: str | None = None,
+    timeout: int | None = None,
+    *,
+    client: LLMClient | None = None,
+    use_cache: bool | None = None,
+) -> Dict[str, Any]:
+    """Envia uma conversa ao endpoint ``/api/chat`` e retorna a resposta.
+
+    ``mensagens`` é a lista de mensagens (``role`` e ``content``), da
+    mensagem de sistema até a pergunta atual. Se o início da lista for igual
+    ao da chamada anterior, o servidor não precisa reprocessá-lo. ``url``
+    padrão: ``<OLLAMA_URL>/api/chat``. Os demais parâmetros, o retorno e os
+    erros são os mesmos de :func:`gerar_resposta`.
+    """
+
+    url = url or f"{config.OLLAMA_URL}/api/chat"
+    model = model or config.OLLAMA_MODEL
+    timeout = timeout or config.TIMEOUT
+
+    cache, chave = _cache_para(use_cache, model, _chave_mensagens(mensagens), url)
+    return _postar(
+        url,
+        {"model": model, "messages": list(mensagens), "stream": False},
+        timeout,
+        client,
+        cache,
+        chave,
+    )
+
+
+@contextmanager
+def _traduzir_erros() -> Iterator[None]:
+    """Converte falhas de rede e de formato em :class:`LLMError`."""
+
     import requests
-    from requests.adapters import HTTPAdapter
-    from urllib3.util.retry import Retry
-
-    session = requests.Session()
-    retry = Retry(
-        total=config.MAX_RETRIES,
-        backoff_factor=config.BACKOFF_FACTOR,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=("POST",),
+
+    try:
+        yield
+    except requests.exceptions.Timeout as exc:
+        logger.exception("Servidor LLM não respondeu a tempo: %s", exc)
+        raise LLMError(FRIENDLY_MESSAGE, code="Timeout") from exc
+    except requests.exceptions.ConnectionError as exc:
+        logger.exception("Servidor LLM offline: %s", exc)
+        raise LLMError(FRIENDLY_MESSAGE, code="ConnectionError") from exc
+    except requests.exceptions.RequestException as exc:
+        logger.exception("Erro ao comunicar com o servidor LLM: %s", exc)
+        raise LLMError(FRIENDLY_MESSAGE, code=exc.__class__.__name__) from exc
+    except JSONDecodeError as exc:
+        logger.exception("Resposta inválida do servidor LLM: %s", exc)
+        raise LLMError("Resposta inválida do servidor LLM", code="JSONDecodeError") from exc
+
+
+def gerar_resposta_stream(
+    prompt: str,
+    url: str | None = None,
+    model: str | None = None,
+    timeout: int | None = None,
+    *,
+    client: LLMClient | None = None,
+    use_cache: bool | None = None,
+    metricas: Dict[str, float] | None = None,
+) -> Iterator[str]:
+    """Envia um *prompt* ao servidor LLM e gera a resposta em pedaços.
+
+    Usa ``"stream": true`` do Ollama e interpreta as linhas NDJSON à medida
+    que chegam, produzindo cada fragmento de texto assim que ele é gerado.
+    Os parâmetros são os mesmos de :func:`gerar_resposta`; falhas de
+    comunicação levantam :class:`LLMError`, inclusive no meio do fluxo. Uma
+    resposta em cache é produzida de uma só vez; respostas completas são
+    gravadas no cache ao final do fluxo. Se ``metricas`` for informado, ele
+    recebe as métricas do servidor quando a geração termina.
+    """
+
+    url = url or f"{config.OLLAMA_URL}/api/generate"
+    model = model or config.OLLAMA_MODEL
+    timeout = timeout or config.TIMEOUT
+
+    cache, chave = _cache_para(use_cache, model, prompt, url)
+    yield from _fluxo(
+        url,
+        {"model": model, "prompt": prompt},
+        timeout,
+        client,
+        cache,
+        chave,
+        metricas,
     )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
 
-    friendly_message = (
-        "Não consegui falar com o modelo de linguagem. Verifique se o servidor"
-        " está rodando em localhost:11434 e tente novamente."
+
+def conversar_stream(
+    mensagens: list[Dict[str, str]],
+    url: str | None = None,
+    model: str | None = None,
+    timeout: int | None = None,
+    *,
+    client: LLMClient | None = None,
+    use_cache: bool | None = None,
+    metricas: Dict[str, float] | None = None,
+) -> Iterator[str]:
+    """Versão em fluxo de :func:`conversar`.
+
+    Os parâmetros e o comportamento são os de :func:`gerar_resposta_stream`.
+    """
+
+    url = url or f"{config.OLLAMA_URL}/api/chat"
+    model = model or config.OLLAMA_MODEL
+    timeout = timeout or config.TIMEOUT
+
+    cache, chave = _cache_para(use_cache, model, _chave_mensagens(mensagens), url)
+    yield from _fluxo(
+        url,
+        {"model": model, "messages": list(mensagens)},
+        timeout,
+        client,
+        cache,
+        chave,
+        metricas,
     )
 
+
+async def gerar_resposta_async(
+    prompt: str,
+    url: str | None = None,
+    model: str | None = None,
+    timeout: int | None = None,
+    *,
+    client: AsyncLLMClient | None = None,
+    use_cache: bool | None = None,
+) -> Dict[str, Any]:
+    """Versão assíncrona de :func:`gerar_resposta`.
+
+    Aguarda o LLM sem bloquear o *event loop*, usando o cliente retornado por
+    :func:`get_async_client` quando ``client`` não é informado. Os demais
+    parâmetros, o retorno e os erros são os mesmos de :func:`gerar_resposta`.
+    """
+
+    import httpx
+
+    url = url or f"{config.OLLAMA_URL}/api/generate"
+    model = model or config.OLLAMA_MODEL
+    timeout = timeout or config.TIMEOUT
+
+    cache, chave = _cache_para(use_cache, model, prompt, url)
+    if cache is not None:
+        # O nível SQLite do cache é bloqueante; consulta fora do event loop.
+        em_cache = await asyncio.to_thread(cache.get, chave)
+        if em_cache is not None:
+            return {"ok": True, "response": em_cache, "metricas": {}}
+
+    client = client or get_async_client()
+
     try:
-        response = session.post(
+        response = await client.post(
             url,
-            json={"model": model, "prompt": prompt, "stream": False},
-            timeout=timeout,
+            {"model": model, "prompt": prompt, "stream": False, **_keep_alive()},
+            timeout,
         )
         response.raise_for_status()
         dados = response.json()
-        resposta = dados.get("response")
-        if resposta is None:
-            raise LLMError("Sem resposta do modelo", code="missing_response")
-        return {"ok": True, "response": resposta.strip()}
-    except requests.exceptions.Timeout as exc:
+    except httpx.TimeoutException as exc:
         logger.exception("Servidor LLM não respondeu a tempo: %s", exc)
-        raise LLMError(friendly_message, code="Timeout") from exc
-    except requests.exceptions.ConnectionError as exc:
+        raise LLMError(FRIENDLY_MESSAGE, code="Timeout") from exc
+    except httpx.TransportError as exc:
         logger.exception("Servidor LLM offline: %s", exc)
-        raise LLMError(friendly_message, code="ConnectionError") from exc
-    except requests.exceptions.RequestException as exc:
+        raise LLMError(FRIENDLY_MESSAGE, code="ConnectionError") from exc
+    except httpx.HTTPError as exc:
         logger.exception("Erro ao comunicar com o servidor LLM: %s", exc)
-        raise LLMError(friendly_message, code=exc.__class__.__name__) from exc
+        raise LLMError(FRIENDLY_MESSAGE, code=exc.__class__.__name__) from exc
     except JSONDecodeError as exc:
         logger.exception("Resposta inválida do servidor LLM: %s", exc)
         raise LLMError("Resposta inválida do servidor LLM", code="JSONDecodeError") from exc
-    finally:
-        session.close()
+
+    resposta = dados.get("response")
+    if resposta is None:
+        raise LLMError("Sem resposta do modelo", code="missing_response")
+
+    resposta = resposta.strip()
+    if cache is not None:
+        await asyncio.to_thread(cache.set, chave, model, resposta)
+    return {"ok": True, "response": resposta, "metricas": _metricas(dados)}
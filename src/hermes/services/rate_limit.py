@@ -0,0 +1,231 @@
+"""Token-bucket rate limiting for the HTTP API.
+
+Each client key owns a bucket of ``capacity`` tokens that refills continuously
+at ``rate`` tokens per second; a request spends one token and is rejected when
+the bucket is empty. Unlike a fixed window this never admits more than
+``capacity`` requests in a burst, and checking a request is O(1): only the
+bucket's token count and last update time are stored.
+
+Two backends are available:
+
+* :class:`MemoryRateLimiter` keeps buckets in process memory and evicts idle
+  ones, so memory is bounded by the number of recently active clients.
+* :class:`SQLiteRateLimiter` keeps buckets in a small SQLite file, letting
+  several API worker processes enforce one shared limit.
+
+:func:`get_limiter` builds the backend selected in :mod:`hermes.config`.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from ..config import config
+from .connection import connections
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rate_limits_updated ON rate_limits (updated);
+"""
+
+# Idle buckets are swept at most this often (seconds).
+SWEEP_INTERVAL = 60.0
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of :meth:`RateLimiter.hit`."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until a token is available; 0 when allowed
+
+
+class RateLimiter(ABC):
+    """Base class holding the token-bucket arithmetic.
+
+    Parameters
+    ----------
+    rate:
+        Tokens added per second.
+    capacity:
+        Bucket size, i.e. the largest burst admitted.
+    """
+
+    #: Whether :meth:`hit` may block on I/O (callers in an event loop should
+    #: then run it in a thread).
+    blocking = False
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        # A bucket idle this long has refilled completely and can be dropped.
+        self.idle_after = self.capacity / rate if rate > 0 else float("inf")
+
+    def _consume(self, tokens: float, updated: float, now: float) -> tuple[float, bool]:
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, True
+        return tokens, False
+
+    def _result(self, tokens: float, allowed: bool) -> RateLimitResult:
+        if allowed:
+            retry_after = 0.0
+        else:
+            retry_after = (1 - tokens) / self.rate if self.rate > 0 else float("inf")
+        return RateLimitResult(allowed, self.capacity, int(tokens), retry_after)
+
+    @abstractmethod
+    def hit(self, key: str, now: float | None = None) -> RateLimitResult:
+        """Spend one token from ``key``'s bucket."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Forget every bucket."""
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Buckets kept in process memory, least recently used first."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        super().__init__(rate, capacity)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, now: float | None = None) -> RateLimitResult:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens, allowed = self._consume(tokens, updated, now)
+            self._buckets[key] = (tokens, now)
+            self._evict_idle(now)
+        return self._result(tokens, allowed)
+
+    def _evict_idle(self, now: float) -> None:
+        # Buckets are ordered by last use, so idle ones sit at the front and
+        # each is removed exactly once: amortised O(1) per request.
+        while self._buckets:
+            key, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < self.idle_after:
+                break
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """Buckets stored in a SQLite file shared by every API process."""
+
+    blocking = True
+
+    def __init__(self, rate: float, capacity: int, db_path: str) -> None:
+        super().__init__(rate, capacity)
+        self.db_path = db_path
+        self._next_sweep = 0.0
+        self._schema_ready = False
+
+    def _conn(self):
+        conn = connections.get(self.db_path)
+        if not self._schema_ready:
+            with conn:
+                conn.executescript(SCHEMA_SQL)
+            self._schema_ready = True
+        return conn
+
+    def hit(self, key: str, now: float | None = None) -> RateLimitResult:
+        # Wall-clock time: the value is compared across processes.
+        now = time.time() if now is None else now
+        conn = self._conn()
+        with conn:
+            # Take the write lock up front so concurrent workers serialise on
+            # the read-modify-write of the bucket.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = (row[0], row[1]) if row else (self.capacity, now)
+            tokens, allowed = self._consume(tokens, updated, now)
+            conn.execute(
+                "INSERT INTO rate_limits (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, "
+                "updated = excluded.updated",
+                (key, tokens, now),
+            )
+            if now >= self._next_sweep:
+                self._next_sweep = now + SWEEP_INTERVAL
+                conn.execute(
+                    "DELETE FROM rate_limits WHERE updated < ?",
+                    (now - self.idle_after,),
+                )
+        return self._result(tokens, allowed)
+
+    def reset(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM rate_limits")
+
+
+_limiter: RateLimiter | None = None
+_limiter_config: tuple | None = None
+_lock = threading.Lock()
+
+
+def _limiter_settings() -> tuple:
+    from . import db
+
+    path = config.RATE_LIMIT_DB_PATH or f"{db.DB_PATH}.ratelimit"
+    return (
+        config.RATE_LIMIT_BACKEND,
+        config.RATE_LIMIT_PER_MINUTE,
+        config.RATE_LIMIT_BURST,
+        path,
+    )
+
+
+def get_limiter() -> RateLimiter:
+    """Return the shared limiter, rebuilding it when the configuration changes."""
+
+    global _limiter, _limiter_config
+
+    settings = _limiter_settings()
+    with _lock:
+        if _limiter is None or settings != _limiter_config:
+            backend, per_minute, burst, path = settings
+            rate = per_minute / 60
+            capacity = burst or per_minute
+            if backend == "sqlite":
+                _limiter = SQLiteRateLimiter(rate, capacity, path)
+            else:
+                if backend != "memory":
+                    logger.warning(
+                        "Unknown rate limit backend %r; using memory", backend
+                    )
+                _limiter = MemoryRateLimiter(rate, capacity)
+            _limiter_config = settings
+        return _limiter
+
+
+__all__ = [
+    "MemoryRateLimiter",
+    "RateLimitResult",
+    "RateLimiter",
+    "SQLiteRateLimiter",
+    "get_limiter",
+]
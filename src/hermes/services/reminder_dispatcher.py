@@ -0,0 +1,168 @@
+"""Built-in reminder dispatcher, a lightweight alternative to APScheduler.
+
+Reminders are one-shot jobs, so a single thread and a min-heap of
+``(trigger_at, id)`` are enough to fire them. Only reminders due within the
+next ``window`` are kept in memory; the window is reloaded from the database
+as time advances, so memory does not grow with reminders scheduled far ahead.
+New reminders inside the window are pushed with :meth:`ReminderDispatcher.add`,
+which wakes the thread through a condition variable.
+
+Times are naive UTC, like ``reminders.trigger_at``. The thread never sleeps
+longer than :data:`MAX_SLEEP`, so a jump of the wall clock is noticed quickly;
+reminders that became overdue (after a jump forward or a downtime) are handed
+to the ``fire`` callback together, in one batch.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Longest sleep (seconds) between two looks at the wall clock.
+MAX_SLEEP = 30.0
+
+Loader = Callable[[str], list[dict]]
+Firer = Callable[[list[dict]], None]
+
+
+class ReminderDispatcher(threading.Thread):
+    """Fire pending reminders from an in-memory heap.
+
+    Parameters
+    ----------
+    load:
+        Called with an ISO timestamp; returns the pending reminders due before
+        it (e.g. :func:`hermes.services.db.list_pending_reminders`).
+    fire:
+        Called with the list of reminders that are due. It is responsible for
+        marking them as triggered.
+    window:
+        How far ahead reminders are loaded into memory.
+    """
+
+    def __init__(self, load: Loader, fire: Firer, *, window: timedelta) -> None:
+        super().__init__(name="hermes-reminders", daemon=True)
+        self._load = load
+        self._fire = fire
+        self.window = window
+        self._heap: list[tuple[datetime, int, dict]] = []
+        self._queued: set[int] = set()
+        self._horizon: datetime | None = None
+        self._cond = threading.Condition()
+        self._stopping = False
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.utcnow()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _push(self, reminder: dict) -> None:
+        # Caller holds ``self._cond``.
+        if reminder["id"] in self._queued:
+            return
+        trigger_at = datetime.fromisoformat(reminder["trigger_at"])
+        heapq.heappush(self._heap, (trigger_at, reminder["id"], reminder))
+        self._queued.add(reminder["id"])
+
+    def add(self, reminder: dict) -> None:
+        """Schedule ``reminder`` if it falls inside the loaded window.
+
+        Reminders beyond the window are left to the database and loaded when
+        the window reaches them.
+        """
+
+        trigger_at = datetime.fromisoformat(reminder["trigger_at"])
+        with self._cond:
+            if self._horizon is None or trigger_at >= self._horizon:
+                return
+            self._push(reminder)
+            self._cond.notify()
+
+    def _load_until(self, horizon: datetime) -> None:
+        reminders = self._load(horizon.isoformat())
+        with self._cond:
+            for reminder in reminders:
+                self._push(reminder)
+            self._cond.notify()
+
+    def refresh(self) -> None:
+        """Reload the current window, e.g. to see reminders of other processes."""
+
+        with self._cond:
+            horizon = self._horizon
+        if horizon is not None:
+            self._load_until(horizon)
+
+    def _advance(self, now: datetime) -> None:
+        horizon = now + self.window
+        # Publish the horizon before querying, so that reminders added while
+        # the query runs are pushed by :meth:`add` rather than lost.
+        with self._cond:
+            self._horizon = horizon
+        self._load_until(horizon)
+        logger.debug("Loaded reminders due before %s", horizon.isoformat())
+
+    def _pop_due(self, now: datetime) -> list[dict]:
+        # Caller holds ``self._cond``.
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, reminder_id, reminder = heapq.heappop(self._heap)
+            self._queued.discard(reminder_id)
+            due.append(reminder)
+        return due
+
+    def run(self) -> None:
+        while True:
+            now = self._now()
+            with self._cond:
+                if self._stopping:
+                    return
+                horizon = self._horizon
+            # Keep at least half a window loaded ahead of the clock.
+            if horizon is None or now + self.window / 2 >= horizon:
+                try:
+                    self._advance(now)
+                except Exception:
+                    logger.exception("Could not load pending reminders")
+                    with self._cond:
+                        self._horizon = None  # retry after the next sleep
+
+            with self._cond:
+                due = self._pop_due(self._now())
+                if not due:
+                    timeout = MAX_SLEEP
+                    if self._heap:
+                        until_next = (self._heap[0][0] - self._now()).total_seconds()
+                        timeout = min(timeout, max(0.0, until_next))
+                    if not self._stopping:
+                        self._cond.wait(timeout)
+                    continue
+
+            if len(due) > 1:
+                logger.info("Firing %d reminders in one batch", len(due))
+            try:
+                self._fire(due)
+            except Exception:
+                # Still pending in the database: the next window reload
+                # schedules them again.
+                logger.exception("Could not fire %d reminder(s)", len(due))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the dispatcher thread (same signature as APScheduler's)."""
+
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if wait and self.is_alive():
+            self.join()
+
+
+__all__ = ["MAX_SLEEP", "ReminderDispatcher"]
@@ -1,39 +1,86 @@
+"""Reminder scheduling.
+
+Reminders are fired by APScheduler or, with ``REMINDER_BACKEND = "heap"``, by
+the lighter :class:`~hermes.services.reminder_dispatcher.ReminderDispatcher`,
+which only keeps the next ``REMINDER_WINDOW_HOURS`` of reminders in memory.
+
+A single process must run the scheduler, otherwise each reminder fires once
+per process. The desktop app simply calls :func:`start_scheduler`; the API,
+which may run in several workers, calls :func:`start_leader_election` so that
+only the process holding the ``reminder-scheduler`` lease schedules reminders.
+"""
+
 from __future__ import annotations
 
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
-from .db import list_reminders, list_users, mark_triggered
+from ..config import config
+from . import tts
+from .db import list_pending_reminders, mark_triggered, mark_triggered_many
+from .leader import LeaderElection
+from .reminder_dispatcher import ReminderDispatcher
 
 logger = logging.getLogger(__name__)
 
-_scheduler: BackgroundScheduler | None = None
+LEASE_NAME = "reminder-scheduler"
 
+_scheduler: BackgroundScheduler | ReminderDispatcher | None = None
+_election: LeaderElection | None = None
+# Highest reminder id already handed to the scheduler, so that periodic reloads
+# only fetch reminders created since (e.g. by another API worker).
+_last_loaded_id = 0
 
-def _alert(message: str) -> None:
-    """Notify the user about a triggered reminder."""
-    try:
-        import pyttsx3
 
-        engine = pyttsx3.init()
-        engine.say(message)
-        engine.runAndWait()
-    except Exception:  # pragma: no cover - best effort
-        logger.info("Reminder: %s", message)
+def _alert(message: str) -> None:
+    """Notify the user about a triggered reminder without blocking."""
+    logger.info("Reminder: %s", message)
+    tts.speak(message, tts.PRIORITY_ALERT)
 
 
 def _run_reminder(reminder_id: int, message: str) -> None:
     """Mark reminder as triggered and alert the user."""
-    mark_triggered(reminder_id)
-    _alert(message)
+    # Schedulers of an old and a new leader may overlap briefly during a
+    # failover; only the one that marks the reminder alerts.
+    if mark_triggered(reminder_id, only_pending=True):
+        _alert(message)
+
+
+def _run_reminders(reminders: list[dict]) -> None:
+    """Mark due reminders as triggered in one batch and alert the user."""
+    fired = set(mark_triggered_many(r["id"] for r in reminders))
+    for reminder in reminders:
+        if reminder["id"] in fired:
+            _alert(reminder["message"])
 
 
-def _schedule_reminder(reminder: dict) -> None:
+def _load_window(before: str) -> list[dict]:
+    return list_pending_reminders(before=before)
+
+
+def _run_date(trigger_at: str) -> datetime:
+    """Aware UTC datetime for a stored ``trigger_at``.
+
+    Stored timestamps are naive UTC (see
+    :func:`hermes.data.migrate.normalize_timestamp`), while APScheduler reads
+    naive run dates in the host's local timezone.
+    """
+    run_date = datetime.fromisoformat(trigger_at)
+    if run_date.tzinfo is None:
+        return run_date.replace(tzinfo=timezone.utc)
+    return run_date.astimezone(timezone.utc)
+
+
+def schedule_reminder(reminder: dict) -> None:
+    """Add a single reminder to the running scheduler (no-op when stopped)."""
     if _scheduler is None:
         return
-    run_date = datetime.fromisoformat(reminder["trigger_at"])
+    if isinstance(_scheduler, ReminderDispatcher):
+        _scheduler.add(reminder)
+        return
+    run_date = _run_date(reminder["trigger_at"])
     _scheduler.add_job(
         _run_reminder,
         "date",
@@ -45,20 +92,91 @@ def _schedule_reminder(reminder: dict) -> None:
 
 
 def load_pending_reminders() -> None:
-    """Fetch pending reminders from the database and schedule them."""
+    """Fetch all pending reminders with one query and schedule them."""
+    global _last_loaded_id
     if _scheduler is None:
         return
-    for user in list_users():
-        for reminder in list_reminders(user["id"], only_pending=True):
-            _schedule_reminder(reminder)
+    if isinstance(_scheduler, ReminderDispatcher):
+        _scheduler.refresh()
+        return
+    reminders = list_pending_reminders()
+    for reminder in reminders:
+        schedule_reminder(reminder)
+    _last_loaded_id = max((r["id"] for r in reminders), default=_last_loaded_id)
 
 
-def start_scheduler() -> BackgroundScheduler:
+def load_new_reminders() -> None:
+    """Schedule pending reminders created since the last load."""
+    global _last_loaded_id
+    if _scheduler is None:
+        return
+    if isinstance(_scheduler, ReminderDispatcher):
+        # Only the loaded window matters; later reminders come from the
+        # database when the window reaches them.
+        _scheduler.refresh()
+        return
+    for reminder in list_pending_reminders(after_id=_last_loaded_id):
+        schedule_reminder(reminder)
+        _last_loaded_id = max(_last_loaded_id, reminder["id"])
+
+
+def start_scheduler() -> BackgroundScheduler | ReminderDispatcher:
     """Start the reminder scheduler and load pending reminders."""
     global _scheduler
     if _scheduler is not None:
         return _scheduler
+    if config.REMINDER_BACKEND == "heap":
+        # The dispatcher loads its first window itself.
+        _scheduler = ReminderDispatcher(
+            _load_window,
+            _run_reminders,
+            window=timedelta(hours=config.REMINDER_WINDOW_HOURS),
+        )
+        _scheduler.start()
+        return _scheduler
+    if config.REMINDER_BACKEND != "apscheduler":
+        logger.warning(
+            "Unknown reminder backend %r; using apscheduler", config.REMINDER_BACKEND
+        )
     _scheduler = BackgroundScheduler()
     _scheduler.start()
     load_pending_reminders()
     return _scheduler
+
+
+def stop_scheduler() -> None:
+    """Shut down the scheduler started by :func:`start_scheduler`, if any."""
+    global _scheduler
+    scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+
+
+def start_leader_election(ttl: float | None = None) -> LeaderElection:
+    """Run the scheduler only while this process holds the scheduler lease.
+
+    The lease is renewed every ``ttl / 3`` seconds (default
+    ``SCHEDULER_LEASE_TTL``). On each renewal the leader schedules the
+    reminders created since, including those of other processes. If the leader
+    dies, another process takes over once its lease expires.
+    """
+    global _election
+    if _election is not None:
+        return _election
+    _election = LeaderElection(
+        LEASE_NAME,
+        config.SCHEDULER_LEASE_TTL if ttl is None else ttl,
+        on_elected=start_scheduler,
+        on_renewed=load_new_reminders,
+        on_lost=stop_scheduler,
+    )
+    _election.start()
+    return _election
+
+
+def stop_leader_election() -> None:
+    """Stop competing for the lease, handing leadership to another process."""
+    global _election
+    election, _election = _election, None
+    if election is not None:
+        election.stop()
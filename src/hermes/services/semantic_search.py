@@ -6,15 +6,48 @@ The default implementation relies on scikit-learn's TF-IDF vectorizer, but
 alternative backends such as `FAISS <https://github.com/facebookresearch/faiss>`_
 or `Chroma <https://github.com/chroma-core/chroma>`_ can be integrated by
 providing another ``VectorIndex`` implementation.
+
+When no custom backend is given, each user gets a persistent
+:class:`TfidfVectorIndex` stored next to the SQLite database. The index is
+kept up to date incrementally through :func:`hermes.services.db.add_idea_listener`
+and validated against the per-user change counter returned by
+:func:`hermes.services.db.get_idea_version`, so a query costs a single
+``transform`` plus a similarity lookup instead of a full refit.
+
+Writes only touch indexes already in memory and never wait on disk: changed
+indexes are saved :data:`SAVE_DELAY` seconds later, by :func:`save_indexes`,
+and again when the interpreter exits.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import atexit
+import copy
+import logging
+import os
+import pickle
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
 from typing import Iterable, List, Protocol, Tuple
 
+from . import db
 from .db import search_ideas
 
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout of persisted indexes changes.
+INDEX_FORMAT = 1
+
+# Incremental updates reuse the fitted vocabulary, so terms that only appear in
+# new ideas are ignored until the next full fit. Refit once the number of
+# changes exceeds this fraction of the corpus (or the minimum below).
+REFIT_RATIO = 0.2
+REFIT_MIN_CHANGES = 20
+
+# Seconds between the first unsaved change to an index and writing it to disk.
+SAVE_DELAY = 5.0
+
 
 def _criar_vectorizer():
     from sklearn.feature_extraction.text import TfidfVectorizer
@@ -61,6 +94,32 @@ class TfidfVectorIndex:
         self.matrix = self.vectorizer.fit_transform(list(documents))
         self.ids = list(ids)
 
+    def add(self, documents: Iterable[str], ids: Iterable[int]) -> None:
+        """Append ``documents`` using the already fitted vocabulary."""
+
+        documents = list(documents)
+        if not documents:
+            return
+        if self.matrix is None:
+            self.fit(documents, ids)
+            return
+
+        from scipy.sparse import vstack
+
+        novos = self.vectorizer.transform(documents)
+        self.matrix = vstack([self.matrix, novos], format="csr")
+        self.ids.extend(ids)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Drop the rows associated with ``ids`` from the index."""
+
+        remover = set(ids)
+        keep = [pos for pos, doc_id in enumerate(self.ids) if doc_id not in remover]
+        if len(keep) == len(self.ids):
+            return
+        self.matrix = self.matrix[keep] if keep else None
+        self.ids = [self.ids[pos] for pos in keep]
+
     def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
         if not query or self.matrix is None:
             return []
@@ -85,6 +144,213 @@ def _idea_to_text(idea: dict) -> str:
     return " ".join(parts)
 
 
+@dataclass
+class _UserIndex:
+    """Persisted index of a single user plus its bookkeeping."""
+
+    user_id: int
+    version: int
+    index: TfidfVectorIndex
+    changes: int = 0
+
+
+def _copy_index(index: TfidfVectorIndex) -> TfidfVectorIndex:
+    """Shallow copy that can be updated without touching ``index``.
+
+    ``add``/``remove`` rebind ``matrix`` and ``ids`` (``add`` also extends
+    ``ids`` in place), so only the id list needs its own copy; the fitted
+    vectorizer is shared, unless ``add`` would fit it on an empty index.
+    """
+
+    clone = copy.copy(index)
+    clone.ids = list(index.ids)
+    if index.matrix is None:
+        clone.vectorizer = _criar_vectorizer()
+    return clone
+
+
+_cache: dict[tuple[str, int], _UserIndex] = {}
+_lock = threading.RLock()
+# Cache keys whose entry changed since it was last saved, and the pending save.
+_dirty: set[tuple[str, int]] = set()
+_save_timer: threading.Timer | None = None
+# Serializes saves so an older snapshot never overwrites a newer one.
+_save_lock = threading.Lock()
+
+
+def _index_path(db_path: str, user_id: int) -> Path | None:
+    """Return where the index of ``user_id`` is persisted, if anywhere."""
+
+    if not db_path or db_path == ":memory:":
+        return None
+    return Path(f"{db_path}.semantic") / f"user-{user_id}.pkl"
+
+
+def _load(db_path: str, user_id: int) -> _UserIndex | None:
+    path = _index_path(db_path, user_id)
+    if path is None or not path.exists():
+        return None
+    try:
+        with path.open("rb") as fh:
+            payload = pickle.load(fh)
+    except Exception:
+        logger.warning("Discarding unreadable semantic index %s", path, exc_info=True)
+        return None
+    if not isinstance(payload, dict) or payload.get("format") != INDEX_FORMAT:
+        return None
+    return payload["entry"]
+
+
+def _save(db_path: str, entry: _UserIndex) -> None:
+    path = _index_path(db_path, entry.user_id)
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("wb") as fh:
+            pickle.dump({"format": INDEX_FORMAT, "entry": entry}, fh)
+        os.replace(tmp, path)
+    except OSError:
+        logger.warning("Could not persist semantic index %s", path, exc_info=True)
+
+
+def _forget(key: tuple[str, int]) -> None:
+    """Drop a cached index; the next query reloads or rebuilds it."""
+
+    _cache.pop(key, None)
+    _dirty.discard(key)
+
+
+def _mark_dirty(key: tuple[str, int]) -> None:
+    """Schedule ``key`` to be saved. Call with ``_lock`` held."""
+
+    global _save_timer
+    _dirty.add(key)
+    if _save_timer is None:
+        _save_timer = threading.Timer(SAVE_DELAY, save_indexes)
+        _save_timer.daemon = True
+        _save_timer.start()
+
+
+def save_indexes() -> None:
+    """Persist the in-memory indexes changed since they were last saved."""
+
+    global _save_timer
+    with _save_lock:
+        with _lock:
+            if _save_timer is not None:
+                _save_timer.cancel()
+                _save_timer = None
+            pending = [(key[0], _cache[key]) for key in _dirty if key in _cache]
+            _dirty.clear()
+        # Entries are replaced, never mutated, so they can be pickled unlocked.
+        for db_path, entry in pending:
+            _save(db_path, entry)
+
+
+atexit.register(save_indexes)
+
+
+def _build(db_path: str, user_id: int) -> _UserIndex:
+    """Fit a fresh index over every idea of ``user_id``."""
+
+    # Read the counter first: a concurrent write makes the index look stale
+    # (and triggers another rebuild) instead of silently missing the change.
+    version = db.get_idea_version(user_id)
+    ideas = search_ideas(user_id)
+    index = TfidfVectorIndex()
+    if ideas:
+        try:
+            index.fit(
+                [_idea_to_text(idea) for idea in ideas],
+                [idea["id"] for idea in ideas],
+            )
+        except ValueError:
+            # Raised by the vectorizer when no document contains a token.
+            logger.debug("No indexable terms for user %s", user_id)
+            index = TfidfVectorIndex()
+    return _UserIndex(user_id=user_id, version=version, index=index)
+
+
+def get_user_index(user_id: int) -> TfidfVectorIndex:
+    """Return an up-to-date TF-IDF index for ``user_id``.
+
+    The index is looked up in memory, then on disk, and rebuilt only when
+    missing or when its change counter no longer matches the database.
+
+    The returned index is never modified afterwards: idea writes publish an
+    updated copy, so it can be searched without holding any lock.
+    """
+
+    db_path = db.DB_PATH
+    key = (db_path, user_id)
+    version = db.get_idea_version(user_id)
+    with _lock:
+        entry = _cache.get(key) or _load(db_path, user_id)
+        if entry is None or entry.version != version:
+            logger.info("Building semantic index for user %s", user_id)
+            entry = _build(db_path, user_id)
+            _mark_dirty(key)
+        _cache[key] = entry
+        return entry.index
+
+
+def _on_ideas_changed(event: str, ideas: list[dict]) -> None:
+    """Apply the ideas written by one transaction to the cached indexes.
+
+    Each row bumps its user's change counter once, so a batch of ``n`` rows
+    is applied only if the counter moved by exactly ``n`` since the cached
+    version; otherwise another writer got in between and the index is
+    dropped from memory, to be rebuilt by the next query.
+    """
+
+    db_path = db.DB_PATH
+    by_user: dict[int, list[dict]] = {}
+    for idea in ideas:
+        by_user.setdefault(idea["user_id"], []).append(idea)
+
+    for user_id, changed in by_user.items():
+        key = (db_path, user_id)
+        if key not in _cache:
+            continue
+        version = db.get_idea_version(user_id)
+        with _lock:
+            entry = _cache.get(key)
+            if entry is None:
+                continue
+            if entry.version + len(changed) != version:
+                _forget(key)
+                continue
+
+            # Copy-on-write: searches may be reading the published index (and
+            # its matrix/ids pair) from other threads.
+            latest = {idea["id"]: idea for idea in changed}
+            index = _copy_index(entry.index)
+            index.remove(list(latest))
+            if event != "delete":
+                try:
+                    index.add(map(_idea_to_text, latest.values()), list(latest))
+                except ValueError:
+                    _forget(key)
+                    continue
+            entry = replace(
+                entry,
+                index=index,
+                version=version,
+                changes=entry.changes + len(changed),
+            )
+            if entry.changes > max(REFIT_MIN_CHANGES, REFIT_RATIO * len(index.ids)):
+                # Enough new vocabulary may be missing to warrant a full fit.
+                _forget(key)
+                continue
+            _cache[key] = entry
+            _mark_dirty(key)
+
+
+db.add_idea_listener(_on_ideas_changed)
+
+
 def semantic_search(
     query: str,
     user_id: int,
@@ -102,8 +368,9 @@ def semantic_search(
     limit: int, default ``10``
         Maximum number of ideas to return.
     index: VectorIndex | None, optional
-        Custom backend implementing :class:`VectorIndex`.  When ``None`` a
-        :class:`TfidfVectorIndex` instance is used.
+        Custom backend implementing :class:`VectorIndex`.  When ``None`` the
+        persistent per-user index from :func:`get_user_index` is used;
+        custom backends are fitted on every call.
 
     Returns
     -------
@@ -114,6 +381,10 @@ def semantic_search(
     if user_id is None:
         raise ValueError("user_id is required for semantic_search")
 
+    if index is None:
+        ranked = get_user_index(user_id).search(query, limit)
+        return db.get_ideas([i for i, _ in ranked])
+
     ideas = search_ideas(user_id)
     if not ideas:
         return []
@@ -122,12 +393,17 @@ def semantic_search(
     documents = [_idea_to_text(idea) for idea in ideas]
     ids = list(id_map.keys())
 
-    backend = index or TfidfVectorIndex()
-    backend.fit(documents, ids)
-    ranked = backend.search(query, limit)
+    index.fit(documents, ids)
+    ranked = index.search(query, limit)
 
     return [id_map[i] for i, _ in ranked]
 
 
-__all__ = ["semantic_search", "VectorIndex", "TfidfVectorIndex"]
+__all__ = [
+    "semantic_search",
+    "get_user_index",
+    "save_indexes",
+    "VectorIndex",
+    "TfidfVectorIndex",
+]
 
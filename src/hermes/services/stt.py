@@ -1,26 +1,50 @@
-"""Serviços relacionados a reconhecimento de fala."""
+"""Serviços relacionados a reconhecimento de fala.
 
-from __future__ import annotations
+O modelo Vosk é carregado uma única vez por processo, sob trava, e pode ser
+pré-carregado em segundo plano na inicialização (:func:`preload_vosk_model`)
+junto com um aquecimento que reconhece um trecho de silêncio, para que a
+primeira captura não pague nem a carga do modelo nem a inicialização do
+decodificador. Criar um ``KaldiRecognizer`` também custa caro, então as
+capturas pegam reconhecedores de um :class:`RecognizerPool` e os devolvem,
+zerados, ao terminar.
+
+Os tempos de carga do modelo e do primeiro reconhecimento são registrados no
+log separadamente.
+"""
 
-from typing import TYPE_CHECKING
+from __future__ import annotations
 
 import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
 
 import vosk
 
+from ..config import config
+
 if TYPE_CHECKING:
-    from vosk import Model
+    from vosk import KaldiRecognizer, Model
 
 logger = logging.getLogger(__name__)
 
 _VOSK_MODEL: Model | None = None
+_model_lock = threading.Lock()
+_pools: dict[int, RecognizerPool] = {}
+_pools_lock = threading.Lock()
 
 
 def get_vosk_model(model_path: str | None = None) -> Model:
     """Obtém uma instância compartilhada de ``vosk.Model``.
 
+    Seguro para chamadas concorrentes: se o modelo estiver sendo carregado em
+    outra thread (por exemplo por :func:`preload_vosk_model`), a chamada
+    espera por ele em vez de carregá-lo de novo.
+
     Args:
         model_path: Caminho opcional para o modelo. Se não informado, usa
+            :data:`hermes.config.config.VOSK_MODEL_PATH` ou, se vazio,
             ``lang="pt-br"`` para carregar o modelo padrão.
 
     Returns:
@@ -32,20 +56,164 @@ def get_vosk_model(model_path: str | None = None) -> Model:
     if _VOSK_MODEL is not None:
         return _VOSK_MODEL
 
-    try:
-        logger.info(
-            "Carregando modelo Vosk %s",
-            f"de '{model_path}'" if model_path else "usando lang='pt-br'",
-        )
-        if model_path:
-            _VOSK_MODEL = vosk.Model(model_path)
-        else:
-            _VOSK_MODEL = vosk.Model(lang="pt-br")
-    except Exception:
-        logger.exception(
-            "Falha ao carregar modelo Vosk%s",
-            f" de '{model_path}'" if model_path else "",
-        )
-        raise
+    with _model_lock:
+        if _VOSK_MODEL is not None:
+            return _VOSK_MODEL
+
+        model_path = model_path or config.VOSK_MODEL_PATH or None
+        try:
+            logger.info(
+                "Carregando modelo Vosk %s",
+                f"de '{model_path}'" if model_path else "usando lang='pt-br'",
+            )
+            inicio = time.perf_counter()
+            if model_path:
+                _VOSK_MODEL = vosk.Model(model_path)
+            else:
+                _VOSK_MODEL = vosk.Model(lang="pt-br")
+            logger.info(
+                "Modelo Vosk carregado em %.0f ms",
+                (time.perf_counter() - inicio) * 1000,
+            )
+        except Exception:
+            logger.exception(
+                "Falha ao carregar modelo Vosk%s",
+                f" de '{model_path}'" if model_path else "",
+            )
+            raise
 
     return _VOSK_MODEL
+
+
+class RecognizerPool:
+    """Reconhecedores reutilizáveis de um modelo e taxa de amostragem.
+
+    Args:
+        model: Modelo Vosk dos reconhecedores.
+        samplerate: Taxa de amostragem do áudio reconhecido.
+        tamanho: Quantos reconhecedores ociosos são guardados; os excedentes
+            devolvidos são descartados.
+    """
+
+    def __init__(self, model: Model, samplerate: int = 16000, tamanho: int = 2) -> None:
+        self.model = model
+        self.samplerate = samplerate
+        self.tamanho = tamanho
+        self._livres: list[KaldiRecognizer] = []
+        self._lock = threading.Lock()
+        self.criados = 0
+
+    def obter(self) -> KaldiRecognizer:
+        """Retorna um reconhecedor ocioso, criando um se não houver."""
+
+        with self._lock:
+            if self._livres:
+                return self._livres.pop()
+        inicio = time.perf_counter()
+        recognizer = vosk.KaldiRecognizer(self.model, self.samplerate)
+        with self._lock:
+            self.criados += 1
+        logger.debug(
+            "KaldiRecognizer criado em %.0f ms", (time.perf_counter() - inicio) * 1000
+        )
+        return recognizer
+
+    def devolver(self, recognizer: KaldiRecognizer) -> None:
+        """Zera ``recognizer`` e o guarda para a próxima frase."""
+
+        try:
+            recognizer.Reset()
+        except Exception:
+            logger.exception("Falha ao reiniciar reconhecedor; descartando-o")
+            return
+        with self._lock:
+            if len(self._livres) < self.tamanho:
+                self._livres.append(recognizer)
+
+    @contextmanager
+    def reconhecedor(self) -> Iterator[KaldiRecognizer]:
+        """Empresta um reconhecedor durante o bloco ``with``."""
+
+        recognizer = self.obter()
+        try:
+            yield recognizer
+        finally:
+            self.devolver(recognizer)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._livres)
+
+
+def get_recognizer_pool(samplerate: int = 16000) -> RecognizerPool:
+    """Retorna o pool de reconhecedores do modelo compartilhado."""
+
+    model = get_vosk_model()
+    with _pools_lock:
+        pool = _pools.get(samplerate)
+        if pool is None or pool.model is not model:
+            pool = _pools[samplerate] = RecognizerPool(
+                model, samplerate, config.VOSK_POOL_SIZE
+            )
+        return pool
+
+
+def warm_up(samplerate: int = 16000, duracao: float = 0.5) -> None:
+    """Reconhece ``duracao`` segundos de silêncio com um reconhecedor do pool.
+
+    A primeira decodificação inicializa estruturas internas do Kaldi; fazê-la
+    antes da primeira frase real tira esse custo da latência percebida. O
+    reconhecedor aquecido volta ao pool.
+    """
+
+    pool = get_recognizer_pool(samplerate)
+    inicio = time.perf_counter()
+    with pool.reconhecedor() as recognizer:
+        recognizer.AcceptWaveform(b"\0" * (int(samplerate * duracao) * 2))
+        recognizer.FinalResult()
+    logger.info(
+        "Primeiro reconhecimento (aquecimento) em %.0f ms",
+        (time.perf_counter() - inicio) * 1000,
+    )
+
+
+def preload_vosk_model(
+    model_path: str | None = None,
+    *,
+    samplerate: int = 16000,
+    background: bool = True,
+) -> threading.Thread | None:
+    """Carrega o modelo Vosk e aquece um reconhecedor.
+
+    Com ``background=True`` o trabalho roda numa thread daemon, que é
+    retornada; falhas são apenas registradas no log, e a primeira captura
+    tentará carregar o modelo de novo. Sem ``background``, as exceções são
+    propagadas.
+    """
+
+    def carregar() -> None:
+        get_vosk_model(model_path)
+        warm_up(samplerate)
+
+    if not background:
+        carregar()
+        return None
+
+    def executar() -> None:
+        try:
+            carregar()
+        except Exception:
+            logger.exception("Falha ao pré-carregar o modelo Vosk")
+
+    thread = threading.Thread(target=executar, name="hermes-vosk-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+__all__ = [
+    "RecognizerPool",
+    "get_recognizer_pool",
+    "get_vosk_model",
+    "preload_vosk_model",
+    "warm_up",
+]
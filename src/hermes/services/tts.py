@@ -0,0 +1,203 @@
+"""Serviço de síntese de fala (TTS) compartilhado.
+
+Um único :class:`TTSWorker` mantém o motor ``pyttsx3`` vivo numa thread
+própria e fala os textos de uma fila de prioridades, de modo que lembretes,
+a interface gráfica e a CLI nunca ficam bloqueados esperando a fala terminar
+nem pagam a inicialização do motor a cada frase.
+
+Menor número significa maior prioridade: alertas de lembretes
+(:data:`PRIORITY_ALERT`) passam à frente de respostas do assistente
+(:data:`PRIORITY_REPLY`), que passam à frente de avisos
+(:data:`PRIORITY_NOTICE`). Falas pendentes ou em andamento podem ser
+canceladas individualmente (:meth:`Utterance.cancel`) ou todas de uma vez
+(:meth:`TTSWorker.cancel_all`).
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import queue
+import threading
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_ALERT = 0
+PRIORITY_REPLY = 10
+PRIORITY_NOTICE = 20
+
+
+def _pyttsx3_engine() -> Any:
+    import pyttsx3
+
+    return pyttsx3.init()
+
+
+class Utterance:
+    """Fala enfileirada em um :class:`TTSWorker`."""
+
+    def __init__(self, text: str, priority: int, generation: int) -> None:
+        self.text = text
+        self.priority = priority
+        self.generation = generation
+        self.cancelled = False
+        self._done = threading.Event()
+
+    def cancel(self) -> None:
+        """Descarta a fala ou interrompe-a se já estiver em andamento."""
+
+        self.cancelled = True
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Aguarda a fala terminar (ou ser descartada)."""
+
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+
+class TTSWorker(threading.Thread):
+    """Thread que fala, em ordem de prioridade, os textos enfileirados.
+
+    Parameters
+    ----------
+    engine_factory:
+        Cria o motor de fala na thread do worker. Padrão: ``pyttsx3.init``.
+        Se falhar, os textos são apenas registrados no log.
+    """
+
+    def __init__(self, engine_factory: Callable[[], Any] = _pyttsx3_engine) -> None:
+        super().__init__(name="hermes-tts", daemon=True)
+        self._engine_factory = engine_factory
+        self._engine: Any = None
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._generation = 0
+        self._current: Utterance | None = None
+        self._lock = threading.Lock()
+
+    def speak(
+        self, text: str, priority: int = PRIORITY_REPLY, *, interrupt: bool = False
+    ) -> Utterance:
+        """Enfileira ``text`` e retorna imediatamente.
+
+        Com ``interrupt=True``, a fala em andamento é interrompida se não for
+        mais prioritária que a nova.
+        """
+
+        with self._lock:
+            utterance = Utterance(text, priority, self._generation)
+            current = self._current
+        if interrupt and current is not None and current.priority >= priority:
+            current.cancel()
+        self._queue.put((priority, next(self._seq), utterance))
+        return utterance
+
+    def cancel_all(self) -> None:
+        """Descarta as falas pendentes e interrompe a atual."""
+
+        with self._lock:
+            self._generation += 1
+            current = self._current
+        if current is not None:
+            current.cancel()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """Cancela as falas e encerra a thread."""
+
+        self.cancel_all()
+        self._queue.put((float("-inf"), next(self._seq), None))
+        if self.is_alive():
+            self.join(timeout)
+
+    def _on_word(self, name: Any, location: int, length: int) -> None:
+        # Chamado pelo pyttsx3 a cada palavra: o único ponto em que ``stop``
+        # interrompe a fala com segurança.
+        current = self._current
+        if current is not None and current.cancelled:
+            self._engine.stop()
+
+    def _start_engine(self) -> None:
+        try:
+            self._engine = self._engine_factory()
+            self._engine.connect("started-word", self._on_word)
+        except Exception:
+            logger.exception("Não foi possível inicializar o TTS; falas irão ao log")
+            self._engine = None
+
+    def _say(self, text: str) -> None:
+        if self._engine is None:
+            logger.info("TTS: %s", text)
+            return
+        self._engine.say(text)
+        self._engine.runAndWait()
+
+    def run(self) -> None:
+        self._start_engine()
+        while True:
+            _, _, utterance = self._queue.get()
+            if utterance is None:
+                break
+            with self._lock:
+                stale = utterance.generation != self._generation
+                if not (stale or utterance.cancelled):
+                    self._current = utterance
+            if stale or utterance.cancelled:
+                utterance._done.set()
+                continue
+            try:
+                self._say(utterance.text)
+            except Exception:
+                logger.exception("Falha ao falar %r", utterance.text)
+            finally:
+                with self._lock:
+                    self._current = None
+                utterance._done.set()
+
+
+_worker: TTSWorker | None = None
+_worker_lock = threading.Lock()
+
+
+def get_tts_worker() -> TTSWorker:
+    """Retorna o worker de TTS do processo, iniciando-o na primeira chamada."""
+
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = TTSWorker()
+            _worker.start()
+        return _worker
+
+
+def speak(
+    text: str, priority: int = PRIORITY_REPLY, *, interrupt: bool = False
+) -> Utterance:
+    """Atalho para :meth:`TTSWorker.speak` no worker compartilhado."""
+
+    return get_tts_worker().speak(text, priority, interrupt=interrupt)
+
+
+def stop_tts_worker() -> None:
+    """Encerra o worker compartilhado, se estiver rodando."""
+
+    global _worker
+    with _worker_lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        worker.stop()
+
+
+__all__ = [
+    "PRIORITY_ALERT",
+    "PRIORITY_NOTICE",
+    "PRIORITY_REPLY",
+    "TTSWorker",
+    "Utterance",
+    "get_tts_worker",
+    "speak",
+    "stop_tts_worker",
+]
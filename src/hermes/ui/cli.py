@@ -9,6 +9,7 @@ from ..assistant.state import ConversationState
 from ..config import load_from_args
 from ..core import app
 from ..logging import setup_logging
+from ..services import tts
 
 LLM_FRIENDLY_MESSAGE = (
     "Não consegui falar com o modelo de linguagem. Verifique se o servidor está"
@@ -178,47 +179,44 @@ def conversar_com_hermes(usuario_id: int) -> None:
             logger.info("Conversa encerrada.")
             break
 
-        resposta = engine.responder_mensagem(mensagem, state=state)
-        logger.info("%s", resposta)
+        # Mostra a resposta conforme o LLM gera cada trecho.
+        for fragmento in engine.responder_mensagem_stream(mensagem, state=state):
+            print(fragmento, end="", flush=True)
+        print()
 
 
 def escuta_continua_por_voz(usuario_id: int) -> None:
     logger.info("Iniciando escuta contínua. Fale '%s' para ativar.", "Hermes")
     usar_tts = input("Ativar TTS para respostas? (s/N): ").strip().lower() == "s"
-    engine_tts = None
 
+    if usar_tts and importlib.util.find_spec("pyttsx3") is None:
+        logger.warning("Biblioteca pyttsx3 não encontrada. Prosseguindo sem TTS.")
+        usar_tts = False
     if usar_tts:
-        if importlib.util.find_spec("pyttsx3") is None:
-            logger.warning("Biblioteca pyttsx3 não encontrada. Prosseguindo sem TTS.")
-            usar_tts = False
-        else:
-            import pyttsx3
-
-            try:
-                engine_tts = pyttsx3.init()
-            except Exception:  # pragma: no cover - inicialização de voz
-                logger.exception(
-                    "Não foi possível inicializar o TTS. Prosseguindo sem áudio."
-                )
-                usar_tts = False
+        # Inicia o motor agora, fora do callback de reconhecimento.
+        tts.get_tts_worker()
 
     state = ConversationState(user_id=usuario_id)
 
     class _CliHotwordListener(HotwordListener):
         def on_hotword_detected(self, texto: str) -> None:  # pragma: no cover - callback
             logger.info("Hotword detectada: %s", texto)
+            if usar_tts:
+                # O usuário voltou a falar: interrompe a resposta anterior.
+                tts.get_tts_worker().cancel_all()
 
         def on_command(self, texto: str) -> None:  # pragma: no cover - callback
             mensagem = texto.strip()
             if not mensagem:
                 return
             logger.info("Você (voz): %s", mensagem)
-            resposta = engine.responder_mensagem(mensagem, state=state)
-            logger.info("Hermes: %s", resposta)
-
-            if usar_tts and engine_tts and resposta:
-                engine_tts.say(resposta)
-                engine_tts.runAndWait()
+            fragmentos = engine.responder_mensagem_stream(mensagem, state=state)
+            # Fala cada frase assim que ela fica completa, sem esperar o fim.
+            for frase in engine.agrupar_frases(fragmentos):
+                logger.info("Hermes: %s", frase)
+                if usar_tts:
+                    # Enfileira sem bloquear o reconhecimento de voz.
+                    tts.speak(frase, tts.PRIORITY_REPLY)
 
     listener = _CliHotwordListener()
     listener.start()
@@ -1,12 +1,20 @@
 import csv
-import json
 import logging
 import sys
-
-import pyttsx3
-import sounddevice as sd
-import vosk
-from PyQt5.QtCore import QFutureWatcher, QTimer, QtConcurrent, QThread, pyqtSignal
+from functools import partial
+from typing import Callable
+
+from PyQt5.QtCore import (
+    QAbstractListModel,
+    QFutureWatcher,
+    QModelIndex,
+    Qt,
+    QTimer,
+    QtConcurrent,
+    QThread,
+    pyqtSignal,
+)
+from PyQt5.QtGui import QTextCursor
 from PyQt5.QtWidgets import (
     QApplication,
     QComboBox,
@@ -15,8 +23,7 @@ from PyQt5.QtWidgets import (
     QInputDialog,
     QLabel,
     QLineEdit,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
     QMessageBox,
     QPushButton,
     QCheckBox,
@@ -28,10 +35,11 @@ from PyQt5.QtWidgets import (
 
 from ..assistant import HotwordListener, engine
 from ..assistant.state import ConversationState
+from ..assistant.voice import CapturaFala
 from ..config import load_from_args
 from ..core import app
 from ..logging import setup_logging
-from ..services.stt import get_vosk_model
+from ..services import tts
 
 LLM_FRIENDLY_MESSAGE = (
     "Não consegui falar com o modelo de linguagem. Verifique se o servidor está"
@@ -41,6 +49,89 @@ LLM_FRIENDLY_MESSAGE = (
 
 logger = logging.getLogger(__name__)
 
+# Papel do modelo que devolve o dicionário completo da ideia.
+IDEA_ROLE = Qt.UserRole + 1
+
+# Recebe o cursor da página (``None`` para a primeira) e devolve as ideias da
+# página e o cursor da próxima, como :func:`hermes.core.app.pagina_ideias`.
+PageFetcher = Callable[[str | None], tuple[list[dict], str | None]]
+
+
+class IdeaListModel(QAbstractListModel):
+    """Lista de ideias carregada sob demanda, uma página por vez.
+
+    O ``QListView`` chama :meth:`fetchMore` quando a rolagem se aproxima do
+    fim, então apenas as páginas visitadas ficam em memória.
+    """
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._ideias: list[dict] = []
+        self._cursor: str | None = None
+        self._buscar: PageFetcher | None = None
+
+    def carregar(
+        self,
+        buscar: PageFetcher | None,
+        ideias: list[dict] | None = None,
+        cursor: str | None = None,
+    ) -> None:
+        """Troca a fonte da lista.
+
+        ``ideias`` e ``cursor`` permitem reaproveitar uma primeira página já
+        obtida (por exemplo, em segundo plano); caso contrário ela é buscada
+        aqui.
+        """
+
+        if ideias is None and buscar is not None:
+            ideias, cursor = buscar(None)
+        self.beginResetModel()
+        self._buscar = buscar
+        self._ideias = list(ideias or [])
+        self._cursor = cursor
+        self.endResetModel()
+
+    def limpar(self) -> None:
+        self.carregar(None)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._ideias)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        ideia = self._ideias[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{ideia['created_at'][:10]} - {ideia['title']}"
+        if role == IDEA_ROLE:
+            return ideia
+        return None
+
+    def setData(self, index, value, role=IDEA_ROLE) -> bool:
+        if not index.isValid() or role != IDEA_ROLE:
+            return False
+        self._ideias[index.row()] = value
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, IDEA_ROLE])
+        return True
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return (
+            not parent.isValid()
+            and self._buscar is not None
+            and self._cursor is not None
+        )
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+        ideias, self._cursor = self._buscar(self._cursor)
+        if not ideias:
+            return
+        inicio = len(self._ideias)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(ideias) - 1)
+        self._ideias.extend(ideias)
+        self.endInsertRows()
+
 
 class HotwordListenerThread(QThread):
     """Thread que encapsula o ``HotwordListener`` e expõe sinais Qt."""
@@ -90,6 +181,72 @@ class HotwordListenerThread(QThread):
         self._stop_requested = True
 
 
+class CapturaFalaThread(QThread):
+    """Executa uma :class:`CapturaFala` fora da thread da interface.
+
+    O texto parcial é emitido por :attr:`parcial` enquanto a pessoa fala e o
+    texto final por :attr:`concluida` quando a frase termina.
+    """
+
+    parcial = pyqtSignal(str)
+    concluida = pyqtSignal(str)
+    falhou = pyqtSignal(str)
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self._captura = CapturaFala(on_parcial=self.parcial.emit)
+
+    def run(self) -> None:  # pragma: no cover - integrações com áudio/threads
+        try:
+            self.concluida.emit(self._captura.capturar())
+        except Exception as exc:
+            logger.exception("Falha ao capturar fala")
+            self.falhou.emit(str(exc))
+
+    def cancelar(self) -> None:
+        self._captura.cancelar()
+
+
+class RespostaStreamThread(QThread):
+    """Gera a resposta do assistente em segundo plano, trecho a trecho.
+
+    Cada fragmento recebido do LLM é emitido por :attr:`fragmento_recebido`;
+    com ``falar=True`` cada frase completa é falada enquanto o restante da
+    resposta ainda está sendo gerado.
+    """
+
+    fragmento_recebido = pyqtSignal(str)
+
+    def __init__(
+        self,
+        mensagem: str,
+        state: ConversationState,
+        falar: bool = False,
+        parent: QWidget | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self._mensagem = mensagem
+        self._state = state
+        self._falar = falar
+
+    def _fragmentos(self):
+        for fragmento in engine.responder_mensagem_stream(
+            self._mensagem, state=self._state
+        ):
+            self.fragmento_recebido.emit(fragmento)
+            yield fragmento
+
+    def run(self) -> None:  # pragma: no cover - integrações com áudio/threads
+        if not self._falar:
+            for _ in self._fragmentos():
+                pass
+            return
+
+        # A fala roda no worker de TTS; esta thread segue consumindo o LLM.
+        for frase in engine.agrupar_frases(self._fragmentos()):
+            tts.speak(frase, tts.PRIORITY_REPLY)
+
+
 class HermesGUI(QWidget):
     def __init__(self):
         super().__init__()
@@ -143,6 +300,7 @@ class HermesGUI(QWidget):
         self.end_date_input.setPlaceholderText("Data fim (AAAA-MM-DD)")
         self.search_button = QPushButton("Buscar")
         self.search_button.clicked.connect(self.buscar_ideias)
+        self._buscar_pagina: PageFetcher | None = None
         self.search_watcher = QFutureWatcher()
         self.search_watcher.finished.connect(self._exibir_resultados_busca)
         search_layout = QHBoxLayout()
@@ -153,9 +311,14 @@ class HermesGUI(QWidget):
         search_layout.addWidget(self.search_button)
 
         self.idea_list_label = QLabel("Ideias registradas:")
-        self.idea_list = QListWidget()
-        self.idea_list.itemDoubleClicked.connect(self.exibir_ideia_completa)
-        self.idea_list.itemSelectionChanged.connect(self._atualizar_botao_processar)
+        self.idea_model = IdeaListModel(self)
+        self.idea_list = QListView()
+        self.idea_list.setModel(self.idea_model)
+        self.idea_list.setUniformItemSizes(True)
+        self.idea_list.doubleClicked.connect(self.exibir_ideia_completa)
+        self.idea_list.selectionModel().selectionChanged.connect(
+            self._atualizar_botao_processar
+        )
 
         # Aba Assistente
         self.assistant_history = QTextEdit()
@@ -181,6 +344,8 @@ class HermesGUI(QWidget):
         self.hotword_indicator = QLabel("")
         self.hotword_indicator.setStyleSheet("color: #2e7d32; font-weight: bold;")
         self.listener_thread: HotwordListenerThread | None = None
+        self.resposta_thread: RespostaStreamThread | None = None
+        self.captura_thread: CapturaFalaThread | None = None
         self._hotword_feedback_timer = QTimer(self)
         self._hotword_feedback_timer.setSingleShot(True)
         self._hotword_feedback_timer.timeout.connect(self._restore_listen_visuals)
@@ -245,12 +410,6 @@ class HermesGUI(QWidget):
         self.user_combo.currentIndexChanged.connect(self.listar_ideias)
         self.user_combo.currentIndexChanged.connect(self._atualizar_assistente_para_usuario)
 
-        try:
-            self.vosk_model = get_vosk_model()
-        except Exception:
-            logger.exception("Falha ao carregar modelo Vosk para captura de fala")
-            raise
-
     def carregar_usuarios(self):
         self.user_combo.clear()
         self.search_user_combo.clear()
@@ -302,83 +461,102 @@ class HermesGUI(QWidget):
             else:
                 return
         if ideia_salva:
-            engine = pyttsx3.init()
-            engine.say("ideia salva")
-            engine.runAndWait()
+            tts.speak("ideia salva", tts.PRIORITY_NOTICE)
         self.title_input.clear()
         self.desc_input.clear()
         self.listar_ideias()
 
     def capturar_fala(self, campo: str) -> None:
         """Captura fala do microfone e preenche o campo indicado."""
-        try:
-            duracao = 5  # segundos
-            sd.default.samplerate = 16000
-            sd.default.channels = 1
-            audio = sd.rec(int(duracao * sd.default.samplerate), dtype="int16")
-            sd.wait()
-            rec = vosk.KaldiRecognizer(self.vosk_model, sd.default.samplerate)
-            rec.AcceptWaveform(audio.tobytes())
-            texto = json.loads(rec.Result()).get("text", "")
-            if campo == "titulo":
-                self.title_input.setText(texto)
-            else:
-                self.desc_input.setPlainText(texto)
-        except Exception as e:  # pragma: no cover - envolve hardware
-            QMessageBox.warning(self, "Erro", f"Falha ao capturar fala: {e}")
+        if campo == "titulo":
+            self._iniciar_captura(self.title_mic, self.title_input.setText)
+        else:
+            self._iniciar_captura(self.desc_mic, self.desc_input.setPlainText)
 
     def capturar_fala_assistente(self) -> None:
         """Captura a fala do usuário e preenche a entrada do chat."""
+        self._iniciar_captura(self.assistant_mic, self.assistant_input.setText)
+
+    def _iniciar_captura(
+        self, botao: QPushButton, destino: Callable[[str], None]
+    ) -> None:
+        # Um segundo clique durante a captura encerra a frase antecipadamente.
+        if self.captura_thread and self.captura_thread.isRunning():
+            self.captura_thread.cancelar()
+            return
         try:
-            duracao = 5  # segundos
-            sd.default.samplerate = 16000
-            sd.default.channels = 1
-            audio = sd.rec(int(duracao * sd.default.samplerate), dtype="int16")
-            sd.wait()
-            rec = vosk.KaldiRecognizer(self.vosk_model, sd.default.samplerate)
-            rec.AcceptWaveform(audio.tobytes())
-            texto = json.loads(rec.Result()).get("text", "")
-            self.assistant_input.setText(texto)
+            self.captura_thread = CapturaFalaThread(self)
         except Exception as e:  # pragma: no cover - envolve hardware
             QMessageBox.warning(self, "Erro", f"Falha ao capturar fala: {e}")
+            return
+        self.captura_thread.parcial.connect(destino)
+        self.captura_thread.concluida.connect(destino)
+        self.captura_thread.falhou.connect(
+            lambda erro: QMessageBox.warning(
+                self, "Erro", f"Falha ao capturar fala: {erro}"
+            )
+        )
+        botao.setText("⏹️")
+        self.captura_thread.finished.connect(lambda: botao.setText("🎙️"))
+        self.captura_thread.start()
+
+    @staticmethod
+    def _pagina_busca(
+        user_id: int | None,
+        texto: str | None,
+        inicio: str,
+        fim: str,
+        cursor: str | None,
+    ) -> tuple[list[dict], str | None]:
+        """Busca a próxima página não vazia dentro do intervalo de datas."""
+
+        while True:
+            ideias, cursor = app.pagina_ideias(user_id, cursor=cursor, texto=texto)
+            if fim:
+                ideias = [i for i in ideias if i["created_at"][:10] <= fim]
+            if inicio:
+                no_intervalo = [i for i in ideias if i["created_at"][:10] >= inicio]
+                if len(no_intervalo) < len(ideias):
+                    # As páginas vêm das mais novas às mais antigas: as
+                    # próximas já estariam antes da data inicial.
+                    cursor = None
+                ideias = no_intervalo
+            if ideias or cursor is None:
+                return ideias, cursor
 
     def buscar_ideias(self):
         user_id = self.search_user_combo.currentData()
         texto = self.search_input.text().strip() or None
+        inicio = self.start_date_input.text().strip()
+        fim = self.end_date_input.text().strip()
+        self._buscar_pagina = partial(self._pagina_busca, user_id, texto, inicio, fim)
         self.search_button.setEnabled(False)
-        future = QtConcurrent.run(app.buscar_ideias, user_id, texto=texto)
+        future = QtConcurrent.run(self._buscar_pagina, None)
         self.search_watcher.setFuture(future)
 
     def _exibir_resultados_busca(self):
-        ideias = self.search_watcher.future().result()
-        inicio = self.start_date_input.text().strip()
-        fim = self.end_date_input.text().strip()
-        if inicio:
-            ideias = [i for i in ideias if i["created_at"][:10] >= inicio]
-        if fim:
-            ideias = [i for i in ideias if i["created_at"][:10] <= fim]
-        self.idea_list.clear()
-        for ideia in ideias:
-            item = QListWidgetItem(f"{ideia['created_at'][:10]} - {ideia['title']}")
-            item.setData(1000, ideia)
-            self.idea_list.addItem(item)
+        ideias, cursor = self.search_watcher.future().result()
+        self.idea_model.carregar(self._buscar_pagina, ideias, cursor)
         self.search_button.setEnabled(True)
         self._atualizar_botao_processar()
 
     def listar_ideias(self):
         usuario_id = self.user_combo.currentData()
-        self.idea_list.clear()
         if not usuario_id:
-            return
-        ideias = app.listar_ideias(usuario_id)
-        for ideia in ideias:
-            item = QListWidgetItem(f"{ideia['created_at'][:10]} - {ideia['title']}")
-            item.setData(1000, ideia)  # Armazena a ideia completa
-            self.idea_list.addItem(item)
+            self.idea_model.limpar()
+        else:
+            self.idea_model.carregar(
+                lambda cursor: app.pagina_ideias(usuario_id, cursor=cursor)
+            )
         self._atualizar_botao_processar()
 
+    def _selecionados(self) -> list[QModelIndex]:
+        return sorted(
+            self.idea_list.selectionModel().selectedIndexes(), key=lambda i: i.row()
+        )
+
     def exportar_ideias(self):
-        selecionados = self.idea_list.selectedItems()
+        selecionados = self._selecionados()
         if not selecionados:
             QMessageBox.warning(self, "Erro", "Selecione ao menos uma ideia.")
             return
@@ -390,7 +568,7 @@ class HermesGUI(QWidget):
         )
         if not caminho:
             return
-        ideias = [item.data(1000) for item in selecionados]
+        ideias = [index.data(IDEA_ROLE) for index in selecionados]
         if caminho.lower().endswith(".txt"):
             with open(caminho, "w", encoding="utf-8") as f:
                 for ideia in ideias:
@@ -408,8 +586,8 @@ class HermesGUI(QWidget):
                 )
         QMessageBox.information(self, "Sucesso", "Ideias exportadas.")
 
-    def exibir_ideia_completa(self, item):
-        ideia = item.data(1000)
+    def exibir_ideia_completa(self, index):
+        ideia = index.data(IDEA_ROLE)
         QMessageBox.information(
             self,
             "Ideia Completa",
@@ -417,14 +595,14 @@ class HermesGUI(QWidget):
         )
 
     def _atualizar_botao_processar(self):
-        self.process_button.setEnabled(bool(self.idea_list.selectedItems()))
+        self.process_button.setEnabled(bool(self._selecionados()))
 
     def processar_ideia_selecionada(self):
-        selecionados = self.idea_list.selectedItems()
+        selecionados = self._selecionados()
         if not selecionados:
             return
-        item = selecionados[0]
-        ideia = item.data(1000)
+        index = selecionados[0]
+        ideia = dict(index.data(IDEA_ROLE))
         try:
             sugestoes = app.processar_ideia(
                 ideia["id"], ideia["title"], ideia["body"]
@@ -432,7 +610,7 @@ class HermesGUI(QWidget):
             ideia["llm_summary"] = sugestoes.get("llm_summary")
             ideia["llm_topic"] = sugestoes.get("llm_topic")
             ideia["tags"] = sugestoes.get("tags")
-            item.setData(1000, ideia)
+            self.idea_model.setData(index, ideia, IDEA_ROLE)
         except RuntimeError as e:  # pragma: no cover - interface gráfica
             QMessageBox.warning(self, "Erro", str(e) or LLM_FRIENDLY_MESSAGE)
         except Exception as e:  # pragma: no cover - interface gráfica
@@ -487,18 +665,39 @@ class HermesGUI(QWidget):
             )
             return
 
+        if self.resposta_thread and self.resposta_thread.isRunning():
+            QMessageBox.information(
+                self,
+                "Aguarde",
+                "O Hermes ainda está respondendo à mensagem anterior.",
+            )
+            return
+
         prefixo = "Você (voz)" if origem_voz else "Você"
         self.assistant_history.append(f"{prefixo}: {mensagem_limpa}")
         if not origem_voz:
             self.assistant_input.clear()
 
-        resposta = engine.responder_mensagem(mensagem_limpa, state=state)
-        self.assistant_history.append(f"Hermes: {resposta}")
+        self.assistant_history.append("Hermes: ")
+        self.assistant_send.setEnabled(False)
+        self.resposta_thread = RespostaStreamThread(
+            mensagem_limpa,
+            state,
+            falar=self.assistant_tts_checkbox.isChecked(),
+            parent=self,
+        )
+        self.resposta_thread.fragmento_recebido.connect(self._anexar_fragmento_resposta)
+        self.resposta_thread.finished.connect(
+            lambda: self.assistant_send.setEnabled(True)
+        )
+        self.resposta_thread.start()
 
-        if self.assistant_tts_checkbox.isChecked() and resposta:
-            engine_tts = pyttsx3.init()
-            engine_tts.say(resposta)
-            engine_tts.runAndWait()
+    def _anexar_fragmento_resposta(self, fragmento: str) -> None:
+        cursor = self.assistant_history.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(fragmento)
+        self.assistant_history.setTextCursor(cursor)
+        self.assistant_history.ensureCursorVisible()
 
     def _atualizar_estado_mic_continuo(self, ativo: bool, motivo: str | None = None) -> None:
         tooltip = motivo or "Desativado enquanto a escuta contínua está ativa."
@@ -514,6 +713,9 @@ class HermesGUI(QWidget):
             if self.listener_thread and self.listener_thread.isRunning():
                 return
             self._atualizar_estado_mic_continuo(True)
+            if self.captura_thread and self.captura_thread.isRunning():
+                self.captura_thread.cancelar()
+                self.captura_thread.wait()
             logger.info("Ativando escuta contínua do Hermes")
             try:
                 self.listener_thread = HotwordListenerThread(self)
@@ -617,7 +819,8 @@ def main(argv: list[str] | None = None) -> None:
 
     setup_logging()
     load_from_args(argv)
-    app.inicializar()
+    # O modelo de voz carrega em segundo plano enquanto a janela abre.
+    app.inicializar(carregar_voz=True)
 
     qt_app = QApplication(sys.argv)
     gui = HermesGUI()
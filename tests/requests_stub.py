@@ -33,7 +33,9 @@ if "requests" not in sys.modules:
     class HTTPAdapter:
         """HTTPAdapter placeholder; `send` is patched in tests."""
 
-        def __init__(self, max_retries=None) -> None:
+        def __init__(
+            self, pool_connections=10, pool_maxsize=10, max_retries=None
+        ) -> None:
             self.max_retries = max_retries
 
         def send(self, request, **kwargs):  # pragma: no cover - patched in tests
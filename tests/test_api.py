@@ -43,12 +43,134 @@ def test_create_idea_sources_device(api_client):
 def test_ask_returns_response(api_client, monkeypatch):
     client, api_module, _ = api_client
 
-    def fake(prompt):
+    async def fake(prompt, url=None, model=None):
         return {"ok": True, "response": "hi"}
 
-    monkeypatch.setattr(api_module, "gerar_resposta", fake)
+    monkeypatch.setattr(api_module.core_app, "gerar_resposta_async", fake)
     res = client.post(
         "/ask", json={"prompt": "hello"}, headers={"X-Token": "secret"}
     )
     assert res.status_code == 200
     assert res.json() == {"response": "hi"}
+
+
+def test_list_ideas_paginates_with_cursor(api_client):
+    client, _, _ = api_client
+    headers = {"X-Token": "secret"}
+    for i in range(3):
+        client.post(
+            "/ideas", json={"user": 1, "title": f"T{i}", "body": "B"}, headers=headers
+        )
+
+    first = client.get("/ideas", params={"user": 1, "limit": 2}, headers=headers)
+    assert first.status_code == 200
+    data = first.json()
+    assert [i["title"] for i in data["ideas"]] == ["T2", "T1"]
+
+    rest = client.get(
+        "/ideas",
+        params={"user": 1, "limit": 2, "cursor": data["next_cursor"]},
+        headers=headers,
+    ).json()
+    assert [i["title"] for i in rest["ideas"]] == ["T0"]
+    assert rest["next_cursor"] is None
+
+    bad = client.get("/ideas", params={"cursor": "garbage"}, headers=headers)
+    assert bad.status_code == 400
+
+
+def test_created_idea_is_enriched_in_background(api_client, monkeypatch):
+    import time
+
+    from hermes.core import backfill
+
+    client, _, _ = api_client
+    headers = {"X-Token": "secret"}
+
+    def fake_llm(titulo, descricao, url=None, model=None):
+        return {"response": "", "llm_summary": "Resumo", "llm_topic": "T", "tags": "x"}
+
+    monkeypatch.setattr(backfill, "analisar_ideia_com_llm", fake_llm)
+    idea_id = client.post(
+        "/ideas", json={"user": 1, "title": "T", "body": "B"}, headers=headers
+    ).json()["id"]
+
+    deadline = time.monotonic() + 5
+    while True:
+        status = client.get(f"/ideas/{idea_id}/status", headers=headers).json()
+        if status["status"] == "done" or time.monotonic() > deadline:
+            break
+        time.sleep(0.02)
+
+    assert status["status"] == "done"
+    assert status["llm_summary"] == "Resumo"
+    assert client.get("/ideas/999/status", headers=headers).status_code == 404
+
+
+def test_bulk_ingestion_accepts_json_and_ndjson(api_client):
+    import json
+
+    client, _, db_path = api_client
+    headers = {"X-Token": "secret", "X-Device-Id": "dev1"}
+    ideas = [{"user": 1, "title": f"T{i}", "body": "B"} for i in range(3)]
+
+    res = client.post("/ideas/bulk", json=ideas, headers=headers)
+    assert res.status_code == 200
+    assert len(res.json()["ids"]) == 3
+
+    ndjson = "\n".join(json.dumps(idea) for idea in ideas) + "\n"
+    res = client.post(
+        "/ideas/bulk",
+        content=ndjson,
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert res.status_code == 200
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT COUNT(*), MIN(source) FROM ideias").fetchone()
+    assert rows == (6, "caduceu_dev1")
+
+    bad = client.post("/ideas/bulk", json=[{"user": 1}], headers=headers)
+    assert bad.status_code == 422
+    assert bad.json()["detail"]["index"] == 0
+
+
+def test_replayed_idea_is_not_duplicated(api_client):
+    client, _, db_path = api_client
+    headers = {"X-Token": "secret", "Idempotency-Key": "abc"}
+    idea = {"user": 1, "title": "T", "body": "B"}
+
+    first = client.post("/ideas", json=idea, headers=headers).json()["id"]
+    again = client.post("/ideas", json=idea, headers=headers).json()["id"]
+    bulk = client.post(
+        "/ideas/bulk",
+        json=[{**idea, "idempotency_key": "abc"}],
+        headers={"X-Token": "secret"},
+    ).json()["ids"]
+
+    assert first == again == bulk[0]
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ideias").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 1
+
+
+def test_rate_limit_returns_429(api_client, monkeypatch):
+    client, api_module, _ = api_client
+    monkeypatch.setattr(api_module.config, "RATE_LIMIT_PER_MINUTE", 2)
+
+    codes = [client.get("/health").status_code for _ in range(3)]
+
+    assert codes == [200, 200, 429]
+    res = client.get("/health")
+    assert res.json() == {"detail": "Rate limit exceeded"}
+    assert int(res.headers["Retry-After"]) >= 1
+    # The token gets its own bucket, shared by all of its devices.
+    ok = client.get("/health", headers={"X-Token": "secret", "X-Device-Id": "d1"})
+    assert ok.status_code == 200
+    assert ok.headers["X-RateLimit-Remaining"] == "1"
+    codes = [
+        client.get(
+            "/health", headers={"X-Token": "secret", "X-Device-Id": device}
+        ).status_code
+        for device in ("d2", "d3")
+    ]
+    assert codes == [200, 429]
@@ -104,5 +104,37 @@ class AssistantEngineTests(unittest.TestCase):
         self.assertFalse(engine._deve_usar_contexto_ideias("Quem é você?"))
 
 
+class AssistantEngineStreamTests(unittest.TestCase):
+    @patch("hermes.assistant.engine.gerar_resposta_stream")
+    def test_responder_mensagem_stream_gera_fragmentos(self, mock_stream):
+        mock_stream.return_value = iter([" Olá", ", tudo", " bem?"])
+        state = ConversationState(user_id=None, history=[])
+
+        fragmentos = list(engine.responder_mensagem_stream("Oi", state))
+
+        self.assertEqual(fragmentos, ["Olá", ", tudo", " bem?"])
+        self.assertEqual(
+            state.history,
+            [
+                {"role": "user", "content": "Oi"},
+                {"role": "assistant", "content": "Olá, tudo bem?"},
+            ],
+        )
+
+    @patch("hermes.assistant.engine.gerar_resposta_stream")
+    def test_responder_mensagem_stream_llm_offline(self, mock_stream):
+        mock_stream.side_effect = engine.LLMError("offline")
+        state = ConversationState(user_id=None, history=[])
+
+        fragmentos = list(engine.responder_mensagem_stream("Oi", state))
+
+        self.assertEqual(fragmentos, [engine._RESPOSTA_LLM_INDISPONIVEL])
+        self.assertEqual(state.history, [])
+
+    def test_agrupar_frases(self):
+        frases = engine.agrupar_frases(["Olá", "! Tudo", " bem? Versão 1.5", " ok"])
+        self.assertEqual(list(frases), ["Olá!", "Tudo bem?", "Versão 1.5 ok"])
+
+
 if __name__ == "__main__":
     unittest.main()
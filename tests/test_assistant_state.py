@@ -12,6 +12,16 @@ class _LLMError(Exception):
 llm_interface_stub = types.ModuleType("hermes.services.llm_interface")
 llm_interface_stub.LLMError = _LLMError
 llm_interface_stub.gerar_resposta = lambda prompt: {"ok": True, "response": ""}
+llm_interface_stub.gerar_resposta_stream = lambda prompt: iter(())
+llm_interface_stub.conversar = lambda mensagens: {"ok": True, "response": ""}
+llm_interface_stub.conversar_stream = lambda mensagens: iter(())
+
+
+async def _gerar_resposta_async(prompt, **kwargs):
+    return {"ok": True, "response": ""}
+
+
+llm_interface_stub.gerar_resposta_async = _gerar_resposta_async
 sys.modules.setdefault("hermes.services.llm_interface", llm_interface_stub)
 
 
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+import pytest
+
+from hermes.services import async_db
+from hermes.services import db as dao
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    db_file = tmp_path / "async.db"
+    monkeypatch.setattr(dao, "DB_PATH", str(db_file))
+    dao.init_db(str(db_file))
+    yield str(db_file)
+    async_db.shutdown()
+
+
+def test_calls_run_on_dedicated_executor(db_path):
+    async def main():
+        return await async_db.run(lambda: threading.current_thread().name)
+
+    assert asyncio.run(main()).startswith("hermes-db")
+
+
+def test_async_dao_roundtrip(db_path):
+    user_id = dao.add_user("Alice", "tipo")
+
+    async def main():
+        ids = await asyncio.gather(
+            *(async_db.add_idea(user_id, f"T{i}", "B") for i in range(10))
+        )
+        page, cursor = await async_db.list_ideas_page(user_id, limit=5)
+        return ids, page, cursor
+
+    ids, page, cursor = asyncio.run(main())
+
+    assert len(set(ids)) == 10
+    assert len(page) == 5 and cursor is not None
+    assert asyncio.run(async_db.get_idea(ids[0]))["title"] == "T0"
@@ -0,0 +1,50 @@
+import pytest
+
+from hermes.assistant.audio import AudioRingBuffer
+
+
+def test_reader_gets_views_without_copying():
+    buf = AudioRingBuffer(8)
+    assert buf.escrever(b"abcdef") == 6
+
+    view = buf.ler(4)
+    assert isinstance(view, memoryview)
+    assert view.obj is buf._dados
+    assert bytes(view) == b"abcd"
+    buf.consumir(len(view))
+    assert buf.pendentes() == 2
+
+
+def test_wrap_around_and_overrun_drop_new_data():
+    buf = AudioRingBuffer(8)
+    buf.escrever(b"abcdef")
+    buf.consumir(4)
+    # 2 pending + 6 free: "ghijkl" fits by wrapping around.
+    assert buf.escrever(b"ghijkl") == 6
+    assert bytes(buf.ler(10)) == b"efgh"  # contiguous part up to the end
+    buf.consumir(4)
+    assert bytes(buf.ler(10)) == b"ijkl"
+
+    # The unread data is never overwritten: the excess is dropped.
+    assert buf.escrever(b"0123456789") == 4
+    assert buf.descartados == 6
+
+
+def test_anteriores_returns_history_still_in_the_ring():
+    buf = AudioRingBuffer(8)
+    buf.escrever(b"abcdef")
+    buf.consumir(6)
+    buf.escrever(b"ghij")
+    buf.consumir(4)
+
+    assert buf.anteriores(buf.posicao_leitura, 3) == b"hij"
+    assert buf.anteriores(6, 4) == b"cdef"
+    # Only the last 8 bytes survive; older audio was overwritten.
+    assert buf.anteriores(buf.posicao_leitura, 100) == b"cdefghij"
+
+
+def test_ler_times_out_without_data():
+    buf = AudioRingBuffer(4)
+    assert buf.ler(4, timeout=0.01) is None
+    with pytest.raises(ValueError):
+        AudioRingBuffer(0)
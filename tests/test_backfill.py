@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from hermes.core import backfill
+from hermes.services import db as dao
+
+
+@pytest.fixture
+def ideas(tmp_path, monkeypatch):
+    db_file = tmp_path / "backfill.db"
+    monkeypatch.setattr(dao, "DB_PATH", str(db_file))
+    dao.init_db(str(db_file))
+    user_id = dao.add_user("Alice", "tipo")
+    ids = [dao.add_idea(user_id, f"Ideia {i}", "Corpo") for i in range(7)]
+    dao.add_idea(user_id, "Já analisada", "Corpo", llm_summary="feito")
+    return ids
+
+
+def _fake_llm(titulo, descricao, url=None, model=None):
+    return {
+        "response": "...",
+        "llm_summary": f"Resumo de {titulo}",
+        "llm_topic": "tema",
+        "tags": "a,b",
+    }
+
+
+def test_analisa_pendentes_em_lotes(ideas, monkeypatch):
+    monkeypatch.setattr(backfill, "analisar_ideia_com_llm", _fake_llm)
+    lotes = []
+    original = dao.update_ideas
+
+    def gravar(updates):
+        lotes.append(len(updates))
+        return original(updates)
+
+    monkeypatch.setattr(dao, "update_ideas", gravar)
+
+    progresso = backfill.analisar_ideias_pendentes(concorrencia=3, lote=3)
+
+    assert (progresso.total, progresso.analisadas, progresso.falhas) == (7, 7, 0)
+    assert lotes == [3, 3, 1]
+    assert dao.count_unanalysed_ideas() == 0
+    assert dao.get_idea(ideas[0])["llm_summary"] == "Resumo de Ideia 0"
+
+
+def test_retoma_de_onde_parou(ideas, monkeypatch):
+    chamadas = []
+
+    def fake(titulo, descricao, **kwargs):
+        chamadas.append(titulo)
+        return _fake_llm(titulo, descricao)
+
+    monkeypatch.setattr(backfill, "analisar_ideia_com_llm", fake)
+
+    backfill.analisar_ideias_pendentes(limite=4, lote=2)
+    assert dao.count_unanalysed_ideas() == 3
+    backfill.analisar_ideias_pendentes(lote=2)
+
+    assert sorted(chamadas) == sorted(f"Ideia {i}" for i in range(7))
+
+
+def test_falhas_ficam_pendentes(ideas, monkeypatch):
+    def fake(titulo, descricao, **kwargs):
+        if titulo == "Ideia 3":
+            raise RuntimeError("offline")
+        return _fake_llm(titulo, descricao)
+
+    monkeypatch.setattr(backfill, "analisar_ideia_com_llm", fake)
+
+    progresso = backfill.analisar_ideias_pendentes(lote=2)
+
+    assert (progresso.analisadas, progresso.falhas) == (6, 1)
+    assert [i["id"] for i in dao.list_unanalysed_ideas()] == [ideas[3]]
+
+
+def test_concorrencia_limitada(ideas, monkeypatch):
+    ativos = 0
+    maximo = 0
+    lock = threading.Lock()
+
+    def fake(titulo, descricao, **kwargs):
+        nonlocal ativos, maximo
+        with lock:
+            ativos += 1
+            maximo = max(maximo, ativos)
+        time.sleep(0.02)
+        with lock:
+            ativos -= 1
+        return _fake_llm(titulo, descricao)
+
+    monkeypatch.setattr(backfill, "analisar_ideia_com_llm", fake)
+
+    backfill.analisar_ideias_pendentes(concorrencia=2)
+
+    assert maximo == 2
@@ -96,13 +96,21 @@ class CoreAppTests(unittest.TestCase):
     def test_criar_lembrete_chama_add_reminder(self) -> None:
         with (
             mock.patch("hermes.core.app.add_reminder", return_value=42) as mock_add,
+            mock.patch("hermes.core.app.reminders.schedule_reminder") as mock_agendar,
             mock.patch("hermes.core.app.reminders.load_pending_reminders") as mock_load,
         ):
             reminder_id = app.criar_lembrete(1, "Lembrar de testar", "2024-01-01T00:00:00")
 
         self.assertEqual(reminder_id, 42)
         mock_add.assert_called_once_with(1, "Lembrar de testar", "2024-01-01T00:00:00")
-        mock_load.assert_called_once()
+        mock_agendar.assert_called_once_with(
+            {
+                "id": 42,
+                "message": "Lembrar de testar",
+                "trigger_at": "2024-01-01T00:00:00",
+            }
+        )
+        mock_load.assert_not_called()
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from hermes.config import config
+from hermes.services import db as dao
+from hermes.services.connection import ConnectionManager
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    db_file = tmp_path / "conn.db"
+    monkeypatch.setattr(dao, "DB_PATH", str(db_file))
+    dao.init_db(str(db_file))
+    return str(db_file)
+
+
+def test_connection_is_reused_within_thread(db_path):
+    manager = ConnectionManager()
+    assert manager.get(db_path) is manager.get(db_path)
+
+
+def test_each_thread_gets_its_own_connection(db_path):
+    manager = ConnectionManager()
+    main_conn = manager.get(db_path)
+    seen = []
+
+    thread = threading.Thread(target=lambda: seen.append(manager.get(db_path)))
+    thread.start()
+    thread.join()
+
+    assert seen and seen[0] is not main_conn
+
+
+def test_pragmas_follow_config(db_path, monkeypatch):
+    monkeypatch.setattr(config, "DB_JOURNAL_MODE", "WAL")
+    monkeypatch.setattr(config, "DB_BUSY_TIMEOUT", 1234)
+    monkeypatch.setattr(config, "DB_CACHE_SIZE", -2048)
+    conn = ConnectionManager().get(db_path)
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2048
+
+
+def test_invalid_journal_mode_is_ignored(db_path, monkeypatch):
+    monkeypatch.setattr(config, "DB_JOURNAL_MODE", "wal; DROP TABLE ideias")
+    conn = ConnectionManager().get(db_path)
+
+    assert conn.execute("SELECT COUNT(*) FROM ideias").fetchone()[0] == 0
+
+
+def test_reset_reopens_connection(db_path):
+    manager = ConnectionManager()
+    first = manager.get(db_path)
+    manager.reset(db_path)
+    assert manager.get(db_path) is not first
+
+
+def test_dao_is_safe_across_threads(db_path):
+    user_id = dao.add_user("Alice", "tipo")
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(20):
+                dao.add_idea(user_id, f"T{n}-{i}", "B")
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(dao.list_ideas(user_id)) == 80
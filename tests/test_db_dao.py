@@ -2,6 +2,7 @@ import sqlite3
 
 import pytest
 
+from hermes.data.migrate import normalize_timestamp
 from hermes.services import db as dao
 
 
@@ -24,6 +25,64 @@ def test_add_idea_inserts_row(setup_db):
     assert row == (idea_id, user_id, "Title", "Body", "web")
 
 
+def test_add_ideas_bulk_returns_ids_in_order(setup_db):
+    user_id, _ = setup_db
+    dao.add_idea(user_id, "Existing", "Body")
+    ideas = [
+        {"user_id": user_id, "title": f"T{i}", "body": "B", "source": "bulk"}
+        for i in range(5)
+    ]
+
+    ids = dao.add_ideas_bulk(ideas)
+
+    assert [dao.get_idea(i)["title"] for i in ids] == [f"T{i}" for i in range(5)]
+    assert dao.search_ideas(user_id, text="T3")[0]["id"] == ids[3]
+    assert dao.add_ideas_bulk([]) == []
+
+
+def test_idempotency_keys_prevent_duplicates(setup_db):
+    user_id, _ = setup_db
+    first = dao.add_idea(user_id, "T", "B", idempotency_key="k1")
+    assert dao.add_idea(user_id, "T", "B", idempotency_key="k1") == first
+
+    ids = dao.add_ideas_bulk(
+        [
+            {"user_id": user_id, "title": "A", "body": "B", "idempotency_key": "k1"},
+            {"user_id": user_id, "title": "C", "body": "B", "idempotency_key": "k2"},
+            {"user_id": user_id, "title": "C", "body": "B", "idempotency_key": "k2"},
+            {"user_id": user_id, "title": "D", "body": "B"},
+        ]
+    )
+
+    assert ids[0] == first and ids[1] == ids[2]
+    assert len(dao.list_ideas(user_id)) == 3
+    assert dao.find_ideas_by_key(user_id, ["k1", "k2", "nope"]) == {
+        "k1": first,
+        "k2": ids[1],
+    }
+
+
+def test_idempotency_keys_are_scoped_per_user(setup_db):
+    alice, _ = setup_db
+    bob = dao.add_user("Bob", "tipo")
+    alice_idea = dao.add_idea(alice, "Alice", "B", idempotency_key="k")
+
+    bob_idea = dao.add_idea(bob, "Bob", "B", idempotency_key="k")
+    ids = dao.add_ideas_bulk(
+        [
+            {"user_id": alice, "title": "A2", "body": "B", "idempotency_key": "j"},
+            {"user_id": bob, "title": "B2", "body": "B", "idempotency_key": "j"},
+        ]
+    )
+
+    assert bob_idea != alice_idea
+    assert dao.get_idea(bob_idea)["user_id"] == bob
+    assert ids[0] != ids[1]
+    assert sorted(i["title"] for i in dao.list_ideas(bob)) == ["B2", "Bob"]
+    assert dao.find_ideas_by_key(alice, ["k"]) == {"k": alice_idea}
+    assert dao.find_ideas_by_key(bob, ["k", "j"]) == {"k": bob_idea, "j": ids[1]}
+
+
 def test_update_idea_updates_row(setup_db):
     user_id, db_path = setup_db
     idea_id = dao.add_idea(user_id, "Old", "Body")
@@ -100,3 +159,94 @@ def test_reminder_crud(setup_db):
             "SELECT triggered_at FROM reminders WHERE id = ?", (rid,)
         ).fetchone()[0]
     assert trig == "2030-01-01T10:05:00"
+
+
+def test_list_pending_reminders_across_users(setup_db):
+    user_id, _ = setup_db
+    other = dao.add_user("Bob", "tipo")
+    late = dao.add_reminder(user_id, "Late", "2030-01-03T10:00:00")
+    early = dao.add_reminder(other, "Early", "2030-01-01T10:00:00")
+    done = dao.add_reminder(other, "Done", "2030-01-02T10:00:00")
+    dao.mark_triggered(done)
+
+    assert [r["id"] for r in dao.list_pending_reminders()] == [early, late]
+    before = dao.list_pending_reminders(before="2030-01-02T00:00:00")
+    assert [r["id"] for r in before] == [early]
+    assert [r["id"] for r in dao.list_pending_reminders(after_id=late)] == [early]
+
+
+def test_mark_triggered_many_skips_fired_reminders(setup_db):
+    user_id, db_path = setup_db
+    ids = [dao.add_reminder(user_id, f"R{i}", "2030-01-01T10:00:00") for i in range(3)]
+    dao.mark_triggered(ids[0])
+
+    assert dao.mark_triggered_many(ids + [ids[1]]) == ids[1:]
+    assert dao.mark_triggered_many(ids) == []
+    assert dao.list_pending_reminders() == []
+
+    with sqlite3.connect(db_path) as conn:
+        stamps = [row[0] for row in conn.execute("SELECT triggered_at FROM reminders")]
+    # Default timestamps use the canonical second-precision format.
+    assert all(normalize_timestamp(t) == t and "." not in t for t in stamps)
+
+
+def test_search_ideas_uses_fts_ranking(setup_db):
+    user_id, db_path = setup_db
+    weak = dao.add_idea(user_id, "Notes", "the garden needs water")
+    strong = dao.add_idea(user_id, "Garden plan", "garden beds and garden tools")
+    dao.add_idea(user_id, "Music", "piano")
+
+    res = dao.search_ideas(user_id, text="gard")
+    assert [r["id"] for r in res] == [strong, weak]
+
+    dao.update_idea(weak, body="nothing here")
+    assert [r["id"] for r in dao.search_ideas(user_id, text="garden")] == [strong]
+
+    dao.delete_idea(strong)
+    assert dao.search_ideas(user_id, text="garden") == []
+
+
+def test_search_ideas_falls_back_to_like_without_fts(setup_db):
+    user_id, db_path = setup_db
+    idea_id = dao.add_idea(user_id, "Kanban", "columns")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE ideias_fts")
+        for trigger in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER ideias_fts_{trigger}")
+    dao._fts_ready.clear()
+
+    assert [r["id"] for r in dao.search_ideas(user_id, text="anba")] == [idea_id]
+
+
+def test_list_ideas_page_walks_all_ideas(setup_db):
+    user_id, db_path = setup_db
+    ids = [dao.add_idea(user_id, f"T{i}", "B") for i in range(7)]
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE ideias SET created_at = '2024-01-01T00:00:00'")
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = dao.list_ideas_page(user_id, after=cursor, limit=3)
+        assert len(page) <= 3
+        seen.extend(idea["id"] for idea in page)
+        if cursor is None:
+            break
+
+    assert seen == sorted(ids, reverse=True)
+    assert [i["id"] for i in dao.iter_ideas(user_id, page_size=2)] == seen
+    assert [i["id"] for i in dao.iter_ideas(user_id, limit=4, page_size=3)] == seen[:4]
+
+
+def test_list_ideas_page_filters_and_rejects_bad_cursor(setup_db):
+    user_id, _ = setup_db
+    dao.add_idea(user_id, "Kanban board", "Tasks")
+    dao.add_idea(user_id, "Garden", "Plant tomatoes")
+    dao.add_idea(dao.add_user("Bob", "tipo"), "Kanban", "Other user")
+
+    page, cursor = dao.list_ideas_page(user_id, text="kanban")
+    assert [i["title"] for i in page] == ["Kanban board"]
+    assert cursor is None
+    assert len(dao.list_ideas_page(None)[0]) == 3
+
+    with pytest.raises(ValueError):
+        dao.list_ideas_page(user_id, after="not-a-cursor")
@@ -0,0 +1,99 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from hermes.services import db as dao
+from hermes.services import jobs
+
+
+@pytest.fixture
+def queue_db(tmp_path, monkeypatch):
+    db_file = tmp_path / "jobs.db"
+    monkeypatch.setattr(dao, "DB_PATH", str(db_file))
+    dao.init_db(str(db_file))
+    yield str(db_file)
+    jobs.stop_workers()
+
+
+def test_claim_runs_each_job_once(queue_db):
+    first, second = jobs.enqueue_many(jobs.ENRICH_IDEA, [1, 2])
+
+    job = jobs.claim()
+    assert (job["id"], job["status"], job["attempts"]) == (first, jobs.RUNNING, 1)
+    assert jobs.claim()["id"] == second
+    assert jobs.claim() is None
+
+    jobs.complete(first)
+    assert jobs.latest_job_for_idea(1)["status"] == jobs.DONE
+
+
+def test_failed_job_is_retried_with_backoff(queue_db, monkeypatch):
+    monkeypatch.setattr(jobs.config, "JOB_RETRY_BACKOFF", 60)
+    monkeypatch.setattr(jobs.config, "JOB_MAX_ATTEMPTS", 2)
+    jobs.enqueue(jobs.ENRICH_IDEA, 1)
+
+    jobs.fail(jobs.claim(), "offline")
+    job = jobs.latest_job_for_idea(1)
+    assert (job["status"], job["last_error"]) == (jobs.PENDING, "offline")
+    assert job["run_after"] > datetime.utcnow().isoformat()
+    assert jobs.claim() is None  # not due yet
+
+    with dao.connections.transaction(queue_db) as conn:
+        conn.execute("UPDATE jobs SET run_after = '2000-01-01T00:00:00'")
+    jobs.fail(jobs.claim(), "offline again")
+    assert jobs.latest_job_for_idea(1)["status"] == jobs.FAILED
+
+
+def test_ideas_and_their_jobs_commit_together(queue_db, monkeypatch):
+    from hermes.core import app
+
+    user_id = dao.add_user("Alice", "tipo")
+    ideia = {"user_id": user_id, "title": "T", "body": "B", "idempotency_key": "k"}
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("crash")
+
+    with monkeypatch.context() as m:
+        m.setattr(jobs, "enqueue_many", crash)
+        with pytest.raises(RuntimeError):
+            app.registrar_ideias([ideia], enriquecer=True)
+    assert dao.find_ideas_by_key(user_id, ["k"]) == {}
+
+    # The client's retry stores the idea and its job.
+    (idea_id,) = app.registrar_ideias([ideia], enriquecer=True)
+    assert app.registrar_ideias([ideia], enriquecer=True) == [idea_id]
+    assert jobs.latest_job_for_idea(idea_id)["status"] == jobs.PENDING
+    assert jobs.claim()["idea_id"] == idea_id and jobs.claim() is None
+
+
+def test_retry_delay_doubles(monkeypatch):
+    monkeypatch.setattr(jobs.config, "JOB_RETRY_BACKOFF", 2)
+    assert [jobs.retry_delay(n) for n in (1, 2, 3)] == [2, 4, 8]
+    assert jobs.retry_delay(50) == jobs.MAX_RETRY_DELAY
+
+
+def test_stale_running_jobs_are_requeued(queue_db):
+    jobs.enqueue(jobs.ENRICH_IDEA, 1)
+    jobs.claim()
+
+    assert jobs.requeue_stale(older_than=timedelta(minutes=1)) == 0
+    assert jobs.requeue_stale(older_than=timedelta(seconds=-1)) == 1
+    assert jobs.claim()["attempts"] == 2
+
+
+def test_workers_process_enqueued_jobs(queue_db):
+    done = threading.Event()
+    seen = []
+
+    def handler(job):
+        seen.append(job["idea_id"])
+        if len(seen) == 3:
+            done.set()
+
+    jobs.register_handler("test", handler)
+    jobs.start_workers(2)
+    jobs.enqueue_many("test", [1, 2, 3])
+
+    assert done.wait(5)
+    assert sorted(seen) == [1, 2, 3]
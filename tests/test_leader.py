@@ -0,0 +1,78 @@
+import pytest
+
+from hermes.services import db as dao
+from hermes.services import leader
+
+
+@pytest.fixture
+def lease_db(tmp_path, monkeypatch):
+    db_file = tmp_path / "leader.db"
+    monkeypatch.setattr(dao, "DB_PATH", str(db_file))
+    dao.init_db(str(db_file))
+    return str(db_file)
+
+
+def test_lease_is_exclusive_until_it_expires(lease_db):
+    assert leader.acquire("sched", "a", ttl=30, now=1000)
+    assert not leader.acquire("sched", "b", ttl=30, now=1010)
+    assert leader.acquire("sched", "a", ttl=30, now=1020)  # renewal
+    assert leader.current_holder("sched", now=1040) == "a"
+
+    # "a" stopped renewing: "b" takes over once the lease expired.
+    assert not leader.acquire("sched", "b", ttl=30, now=1049)
+    assert leader.acquire("sched", "b", ttl=30, now=1050)
+    assert leader.current_holder("sched", now=1051) == "b"
+    assert not leader.acquire("sched", "a", ttl=30, now=1051)
+
+
+def test_release_hands_over_immediately(lease_db):
+    assert leader.acquire("sched", "a", ttl=30, now=1000)
+    leader.release("sched", "b")  # not the holder: no effect
+    assert not leader.acquire("sched", "b", ttl=30, now=1001)
+
+    leader.release("sched", "a")
+    assert leader.current_holder("sched", now=1001) is None
+    assert leader.acquire("sched", "b", ttl=30, now=1001)
+
+
+def test_election_callbacks_follow_leadership(lease_db, monkeypatch):
+    events = []
+    first = leader.LeaderElection(
+        "sched",
+        ttl=30,
+        on_elected=lambda: events.append("elected"),
+        on_renewed=lambda: events.append("renewed"),
+        on_lost=lambda: events.append("lost"),
+    )
+    second = leader.LeaderElection("sched", ttl=30)
+
+    assert first.tick()
+    assert first.tick()
+    assert not second.tick()
+    assert events == ["elected", "renewed"]
+
+    # Another process stole the expired lease while this one was stalled.
+    clock = [0.0]
+    monkeypatch.setattr(leader.time, "time", lambda: clock[0])
+    clock[0] = 10**10
+    assert second.tick()
+    assert not first.tick()
+    assert events == ["elected", "renewed", "lost"]
+
+
+def test_stopping_the_leader_releases_the_lease(lease_db):
+    elected = []
+    election = leader.LeaderElection("sched", ttl=30)
+    election.on_elected = lambda: elected.append(True)
+    election.start()
+    try:
+        for _ in range(100):
+            if elected:
+                break
+            election._stop_event.wait(0.01)
+        assert leader.current_holder("sched") == election.holder
+    finally:
+        election.stop()
+
+    assert not election.is_alive()
+    assert leader.current_holder("sched") is None
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from hermes.services.connection import connections
+from hermes.services.llm_cache import LLMCache, cache_key
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    path = str(tmp_path / "cache.db")
+    yield path
+    connections.reset()
+
+
+def test_key_depends_on_model_prompt_and_options():
+    base = cache_key("m", "prompt")
+    assert cache_key("m", "prompt") == base
+    assert cache_key("other", "prompt") != base
+    assert cache_key("m", "prompt!") != base
+    assert cache_key("m", "prompt", {"url": "x"}) != base
+
+
+def test_memory_lru_eviction():
+    cache = LLMCache(None, ttl=60, max_entries=2, max_rows=10)
+    cache.set("a", "m", "A")
+    cache.set("b", "m", "B")
+    assert cache.get("a") == "A"  # "a" becomes most recently used
+    cache.set("c", "m", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_entries_expire(monkeypatch):
+    cache = LLMCache(None, ttl=10, max_entries=5, max_rows=10)
+    cache.set("a", "m", "A")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_new_instance(cache_path):
+    LLMCache(cache_path, ttl=60, max_entries=5, max_rows=10).set("k", "m", "R")
+
+    fresh = LLMCache(cache_path, ttl=60, max_entries=5, max_rows=10)
+    assert fresh.get("k") == "R"
+    assert fresh.get("k") == "R"
+    stats = fresh.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+
+def test_prune_trims_to_max_rows(cache_path):
+    cache = LLMCache(cache_path, ttl=60, max_entries=0, max_rows=3)
+    for i in range(5):
+        cache.set(f"k{i}", "m", str(i))
+        time.sleep(0.001)
+
+    assert cache.prune() == 2
+    assert cache.get("k0") is None
+    assert cache.get("k4") == "4"
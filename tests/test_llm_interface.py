@@ -1,5 +1,8 @@
 import json
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch
 
 import requests
@@ -16,6 +19,10 @@ def _make_response(payload: dict) -> requests.Response:
 
 
 class TestGerarResposta(unittest.TestCase):
+    def setUp(self) -> None:
+        llm_interface.reset_client()
+        self.addCleanup(llm_interface.reset_client)
+
     @patch("requests.adapters.HTTPAdapter.send")
     def test_resposta_sucesso(self, mock_send):
         mock_send.return_value = _make_response({"response": "ok"})
@@ -79,6 +86,316 @@ class TestGerarResposta(unittest.TestCase):
         self.assertEqual(adapter.max_retries.backoff_factor, 0.3)
 
 
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    connections: set = set()
+
+    def do_POST(self) -> None:  # noqa: N802 - API do http.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.connections.add(self.client_address)
+        body = json.dumps({"response": "ok"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class TestClienteCompartilhado(unittest.TestCase):
+    def setUp(self) -> None:
+        llm_interface.reset_client()
+        self.addCleanup(llm_interface.reset_client)
+
+    def test_cliente_reutilizado_e_recriado_quando_config_muda(self):
+        cliente = llm_interface.get_client()
+        self.assertIs(llm_interface.get_client(), cliente)
+
+        with patch.object(llm_interface.config, "TIMEOUT", 99):
+            self.assertIsNot(llm_interface.get_client(), cliente)
+
+    def test_conexao_keep_alive_reaproveitada(self):
+        if not hasattr(requests, "get"):
+            self.skipTest("requer a biblioteca requests real")
+        _StubHandler.connections = set()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_port}/api/generate"
+
+        for _ in range(5):
+            resultado = llm_interface.gerar_resposta("Oi?", url=url, model="fake")
+            self.assertEqual(resultado["response"], "ok")
+
+        self.assertEqual(len(_StubHandler.connections), 1)
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    linhas: list = []
+    pausa = 0.0
+
+    def do_POST(self) -> None:  # noqa: N802 - API do http.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for linha in self.linhas:
+            dados = json.dumps(linha).encode() + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(dados), dados))
+            self.wfile.flush()
+            time.sleep(self.pausa)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class TestGerarRespostaStream(unittest.TestCase):
+    def setUp(self) -> None:
+        if not hasattr(requests, "get"):
+            self.skipTest("requer a biblioteca requests real")
+        llm_interface.reset_client()
+        self.addCleanup(llm_interface.reset_client)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f"http://127.0.0.1:{server.server_port}/api/generate"
+
+    def test_fragmentos_chegam_antes_do_fim(self):
+        _StreamHandler.pausa = 0.3
+        _StreamHandler.linhas = [
+            {"response": "Olá", "done": False},
+            {"response": " mundo", "done": False},
+            {"response": "", "done": True},
+        ]
+        inicio = time.perf_counter()
+        fragmentos = llm_interface.gerar_resposta_stream(
+            "Oi?", url=self.url, model="fake"
+        )
+
+        primeiro = next(fragmentos)
+        primeiro_em = time.perf_counter() - inicio
+
+        self.assertEqual(primeiro, "Olá")
+        self.assertLess(primeiro_em, 0.25)
+        self.assertEqual(list(fragmentos), [" mundo"])
+
+    def test_erro_no_fluxo(self):
+        _StreamHandler.pausa = 0
+        _StreamHandler.linhas = [{"error": "model not found"}]
+
+        with self.assertRaises(llm_interface.LLMError) as excinfo:
+            list(
+                llm_interface.gerar_resposta_stream("Oi?", url=self.url, model="x")
+            )
+        self.assertEqual(excinfo.exception.code, "model_error")
+
+    def test_conversa_em_fluxo_com_metricas(self):
+        _StreamHandler.pausa = 0
+        _StreamHandler.linhas = [
+            {"message": {"role": "assistant", "content": "Olá"}, "done": False},
+            {
+                "message": {"role": "assistant", "content": ""},
+                "done": True,
+                "prompt_eval_count": 4,
+                "eval_duration": 5_000_000,
+            },
+        ]
+        metricas: dict = {}
+
+        fragmentos = llm_interface.conversar_stream(
+            [{"role": "user", "content": "Oi?"}],
+            url=self.url,
+            model="fake",
+            metricas=metricas,
+        )
+
+        self.assertEqual(list(fragmentos), ["Olá"])
+        self.assertEqual(metricas, {"prompt_eval_count": 4, "eval_ms": 5.0})
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    recebidos: list = []
+
+    def do_POST(self) -> None:  # noqa: N802 - API do http.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.recebidos.append((self.path, payload))
+        body = json.dumps(
+            {
+                "message": {"role": "assistant", "content": " oi "},
+                "done": True,
+                "prompt_eval_count": 12,
+                "prompt_eval_duration": 3_000_000,
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class TestConversar(unittest.TestCase):
+    def setUp(self) -> None:
+        if not hasattr(requests, "get"):
+            self.skipTest("requer a biblioteca requests real")
+        llm_interface.reset_client()
+        self.addCleanup(llm_interface.reset_client)
+        _ChatHandler.recebidos = []
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base = f"http://127.0.0.1:{server.server_port}"
+
+    def test_mensagens_keep_alive_e_metricas(self):
+        mensagens = [
+            {"role": "system", "content": "Sistema"},
+            {"role": "user", "content": "Oi?"},
+        ]
+        with patch.object(llm_interface.config, "OLLAMA_URL", self.base), patch.object(
+            llm_interface.config, "OLLAMA_KEEP_ALIVE", "-1"
+        ):
+            resultado = llm_interface.conversar(mensagens, model="fake")
+
+        self.assertEqual(resultado["response"], "oi")
+        self.assertEqual(
+            resultado["metricas"], {"prompt_eval_count": 12, "prompt_eval_ms": 3.0}
+        )
+        caminho, payload = _ChatHandler.recebidos[0]
+        self.assertEqual(caminho, "/api/chat")
+        self.assertEqual(payload["messages"], mensagens)
+        self.assertEqual(payload["keep_alive"], -1)
+        self.assertFalse(payload["stream"])
+
+
+class _FlakyHandler(_StubHandler):
+    falhas = 0
+
+    def do_POST(self) -> None:  # noqa: N802 - API do http.server
+        if _FlakyHandler.falhas > 0:
+            _FlakyHandler.falhas -= 1
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        super().do_POST()
+
+
+class TestGerarRespostaAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        _StubHandler.connections = set()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f"http://127.0.0.1:{server.server_port}/api/generate"
+
+    async def asyncTearDown(self) -> None:
+        await llm_interface.aclose_async_client()
+
+    async def test_respostas_concorrentes_compartilham_pool(self):
+        import asyncio
+
+        with patch.object(llm_interface.config, "LLM_POOL_SIZE", 2):
+            resultados = await asyncio.gather(
+                *(
+                    llm_interface.gerar_resposta_async("Oi?", url=self.url, model="x")
+                    for _ in range(10)
+                )
+            )
+
+        self.assertEqual({r["response"] for r in resultados}, {"ok"})
+        self.assertLessEqual(len(_StubHandler.connections), 2)
+
+    async def test_repete_status_temporario(self):
+        _FlakyHandler.falhas = 2
+        with patch.object(llm_interface.config, "BACKOFF_FACTOR", 0):
+            resultado = await llm_interface.gerar_resposta_async(
+                "Oi?", url=self.url, model="x"
+            )
+        self.assertEqual(resultado["response"], "ok")
+
+    async def test_falha_conexao(self):
+        with patch.object(llm_interface.config, "MAX_RETRIES", 0):
+            with self.assertRaises(llm_interface.LLMError) as excinfo:
+                await llm_interface.gerar_resposta_async(
+                    "Oi?", url="http://127.0.0.1:9/api/generate", model="x"
+                )
+        self.assertEqual(excinfo.exception.code, "ConnectionError")
+
+
+class TestCacheRespostas(unittest.TestCase):
+    def setUp(self) -> None:
+        import tempfile
+
+        from hermes.services import db
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for nome, valor in {"LLM_CACHE_ENABLED": True, "MAX_RETRIES": 0}.items():
+            patcher = patch.object(llm_interface.config, nome, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(db, "DB_PATH", f"{tmp.name}/hermes.db")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        llm_interface.reset_client()
+        llm_interface.reset_cache()
+        self.addCleanup(llm_interface.reset_cache)
+        self.addCleanup(llm_interface.reset_client)
+
+    @patch("requests.adapters.HTTPAdapter.send")
+    def test_prompt_repetido_usa_cache(self, mock_send):
+        mock_send.return_value = _make_response({"response": " ok "})
+
+        for _ in range(3):
+            result = llm_interface.gerar_resposta("Oi?", url="http://t", model="m")
+            self.assertEqual(result["response"], "ok")
+
+        self.assertEqual(mock_send.call_count, 1)
+        stats = llm_interface.cache_stats()
+        self.assertEqual((stats["misses"], stats["memory_hits"]), (1, 2))
+
+    @patch("requests.adapters.HTTPAdapter.send")
+    def test_modelo_diferente_nao_compartilha_cache(self, mock_send):
+        mock_send.side_effect = lambda *a, **k: _make_response({"response": "ok"})
+
+        llm_interface.gerar_resposta("Oi?", url="http://t", model="a")
+        llm_interface.gerar_resposta("Oi?", url="http://t", model="b")
+
+        self.assertEqual(mock_send.call_count, 2)
+
+    @patch("requests.adapters.HTTPAdapter.send")
+    def test_use_cache_false_ignora_cache(self, mock_send):
+        mock_send.side_effect = lambda *a, **k: _make_response({"response": "ok"})
+
+        for _ in range(2):
+            llm_interface.gerar_resposta(
+                "Oi?", url="http://t", model="m", use_cache=False
+            )
+
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual(llm_interface.cache_stats()["stores"], 0)
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -2,7 +2,14 @@ import runpy
 import sqlite3
 import sys
 
-from hermes.data.migrate import migrate_to_v2
+from hermes.data.migrate import (
+    SCHEMA_VERSION,
+    get_schema_version,
+    migrate,
+    migrate_fts,
+    migrate_to_v2,
+    normalize_timestamp,
+)
 
 
 def create_v1_schema(path: str) -> None:
@@ -48,3 +55,89 @@ def test_migration_cli(tmp_path, monkeypatch):
         )
         assert cur.fetchone() is not None
     assert {"source", "llm_summary", "llm_topic", "tags"}.issubset(cols)
+
+
+def test_migrate_backfills_fts_in_chunks(tmp_path):
+    db = tmp_path / "fts.db"
+    create_v1_schema(str(db))
+    with sqlite3.connect(str(db)) as conn:
+        conn.executemany(
+            "INSERT INTO ideias (user_id, title, body) VALUES (1, ?, ?)",
+            [(f"Idea {i}", f"word{i}") for i in range(25)],
+        )
+
+    migrate_to_v2(str(db))
+
+    with sqlite3.connect(str(db)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ideias_fts").fetchone()[0] == 25
+        hit = conn.execute(
+            "SELECT rowid FROM ideias_fts WHERE ideias_fts MATCH 'word7'"
+        ).fetchall()
+        assert hit == [(8,)]
+        assert conn.execute("SELECT * FROM ideias_fts_backfill").fetchall() == []
+
+
+def test_fts_backfill_resumes(tmp_path):
+    db = tmp_path / "resume.db"
+    create_v1_schema(str(db))
+    with sqlite3.connect(str(db)) as conn:
+        conn.executemany(
+            "INSERT INTO ideias (user_id, title, body) VALUES (1, ?, ?)",
+            [(f"Idea {i}", "body") for i in range(10)],
+        )
+    migrate_to_v2(str(db))
+    with sqlite3.connect(str(db)) as conn:
+        # Simulate a backfill interrupted after the first four rows.
+        conn.execute("DELETE FROM ideias_fts WHERE rowid > 4")
+        conn.execute("INSERT INTO ideias_fts_backfill VALUES (1, 4, 10)")
+
+    assert migrate_fts(str(db), chunk_size=3)
+
+    with sqlite3.connect(str(db)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM ideias_fts").fetchone()[0] == 10
+
+
+def test_normalize_timestamp():
+    assert normalize_timestamp("2024-01-01 10:00:00") == "2024-01-01T10:00:00"
+    assert normalize_timestamp("2024-01-01T12:00:00+02:00") == "2024-01-01T10:00:00"
+    assert normalize_timestamp("2024-01-01T10:00:00Z") == "2024-01-01T10:00:00"
+    assert normalize_timestamp("not a date") == "not a date"
+    assert normalize_timestamp(None) is None
+
+
+def test_migrate_to_v3_normalizes_and_indexes(tmp_path):
+    db = tmp_path / "v3.db"
+    create_v1_schema(str(db))
+    with sqlite3.connect(str(db)) as conn:
+        conn.execute(
+            "INSERT INTO ideias (user_id, title, body, created_at) "
+            "VALUES (1, 'T', 'B', '2024-01-01 10:00:00')"
+        )
+
+    migrate(str(db))
+    migrate(str(db))  # idempotent
+
+    assert get_schema_version(str(db)) == SCHEMA_VERSION
+    with sqlite3.connect(str(db)) as conn:
+        created = conn.execute("SELECT created_at FROM ideias").fetchone()[0]
+        indexes = {
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        }
+    assert created == "2024-01-01T10:00:00"
+    assert {"idx_ideias_user_created", "idx_reminders_user_pending"} <= indexes
+
+
+def test_migrate_creates_job_queue_idea_keys_and_leases(tmp_path):
+    db = tmp_path / "v4.db"
+    create_v1_schema(str(db))
+
+    migrate(str(db))
+
+    with sqlite3.connect(str(db)) as conn:
+        tables = {
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        }
+    assert {"jobs", "idea_keys", "leases"} <= tables
+    assert get_schema_version(str(db)) == SCHEMA_VERSION
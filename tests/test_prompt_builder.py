@@ -0,0 +1,119 @@
+import threading
+
+from hermes.assistant import engine, prompt_builder
+from hermes.assistant.state import ConversationState
+
+CONTEXTO = "Ideias relacionadas:\n- primeira ideia\n- segunda ideia\n- terceira ideia"
+
+
+def _historico(n):
+    return [{"role": "user", "content": f"mensagem {i:02d}"} for i in range(n)]
+
+
+def test_retrieval_runs_in_pool_and_stages_are_traced(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "carregar_prompt_sistema", lambda: "Sistema")
+    threads = []
+
+    def recuperar(user_id, pergunta):
+        threads.append(threading.current_thread())
+        return {"contexto": CONTEXTO, "ideias": [1, 2, 3]}
+
+    montado = prompt_builder.montar_prompt(
+        "e meus projetos?", user_id=7, historico=_historico(2), recuperar=recuperar
+    )
+
+    assert threads and threads[0] is not threading.current_thread()
+    assert montado.texto.startswith("Sistema\n\nContexto: responda")
+    assert "- terceira ideia" in montado.texto
+    assert montado.texto.endswith("Usuário: e meus projetos?\n\nHermes:")
+    trace = montado.trace
+    assert {"deteccao", "recuperacao", "espera_contexto", "total"} <= set(trace.etapas)
+    assert trace.ideias == 3 and trace.cortes == {}
+    assert trace.caracteres["total"] == len(montado.texto)
+
+
+def test_budget_drops_least_relevant_ideas_and_oldest_history():
+    historico = prompt_builder._linhas_historico(_historico(10))
+    trace = prompt_builder.TracePrompt()
+
+    contexto, texto_historico = prompt_builder.aplicar_orcamento(
+        CONTEXTO, historico, 120, trace
+    )
+
+    # The context may use half the budget: header plus the two best ideas.
+    assert contexto == "Ideias relacionadas:\n- primeira ideia\n- segunda ideia"
+    assert texto_historico.endswith("- Usuário: mensagem 09")
+    assert "mensagem 08" in texto_historico and "mensagem 07" not in texto_historico
+    assert trace.cortes == {"contexto": 1, "historico": 8}
+
+
+def test_skipped_retrieval_and_cached_prefix(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "carregar_prompt_sistema", lambda: "Sistema")
+    prompt_builder._prefixo.cache_clear()
+
+    def recuperar(user_id, pergunta):
+        raise AssertionError("not needed")
+
+    for _ in range(2):
+        montado = prompt_builder.montar_prompt(
+            "conte uma piada",
+            user_id=7,
+            recuperar=recuperar,
+            usar_contexto=lambda pergunta: False,
+        )
+
+    assert "recuperacao" not in montado.trace.etapas
+    assert prompt_builder._prefixo.cache_info().hits == 1
+
+
+def test_responder_sobre_ideias_returns_trace(monkeypatch):
+    monkeypatch.setattr(
+        engine, "coletar_contexto_ideias", lambda u, p: {"contexto": CONTEXTO}
+    )
+    prompts = []
+
+    def gerar(prompt, **kwargs):
+        prompts.append(prompt)
+        return {"ok": True, "response": " análise "}
+
+    monkeypatch.setattr(engine, "gerar_resposta", gerar)
+    state = ConversationState(user_id=3)
+
+    resposta = engine.responder_sobre_ideias_com_trace("o que priorizar?", 3, state)
+
+    assert resposta.texto == "análise"
+    assert "llm" in resposta.trace.etapas
+    assert "Tarefa: atue como consultor" in prompts[0]
+    assert prompts[0].index("- primeira ideia") < prompts[0].index("Tarefa:")
+    assert state.history[-1] == {"role": "assistant", "content": "análise"}
+
+
+def test_chat_messages_keep_a_stable_prefix_across_turns(monkeypatch):
+    monkeypatch.setattr(engine.config, "OLLAMA_CHAT_API", True)
+    monkeypatch.setattr(engine, "_carregar_prompt_sistema", lambda: "Sistema")
+    monkeypatch.setattr(
+        engine, "coletar_contexto_ideias", lambda u, p: {"contexto": CONTEXTO}
+    )
+    enviadas = []
+
+    def conversar(mensagens, **kwargs):
+        enviadas.append(mensagens)
+        metricas = {"prompt_eval_count": 5.0 * len(enviadas), "prompt_eval_ms": 2.0}
+        return {"ok": True, "response": "certo", "metricas": metricas}
+
+    monkeypatch.setattr(engine, "conversar", conversar)
+    state = ConversationState(user_id=7, history=_historico(2))
+
+    engine.responder_mensagem("e os projetos?", state)
+    resposta = engine.responder_mensagem_com_trace("e os planos?", state)
+
+    primeira, segunda = enviadas
+    assert primeira[0]["role"] == "system"
+    assert primeira[1:3] == state.history[:2]
+    assert primeira[-1]["content"].startswith("Ideias relacionadas:")
+    assert primeira[-1]["content"].endswith("e os projetos?")
+    # Only the context and question of the previous turn change.
+    assert segunda[: len(primeira) - 1] == primeira[:-1]
+    assert segunda[len(primeira) - 1 :][:2] == state.history[2:4]
+    assert state.llm_metrics == {"prompt_eval_count": 10.0, "prompt_eval_ms": 2.0}
+    assert resposta.trace.llm == state.llm_metrics
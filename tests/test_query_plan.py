@@ -0,0 +1,85 @@
+import re
+
+import pytest
+
+from hermes.services import db as dao
+from hermes.services.connection import connections
+
+DATA_QUERY = re.compile(r"^\s*SELECT .* FROM (ideias|reminders)\b", re.S)
+
+
+@pytest.fixture
+def populated_db(tmp_path, monkeypatch):
+    db_file = tmp_path / "plan.db"
+    monkeypatch.setattr(dao, "DB_PATH", str(db_file))
+    dao.init_db(str(db_file))
+    users = [dao.add_user(name, "tipo") for name in ("Alice", "Bob", "Carol")]
+    for user in users:
+        for i in range(50):
+            dao.add_idea(user, f"Idea {i}", "Body", llm_topic="work", tags="a,b")
+            dao.add_reminder(user, f"Reminder {i}", f"2030-01-01T10:{i:02d}:00")
+    conn = connections.get(str(db_file))
+    conn.execute("ANALYZE")
+    return users[0], conn
+
+
+def _traced_selects(conn, calls):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        for call in calls:
+            call()
+    finally:
+        conn.set_trace_callback(None)
+    # Only the DAO's data queries; schema probes hit tiny bookkeeping tables.
+    return [s for s in statements if DATA_QUERY.search(s)]
+
+
+def _full_scans(conn, statement):
+    plan = conn.execute("EXPLAIN QUERY PLAN " + statement).fetchall()
+    return [
+        row["detail"]
+        for row in plan
+        if row["detail"].startswith("SCAN") and "VIRTUAL TABLE" not in row["detail"]
+    ]
+
+
+def test_dao_queries_use_indexes(populated_db):
+    user_id, conn = populated_db
+    statements = _traced_selects(
+        conn,
+        [
+            lambda: dao.list_ideas(user_id),
+            lambda: dao.search_ideas(user_id),
+            lambda: dao.search_ideas(user_id, text="idea"),
+            lambda: dao.search_ideas(user_id, topic="work", tag="a"),
+            lambda: list(dao.iter_ideas(user_id, page_size=20)),
+            lambda: list(dao.iter_ideas(user_id, page_size=20, text="idea")),
+            lambda: dao.list_reminders(user_id),
+            lambda: dao.list_reminders(user_id, only_pending=True),
+            lambda: dao.list_pending_reminders(before="2030-01-01T10:30:00"),
+        ],
+    )
+
+    assert statements
+    for statement in statements:
+        assert _full_scans(conn, statement) == [], statement
+
+
+def test_pending_reminders_need_no_sort(populated_db):
+    user_id, conn = populated_db
+    (statement,) = _traced_selects(
+        conn, [lambda: dao.list_reminders(user_id, only_pending=True)]
+    )
+    plan = [row["detail"] for row in conn.execute("EXPLAIN QUERY PLAN " + statement)]
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
+
+
+def test_global_pending_reminders_need_no_sort(populated_db):
+    _, conn = populated_db
+    (statement,) = _traced_selects(
+        conn, [lambda: dao.list_pending_reminders(before="2030-01-01T10:30:00")]
+    )
+    plan = [row["detail"] for row in conn.execute("EXPLAIN QUERY PLAN " + statement)]
+    assert any("idx_reminders_pending" in detail for detail in plan), plan
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
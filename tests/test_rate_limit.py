@@ -0,0 +1,50 @@
+import pytest
+
+from hermes.services.connection import connections
+from hermes.services.rate_limit import MemoryRateLimiter, SQLiteRateLimiter
+
+
+def test_bucket_allows_burst_then_refills():
+    limiter = MemoryRateLimiter(rate=1, capacity=3)
+
+    assert [limiter.hit("a", now=0).allowed for _ in range(4)] == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    rejected = limiter.hit("a", now=0)
+    assert rejected.retry_after == pytest.approx(1)
+    assert limiter.hit("a", now=1).allowed
+    assert limiter.hit("b", now=1).allowed  # separate bucket
+
+
+def test_no_double_burst_at_window_boundary():
+    limiter = MemoryRateLimiter(rate=1, capacity=60)
+    allowed = sum(limiter.hit("a", now=59.9).allowed for _ in range(60))
+    allowed += sum(limiter.hit("a", now=60.1).allowed for _ in range(60))
+    assert allowed == 60
+
+
+def test_idle_buckets_are_evicted():
+    limiter = MemoryRateLimiter(rate=1, capacity=5)
+    for i in range(1000):
+        limiter.hit(f"client-{i}", now=0)
+    assert len(limiter) == 1000
+
+    limiter.hit("late", now=10)
+
+    assert len(limiter) == 1
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "limits.db")
+    worker_a = SQLiteRateLimiter(rate=1, capacity=2, db_path=path)
+    worker_b = SQLiteRateLimiter(rate=1, capacity=2, db_path=path)
+    try:
+        assert worker_a.hit("k", now=100).allowed
+        assert worker_b.hit("k", now=100).allowed
+        assert not worker_a.hit("k", now=100).allowed
+        assert worker_b.hit("k", now=101).allowed
+    finally:
+        connections.reset(path)
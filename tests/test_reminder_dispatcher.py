@@ -0,0 +1,94 @@
+import threading
+from datetime import datetime, timedelta
+
+from hermes.services import reminder_dispatcher
+from hermes.services.reminder_dispatcher import ReminderDispatcher
+
+NOW = datetime(2030, 1, 1, 12, 0, 0)
+
+
+def _reminder(reminder_id, delta):
+    return {
+        "id": reminder_id,
+        "message": f"R{reminder_id}",
+        "trigger_at": (NOW + delta).isoformat(),
+    }
+
+
+class FakeStore:
+    def __init__(self, reminders):
+        self.reminders = {r["id"]: r for r in reminders}
+        self.loads = []
+        self.fired = []
+        self.event = threading.Event()
+
+    def load(self, before):
+        self.loads.append(before)
+        return sorted(
+            (r for r in self.reminders.values() if r["trigger_at"] < before),
+            key=lambda r: r["trigger_at"],
+        )
+
+    def fire(self, batch):
+        self.fired.append([r["id"] for r in batch])
+        for reminder in batch:
+            self.reminders.pop(reminder["id"], None)
+        self.event.set()
+
+
+def _dispatcher(store, clock):
+    dispatcher = ReminderDispatcher(
+        store.load, store.fire, window=timedelta(hours=1)
+    )
+    dispatcher._now = lambda: clock[0]
+    return dispatcher
+
+
+def test_overdue_reminders_fire_in_one_batch(monkeypatch):
+    monkeypatch.setattr(reminder_dispatcher, "MAX_SLEEP", 0.01)
+    store = FakeStore(
+        [
+            _reminder(1, -timedelta(hours=5)),
+            _reminder(2, -timedelta(minutes=1)),
+            _reminder(3, timedelta(minutes=10)),
+        ]
+    )
+    clock = [NOW]
+    dispatcher = _dispatcher(store, clock)
+    dispatcher.start()
+    try:
+        assert store.event.wait(2)
+        assert store.fired == [[1, 2]]
+        assert len(dispatcher) == 1
+    finally:
+        dispatcher.shutdown()
+
+
+def test_only_the_window_is_kept_in_memory(monkeypatch):
+    monkeypatch.setattr(reminder_dispatcher, "MAX_SLEEP", 0.01)
+    store = FakeStore(
+        [_reminder(1, timedelta(minutes=30)), _reminder(2, timedelta(hours=3))]
+    )
+    clock = [NOW]
+    dispatcher = _dispatcher(store, clock)
+    dispatcher.start()
+    try:
+        for _ in range(200):
+            if len(dispatcher):
+                break
+            store.event.wait(0.01)
+        assert store.loads[0] == (NOW + timedelta(hours=1)).isoformat()
+        assert len(dispatcher) == 1
+
+        dispatcher.add(_reminder(3, timedelta(minutes=5)))
+        dispatcher.add(_reminder(4, timedelta(hours=2)))  # beyond the window
+        assert len(dispatcher) == 2
+
+        # The clock jumps forward: the window moves on and everything that
+        # became overdue fires in a single batch.
+        clock[0] = NOW + timedelta(hours=3, minutes=1)
+        assert store.event.wait(2)
+        assert store.fired == [[3, 1, 2]]
+        assert store.loads[-1] == (clock[0] + timedelta(hours=1)).isoformat()
+    finally:
+        dispatcher.shutdown()
@@ -1,8 +1,9 @@
 import importlib
 import pathlib
 import sys
+import threading
 import types
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import pytest
 
@@ -14,12 +15,14 @@ class DummyScheduler:
 
     def __init__(self):
         self.jobs: list[tuple] = []
+        self.run_dates: list[datetime] = []
 
     def start(self):
         pass
 
     def add_job(self, func, trigger, run_date, args, id, replace_existing):
         self.jobs.append((func, args))
+        self.run_dates.append(run_date)
 
     def run_jobs(self):
         for func, args in self.jobs:
@@ -73,6 +76,7 @@ def reminder_env(tmp_path, monkeypatch):
 
     yield user_id, scheduler, alerts
     reminders._scheduler = None
+    reminders._last_loaded_id = 0
 
 
 def test_reminder_trigger_and_listing(reminder_env):
@@ -104,3 +108,67 @@ def test_reminder_trigger_and_listing(reminder_env):
     assert listed[0]["triggered_at"] is not None
 
     assert db.list_reminders(user_id, only_pending=True) == []
+
+
+def test_reminder_fires_once_when_schedulers_overlap(reminder_env):
+    user_id, scheduler, alerts = reminder_env
+    trigger_at = (datetime.utcnow() + timedelta(minutes=1)).isoformat()
+    reminder_id = db.add_reminder(user_id, "Ping", trigger_at)
+
+    # Old and new leader both run the job during a failover.
+    reminders._run_reminder(reminder_id, "Ping")
+    reminders._run_reminder(reminder_id, "Ping")
+
+    assert alerts == ["Ping"]
+
+
+def test_reload_only_schedules_new_reminders(reminder_env):
+    user_id, scheduler, alerts = reminder_env
+    trigger_at = (datetime.utcnow() + timedelta(minutes=1)).isoformat()
+    first = db.add_reminder(user_id, "First", trigger_at)
+
+    reminders.start_scheduler()
+    assert [args[0] for _, args in scheduler.jobs] == [first]
+
+    # Created by another process: picked up by the next incremental load.
+    second = db.add_reminder(user_id, "Second", trigger_at)
+    reminders.load_new_reminders()
+    reminders.load_new_reminders()
+    assert [args[0] for _, args in scheduler.jobs] == [first, second]
+
+
+def test_reminder_with_offset_fires_at_the_same_instant(reminder_env):
+    user_id, scheduler, alerts = reminder_env
+    db.add_reminder(user_id, "Ping", "2030-01-01T12:00:00-03:00")
+
+    reminders.start_scheduler()
+
+    # Stored as naive UTC, but scheduled as an aware instant so a scheduler
+    # running in local time does not shift it by the host's UTC offset.
+    assert db.list_reminders(user_id)[0]["trigger_at"] == "2030-01-01T15:00:00"
+    (run_date,) = scheduler.run_dates
+    assert run_date.tzinfo is not None
+    expected = datetime(2030, 1, 1, 12, tzinfo=timezone(timedelta(hours=-3)))
+    assert run_date == expected
+
+
+def test_heap_backend_marks_overdue_reminders_in_bulk(reminder_env, monkeypatch):
+    user_id, scheduler, alerts = reminder_env
+    monkeypatch.setattr(config, "REMINDER_BACKEND", "heap")
+    past = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    ids = [db.add_reminder(user_id, f"Late {i}", past) for i in range(3)]
+    db.mark_triggered(ids[0])
+
+    dispatcher = reminders.start_scheduler()
+    try:
+        for _ in range(200):
+            if len(alerts) == 2:
+                break
+            threading.Event().wait(0.01)
+    finally:
+        reminders.stop_scheduler()
+        dispatcher.join(2)
+
+    assert scheduler.jobs == []  # APScheduler not involved
+    assert sorted(alerts) == ["Late 1", "Late 2"]
+    assert db.list_reminders(user_id, only_pending=True) == []
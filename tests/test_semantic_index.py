@@ -0,0 +1,120 @@
+import importlib
+import sqlite3
+
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("scipy")
+
+from hermes.services import db as dao  # noqa: E402
+
+ss = importlib.import_module("hermes.services.semantic_search")
+
+
+@pytest.fixture
+def user_db(tmp_path, monkeypatch):
+    db_file = tmp_path / "index.db"
+    monkeypatch.setattr(dao, "DB_PATH", str(db_file))
+    dao.init_db(str(db_file))
+    user_id = dao.add_user("Alice", "tipo")
+    dao.add_idea(user_id, "Kanban", "Manage tasks with kanban columns")
+    dao.add_idea(user_id, "Garden", "Plant tomatoes in the garden")
+    return user_id, str(db_file)
+
+
+def _forbid_fit(monkeypatch):
+    def fail(self, documents, ids):
+        raise AssertionError("index was refitted")
+
+    monkeypatch.setattr(ss.TfidfVectorIndex, "fit", fail)
+
+
+def test_index_is_persisted_and_reused(user_db, monkeypatch):
+    user_id, db_path = user_db
+
+    results = ss.semantic_search("kanban", user_id=user_id)
+    assert results[0]["title"] == "Kanban"
+    ss.save_indexes()
+    assert (ss._index_path(db_path, user_id)).exists()
+
+    ss._cache.clear()
+    _forbid_fit(monkeypatch)
+    results = ss.semantic_search("tomatoes", user_id=user_id)
+    assert results[0]["title"] == "Garden"
+
+
+def test_writes_update_index_incrementally(user_db, monkeypatch):
+    user_id, _ = user_db
+    ss.semantic_search("kanban", user_id=user_id)
+    _forbid_fit(monkeypatch)
+
+    new_id = dao.add_idea(user_id, "Board", "A kanban board for the garden")
+    assert new_id in ss.get_user_index(user_id).ids
+
+    kanban_id = ss.semantic_search("kanban", user_id=user_id, limit=1)[0]["id"]
+    dao.delete_idea(kanban_id)
+    assert kanban_id not in ss.get_user_index(user_id).ids
+    assert ss.semantic_search("kanban", user_id=user_id)[0]["id"] == new_id
+
+
+def test_external_write_invalidates_index(user_db):
+    user_id, db_path = user_db
+    ss.semantic_search("kanban", user_id=user_id)
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO ideias (user_id, title, body) VALUES (?, ?, ?)",
+            (user_id, "Piano", "Practice piano scales"),
+        )
+
+    results = ss.semantic_search("piano", user_id=user_id, limit=1)
+    assert results[0]["title"] == "Piano"
+
+
+def test_writes_do_not_mutate_an_index_being_searched(user_db):
+    user_id, _ = user_db
+    index = ss.get_user_index(user_id)
+    ids, rows = list(index.ids), index.matrix.shape[0]
+
+    new_id = dao.add_idea(user_id, "Board", "A kanban board for the garden")
+    dao.delete_idea(ids[0])
+
+    assert index.ids == ids and index.matrix.shape[0] == rows
+    updated = ss.get_user_index(user_id)
+    assert updated is not index
+    assert new_id in updated.ids and ids[0] not in updated.ids
+    assert updated.matrix.shape[0] == len(updated.ids)
+
+
+def test_batch_writes_update_cached_index_without_disk_io(user_db, monkeypatch):
+    user_id, db_path = user_db
+    ss.semantic_search("kanban", user_id=user_id)
+    ss.save_indexes()
+    _forbid_fit(monkeypatch)
+
+    def no_disk(*args):
+        raise AssertionError("index touched the disk during a write")
+
+    with monkeypatch.context() as m:
+        m.setattr(ss, "_load", no_disk)
+        m.setattr(ss, "_save", no_disk)
+        ids = dao.add_ideas_bulk(
+            [
+                {"user_id": user_id, "title": "Board", "body": "kanban board"},
+                {"user_id": user_id, "title": "Seeds", "body": "tomato seeds"},
+            ]
+        )
+        dao.update_ideas([(ids[1], {"title": "Kanban seeds"})])
+        index = ss.get_user_index(user_id)
+
+    assert set(ids) <= set(index.ids) and len(index.ids) == 4
+    assert ss._cache[(db_path, user_id)].version == dao.get_idea_version(user_id)
+
+    # Users without a cached index are not loaded by writes.
+    other = dao.add_user("Bob", "tipo")
+    dao.add_idea(other, "Piano", "Practice scales")
+    assert (db_path, other) not in ss._cache
+
+    ss.save_indexes()
+    ss._cache.clear()
+    assert set(ids) <= set(ss.get_user_index(user_id).ids)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from hermes.services import stt
+
+
+class FakeModel:
+    loads = 0
+
+    def __init__(self, *args, **kwargs):
+        time.sleep(0.05)  # long enough for concurrent callers to overlap
+        FakeModel.loads += 1
+
+
+class FakeRecognizer:
+    def __init__(self, model, samplerate):
+        self.model = model
+        self.samplerate = samplerate
+        self.accepted = []
+        self.resets = 0
+
+    def AcceptWaveform(self, data):
+        self.accepted.append(data)
+        return False
+
+    def FinalResult(self):
+        return '{"text": ""}'
+
+    def Reset(self):
+        self.resets += 1
+
+
+@pytest.fixture(autouse=True)
+def fake_vosk(monkeypatch):
+    FakeModel.loads = 0
+    monkeypatch.setattr(stt.vosk, "Model", FakeModel)
+    monkeypatch.setattr(stt.vosk, "KaldiRecognizer", FakeRecognizer)
+    monkeypatch.setattr(stt, "_VOSK_MODEL", None)
+    monkeypatch.setattr(stt, "_pools", {})
+
+
+def test_concurrent_callers_load_the_model_once():
+    models = []
+    threads = [
+        threading.Thread(target=lambda: models.append(stt.get_vosk_model()))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert FakeModel.loads == 1
+    assert len({id(model) for model in models}) == 1
+
+
+def test_pool_resets_and_reuses_recognizers():
+    pool = stt.RecognizerPool(FakeModel(), 8000, tamanho=1)
+
+    with pool.reconhecedor() as first:
+        second = pool.obter()
+    pool.devolver(second)  # pool already holds one idle recognizer
+
+    assert first.resets == 1 and second.resets == 1
+    assert len(pool) == 1 and pool.criados == 2
+    assert pool.obter() is first
+
+
+def test_preload_warms_up_a_pooled_recognizer():
+    thread = stt.preload_vosk_model(samplerate=8000)
+    thread.join(5)
+
+    pool = stt.get_recognizer_pool(8000)
+    recognizer = pool.obter()
+    assert FakeModel.loads == 1 and pool.criados == 1
+    assert recognizer.accepted == [b"\0" * 8000]  # 0.5 s of silence
+    assert recognizer.resets == 1
@@ -0,0 +1,122 @@
+import json
+import wave
+
+import numpy as np
+import pytest
+
+from hermes.core import transcricao
+from hermes.services import db as dao
+from hermes.services import jobs, stt
+
+
+class FakeRecognizer:
+    """Hears "ola" in every block that is not silent."""
+
+    received: list[int] = []
+
+    def __init__(self, model, samplerate):
+        self.samplerate = samplerate
+
+    def AcceptWaveform(self, data):
+        FakeRecognizer.received.append(len(data))
+        self._text = "ola" if any(data) else ""
+        return True
+
+    def Result(self):
+        return json.dumps({"text": self._text})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+    def Reset(self):
+        pass
+
+
+@pytest.fixture
+def memos(tmp_path, monkeypatch):
+    monkeypatch.setattr(stt.vosk, "Model", lambda *a, **k: object())
+    monkeypatch.setattr(stt.vosk, "KaldiRecognizer", FakeRecognizer)
+    monkeypatch.setattr(stt, "_VOSK_MODEL", None)
+    monkeypatch.setattr(stt, "_pools", {})
+    FakeRecognizer.received = []
+
+    db_file = tmp_path / "transcricao.db"
+    monkeypatch.setattr(dao, "DB_PATH", str(db_file))
+    dao.init_db(str(db_file))
+
+    pasta = tmp_path / "memos"
+    pasta.mkdir()
+    tone = (3000 * np.sin(np.arange(8000 * 5) / 3)).astype(np.int16)
+    _wav(pasta / "a_mono.wav", tone, channels=1)
+    _wav(pasta / "b_stereo.wav", np.repeat(tone[:8000], 2), channels=2)
+    _wav(pasta / "c_silencio.wav", np.zeros(8000, dtype=np.int16), channels=1)
+    (pasta / "d_quebrado.wav").write_bytes(b"not a wav")
+    (pasta / "notas.txt").write_text("ignored")
+    return pasta, dao.add_user("Alice", "tipo")
+
+
+def _wav(path, samples, channels):
+    with wave.open(str(path), "wb") as arquivo:
+        arquivo.setnchannels(channels)
+        arquivo.setsampwidth(2)
+        arquivo.setframerate(8000)
+        arquivo.writeframes(samples.tobytes())
+
+
+def test_transcribes_directory_in_chunks_into_ideas(memos):
+    pasta, user_id = memos
+
+    resultados = transcricao.transcrever_diretorio(pasta, user_id, processos=1)
+
+    nomes = [r.caminho.rsplit("/", 1)[-1] for r in resultados]
+    assert nomes == ["a_mono.wav", "b_stereo.wav", "c_silencio.wav", "d_quebrado.wav"]
+    mono, stereo, silencio, quebrado = resultados
+    # 5 s read in 4 s chunks; stereo is downmixed before recognition.
+    assert FakeRecognizer.received[:3] == [64000, 16000, 16000]
+    assert (mono.duracao, stereo.duracao) == (5.0, 1.0)
+    assert mono.texto == "ola ola" and mono.fator_tempo_real > 0
+    assert silencio.texto == "" and silencio.idea_id is None
+    assert quebrado.erro and quebrado.idea_id is None
+
+    ideias = dao.list_ideas(user_id)
+    assert sorted(i["title"] for i in ideias) == ["a_mono", "b_stereo"]
+    assert {i["source"] for i in ideias} == {"transcricao"}
+
+
+def test_rerun_does_not_duplicate_and_enqueues_only_new_ideas(memos):
+    pasta, user_id = memos
+
+    primeiro = transcricao.transcrever_diretorio(
+        pasta, user_id, processos=1, enriquecer=True
+    )
+    segundo = transcricao.transcrever_diretorio(
+        pasta, user_id, processos=1, enriquecer=True
+    )
+
+    assert [r.idea_id for r in segundo] == [r.idea_id for r in primeiro]
+    assert len(dao.list_ideas(user_id)) == 2
+    job = jobs.latest_job_for_idea(primeiro[0].idea_id)
+    assert job["kind"] == jobs.ENRICH_IDEA and job["status"] == jobs.PENDING
+    with dao.connections.transaction(dao.DB_PATH) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 2
+
+
+def test_rerun_skips_saved_files_and_keys_are_per_user(memos, capsys, monkeypatch):
+    pasta, alice = memos
+    bob = dao.add_user("Bob", "tipo")
+    transcricao.transcrever_diretorio(pasta, alice, processos=1)
+    FakeRecognizer.received = []
+
+    monkeypatch.setattr(dao, "init_db", lambda *a, **k: None)
+    transcricao.main([str(pasta), "--usuario", str(alice), "--processos", "1"])
+
+    saida = capsys.readouterr().out
+    assert "a_mono.wav: já transcrito" in saida
+    assert "4 arquivos, 0 ideias gravadas, 2 já existentes" in saida
+    # Only the files without an idea are recognized again.
+    assert len(FakeRecognizer.received) == 1
+
+    resultados = transcricao.transcrever_diretorio(pasta, bob, processos=1)
+    assert sum(1 for r in resultados if r.idea_id and not r.existente) == 2
+    assert sorted(i["title"] for i in dao.list_ideas(bob)) == ["a_mono", "b_stereo"]
+    assert len(dao.list_ideas(alice)) == 2
@@ -0,0 +1,120 @@
+import threading
+
+from hermes.services import tts
+
+
+class FakeEngine:
+    """Records spoken texts; ``runAndWait`` can be held to simulate speech."""
+
+    def __init__(self):
+        self.spoken: list[str] = []
+        self.stopped = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.speaking = threading.Event()
+        self._callback = None
+        self._text = None
+
+    def connect(self, topic, callback):
+        assert topic == "started-word"
+        self._callback = callback
+
+    def say(self, text):
+        self._text = text
+
+    def runAndWait(self):
+        self.speaking.set()
+        while not self.release.wait(0.01):
+            before = self.stopped
+            self._callback(None, 0, 1)
+            if self.stopped != before:
+                break
+        self.spoken.append(self._text)
+        self.speaking.clear()
+
+    def stop(self):
+        self.stopped += 1
+
+
+def _worker(engine):
+    worker = tts.TTSWorker(engine_factory=lambda: engine)
+    worker.start()
+    return worker
+
+
+def test_engine_is_created_once_and_priorities_are_respected():
+    engine = FakeEngine()
+    created = []
+
+    def factory():
+        created.append(True)
+        return engine
+
+    worker = tts.TTSWorker(engine_factory=factory)
+    engine.release.clear()
+    worker.start()
+    try:
+        first = worker.speak("primeira", tts.PRIORITY_NOTICE)
+        assert engine.speaking.wait(2)
+        worker.speak("aviso", tts.PRIORITY_NOTICE)
+        worker.speak("resposta", tts.PRIORITY_REPLY)
+        last = worker.speak("lembrete", tts.PRIORITY_ALERT)
+        engine.release.set()
+        assert last.wait(2)
+        assert first.done
+        worker.speak("fim", tts.PRIORITY_NOTICE).wait(2)
+    finally:
+        worker.stop()
+
+    assert created == [True]
+    assert engine.spoken == ["primeira", "lembrete", "resposta", "aviso", "fim"]
+
+
+def test_cancel_all_interrupts_current_and_drops_pending():
+    engine = FakeEngine()
+    engine.release.clear()
+    worker = _worker(engine)
+    try:
+        current = worker.speak("longa")
+        assert engine.speaking.wait(2)
+        pending = worker.speak("pendente")
+
+        worker.cancel_all()
+        assert current.wait(2) and pending.wait(2)
+        engine.release.set()
+        worker.speak("nova").wait(2)
+    finally:
+        worker.stop()
+
+    assert engine.stopped == 1
+    assert engine.spoken == ["longa", "nova"]  # "longa" was cut short
+
+
+def test_interrupt_only_preempts_lower_priority_speech():
+    engine = FakeEngine()
+    engine.release.clear()
+    worker = _worker(engine)
+    try:
+        alert = worker.speak("alerta", tts.PRIORITY_ALERT)
+        assert engine.speaking.wait(2)
+        worker.speak("resposta", tts.PRIORITY_REPLY, interrupt=True)
+        assert not alert.cancelled
+
+        engine.release.set()
+        assert alert.wait(2)
+    finally:
+        worker.stop()
+
+
+def test_failed_engine_falls_back_to_logging(caplog):
+    def broken():
+        raise RuntimeError("sem áudio")
+
+    worker = tts.TTSWorker(engine_factory=broken)
+    worker.start()
+    try:
+        with caplog.at_level("INFO", logger=tts.__name__):
+            assert worker.speak("olá").wait(2)
+    finally:
+        worker.stop()
+    assert "TTS: olá" in caplog.text
@@ -0,0 +1,272 @@
+import json
+import sys
+import types
+
+import numpy as np
+import pytest
+
+try:
+    import sounddevice  # noqa: F401
+except OSError:  # PortAudio missing: the listener logic does not need it
+    sys.modules["sounddevice"] = types.ModuleType("sounddevice")
+
+from hermes.assistant import voice
+
+BLOCK = 1600  # 0.1 s of int16 mono at 8 kHz
+
+
+class FakeRecognizer:
+    """Returns scripted partial/final results, one per block."""
+
+    def __init__(self, model, samplerate):
+        self.script: list[tuple[bool, str]] = []
+        self.partial_calls = 0
+        self.accepted = 0
+
+    def AcceptWaveform(self, data):
+        assert isinstance(data, bytes)
+        self.accepted += 1
+        self._final, self._text = self.script.pop(0)
+        return self._final
+
+    def Result(self):
+        return json.dumps({"text": self._text})
+
+    def PartialResult(self):
+        self.partial_calls += 1
+        return json.dumps({"partial": self._text})
+
+    def FinalResult(self):
+        return json.dumps({"text": self._text})
+
+
+def _make_listener(monkeypatch, **kwargs):
+    monkeypatch.setattr(voice.vosk, "KaldiRecognizer", FakeRecognizer)
+
+    class Listener(voice.HotwordListener):
+        def __init__(self):
+            super().__init__(
+                samplerate=8000,
+                block_duration=0.1,
+                model=object(),
+                pre_roll=0.2,
+                **kwargs,
+            )
+            self.hotwords: list[str] = []
+            self.commands: list[str] = []
+
+        def on_hotword_detected(self, texto):
+            self.hotwords.append(texto)
+
+        def on_command(self, texto):
+            self.commands.append(texto)
+
+    return Listener()
+
+
+@pytest.fixture
+def listener(monkeypatch):
+    return _make_listener(monkeypatch, vad=False)
+
+
+def _noise(n, amplitude=20, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(-amplitude, amplitude, n, dtype=np.int16).tobytes()
+
+
+def _tone(n, freq=220.0, amplitude=6000, samplerate=8000):
+    t = np.arange(n) / samplerate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16).tobytes()
+
+
+def _feed(listener, blocks):
+    for block in blocks:
+        listener._audio_callback(block, len(block) // 2, None, None)
+        view = listener._buffer.ler(len(block))
+        try:
+            listener._processar_bloco(view)
+        finally:
+            listener._buffer.consumir(len(view))
+
+
+def test_hotword_keeps_pre_roll_and_command_follows(listener):
+    listener._recognizer.script = [
+        (False, ""),
+        (False, "hermes"),
+        (False, "hermes que"),
+        (True, "hermes que horas são"),
+        (False, "obrigado"),
+    ]
+    blocks = [bytes([n]) * BLOCK for n in range(1, 6)]
+    _feed(listener, blocks[:2])
+
+    assert listener.hotwords == ["hermes"]
+    assert listener.pre_roll == blocks[0] + blocks[1]  # 0.2 s before detection
+
+    _feed(listener, blocks[2:])
+    assert listener.commands == ["hermes que horas são"]
+    # No partial result is requested while awaiting the command.
+    assert listener._recognizer.partial_calls == 3
+
+
+def test_unchanged_partials_are_not_reprocessed(listener, monkeypatch):
+    processed = []
+    monkeypatch.setattr(
+        listener, "_process_result", lambda texto, is_final: processed.append(texto)
+    )
+    listener._recognizer.script = [(False, "bom")] * 3 + [(False, "bom dia")]
+
+    _feed(listener, [b"\0" * BLOCK] * 4)
+
+    assert processed == ["bom", "bom dia"]
+    assert listener.audio_recente(0.1) == b"\0" * BLOCK
+
+
+def test_pooled_recognizer_is_returned_when_listening_stops(monkeypatch):
+    class Pool:
+        def __init__(self):
+            self.obtidos, self.devolvidos = [], []
+
+        def obter(self):
+            self.obtidos.append(FakeRecognizer(None, 8000))
+            return self.obtidos[-1]
+
+        def devolver(self, recognizer):
+            self.devolvidos.append(recognizer)
+
+    pool = Pool()
+    monkeypatch.setattr(voice, "get_recognizer_pool", lambda samplerate: pool)
+    listener = voice.HotwordListener(samplerate=8000)
+    listener.stop()
+    assert pool.devolvidos == pool.obtidos and len(pool.obtidos) == 1
+
+    def sem_microfone(**kwargs):
+        raise OSError("no input device")
+
+    monkeypatch.setattr(voice.sd, "RawInputStream", sem_microfone, raising=False)
+    monkeypatch.setattr(listener, "on_error", lambda exc: None)
+    listener.start()
+    listener._thread.join(2.0)
+
+    # Restarting takes a recognizer again; the loop returns it when it ends.
+    assert len(pool.obtidos) == 2
+    assert pool.devolvidos == pool.obtidos
+
+
+def test_vad_gate_opens_on_speech_and_holds_for_hangover():
+    gate = voice.VoiceActivityGate(8000, hangover=0.2)
+    silence = _noise(BLOCK // 2)
+
+    assert not any(gate.processar(silence) for _ in range(5))
+    assert gate.processar(_tone(BLOCK // 2))
+    # 0.2 s of hangover = two 0.1 s blocks, then the gate closes.
+    assert [gate.processar(silence) for _ in range(3)] == [True, True, False]
+    # Broadband hiss has a high zero-crossing rate and is not speech.
+    assert not gate.processar(_noise(BLOCK // 2, amplitude=8000))
+
+
+def test_vad_gate_closes_after_a_step_in_background_level():
+    gate = voice.VoiceActivityGate(8000, hangover=0.2, janela_ruido=1.0)
+    assert not any(gate.processar(_noise(BLOCK // 2, seed=n)) for n in range(5))
+
+    # A fan switches on: a loud, low-pitched hum that never pauses.
+    hum = _tone(BLOCK // 2, freq=120.0, amplitude=3000)
+    abertos = [gate.processar(hum) for _ in range(20)]
+
+    assert abertos[0]
+    # 1 s of window plus 0.2 s of hangover, then the hum is background.
+    assert abertos.index(False) <= 13
+    assert not any(abertos[13:])
+
+
+def test_vad_floor_ignores_speech_with_near_threshold_pauses():
+    gate = voice.VoiceActivityGate(8000, janela_ruido=1.0)
+    for n in range(5):
+        gate.processar(_noise(BLOCK // 2, amplitude=173, seed=n))
+    piso = gate.ruido
+
+    # Every fifth block is a pause just under the threshold (RMS ~280 vs 300).
+    fala = _tone(BLOCK // 2)
+    pausa = _tone(BLOCK // 2, freq=120.0, amplitude=396)
+    for _ in range(8):
+        assert all(gate.processar(fala) for _ in range(4))
+        gate.processar(pausa)
+
+    assert gate.ruido < 2 * piso
+
+
+def test_idle_audio_never_reaches_the_recognizer(monkeypatch):
+    listener = _make_listener(monkeypatch)
+
+    _feed(listener, [_noise(BLOCK // 2, seed=n) for n in range(50)])
+
+    assert listener._recognizer.accepted == 0
+    stats = listener.estatisticas
+    assert stats.blocos == 50 and stats.blocos_encaminhados == 0
+    assert stats.fracao_encaminhada == 0.0 and stats.segmentos == 0
+
+
+def test_speech_segment_is_padded_flushed_and_timed(monkeypatch):
+    listener = _make_listener(
+        monkeypatch, vad=voice.VoiceActivityGate(8000, hangover=0.1)
+    )
+    listener._recognizer.script = [
+        (False, ""),  # padding before the gate opened
+        (False, "hermes"),
+        (False, "hermes que"),
+        (False, "hermes que horas"),
+    ]
+    silence = [_noise(BLOCK // 2, seed=n) for n in range(5)]
+    _feed(listener, silence + [_tone(BLOCK // 2)] * 2)
+
+    assert listener.hotwords == ["hermes"]
+    assert listener.estatisticas.segmentos == 1
+    assert len(listener.estatisticas.latencias_deteccao) == 1
+
+    # Hangover block is forwarded; the next silent block closes the segment
+    # and the final result is requested from the recognizer.
+    _feed(listener, silence[:3])
+    assert listener.commands == ["hermes que horas"]
+    assert listener.estatisticas.blocos_encaminhados == 3
+    assert listener._recognizer.accepted == 4
+
+
+def test_capture_streams_partials_and_stops_on_trailing_silence(monkeypatch):
+    monkeypatch.setattr(voice.vosk, "KaldiRecognizer", FakeRecognizer)
+    parciais = []
+    captura = voice.CapturaFala(
+        object(),
+        samplerate=8000,
+        silencio_final=0.2,
+        espera_inicial=0.5,
+        on_parcial=parciais.append,
+    )
+    captura._reiniciar(FakeRecognizer(None, 8000))
+    captura._recognizer.script = [
+        (False, ""),
+        (False, ""),
+        (False, "que"),
+        (False, "que horas"),
+        (True, "que horas são"),
+    ] + [(False, "")] * 10
+    blocks = [_noise(BLOCK // 2, seed=n) for n in range(2)] + [_tone(BLOCK // 2)] * 3
+    blocks += [_noise(BLOCK // 2, seed=n) for n in range(10)]
+
+    ended = [captura.processar(block) for block in blocks]
+
+    # 0.2 s of hangover after the last spoken block, then the capture ends.
+    assert ended.index(True) == 7
+    assert parciais == ["que", "que horas", "que horas são"]
+    assert captura.finalizar() == "que horas são"
+
+
+def test_capture_gives_up_when_nobody_speaks(monkeypatch):
+    monkeypatch.setattr(voice.vosk, "KaldiRecognizer", FakeRecognizer)
+    captura = voice.CapturaFala(object(), samplerate=8000, espera_inicial=0.5)
+    captura._reiniciar(FakeRecognizer(None, 8000))
+    captura._recognizer.script = [(False, "")] * 10
+
+    ended = [captura.processar(_noise(BLOCK // 2, seed=n)) for n in range(10)]
+
+    assert ended.index(True) == 4  # 0.5 s of silence
+    assert captura.finalizar() == ""